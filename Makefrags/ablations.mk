@@ -15,6 +15,27 @@ run-queue-size-ablations-sanity:
 run-queue-size-ablations:
 	$(PYTHON) scripts/evaluate/ablate_on_queues.py --sim ./obj_dir/VSingleChannelSystem --trace traces/conv2d_trace.txt --outdir $(QUEUE_ABLATIONS_EXPERIMENT_DIR) --csv_dir . --cycles $(SIMULATION_CYCLES) --start 1 --end 512
 
+# Performance per watt across the queue size sweep
+run-queue-size-ablations-energy:
+	$(PYTHON) scripts/analyze/energy.py $(QUEUE_ABLATIONS_EXPERIMENT_DIR) --cycles $(SIMULATION_CYCLES) --out $(QUEUE_ABLATIONS_EXPERIMENT_DIR)/energy.csv
+
+# One HTML report for the whole queue size sweep
+run-queue-size-ablations-report:
+	$(PYTHON) scripts/visualize/build_report.py $(QUEUE_ABLATIONS_EXPERIMENT_DIR) --out $(QUEUE_ABLATIONS_EXPERIMENT_DIR)/report.html
+
+# Hyperband search over queue size, ranks, banks and page policy; promotes only promising configs to full length
+DESIGN_SEARCH_DIR := design_search
+run-design-search:
+	$(PYTHON) scripts/evaluate/design_search.py --trace traces/conv2d_trace.txt --cycles $(SIMULATION_CYCLES) --queue-sizes 1 2 4 8 16 32 64 128 256 512 --ranks 1 2 4 --banks 4 8 16 --outdir $(DESIGN_SEARCH_DIR) --bins-dir $(DESIGN_SEARCH_DIR)/bins --checkpoints checkpoint_cache
+
+# Surrogate latency/throughput model trained on every finished experiment; run-design-search-screened uses it
+SURROGATE_MODEL := surrogate.json
+train-surrogate:
+	$(PYTHON) scripts/evaluate/surrogate.py train $(wildcard $(EXPERIMENT_DIR) exps_*/current $(QUEUE_ABLATIONS_EXPERIMENT_DIR)) --out $(SURROGATE_MODEL)
+
+run-design-search-screened:
+	$(PYTHON) scripts/evaluate/design_search.py --trace traces/conv2d_trace.txt --cycles $(SIMULATION_CYCLES) --queue-sizes 1 2 4 8 16 32 64 128 256 512 --ranks 1 2 4 --banks 4 8 16 --outdir $(DESIGN_SEARCH_DIR) --bins-dir $(DESIGN_SEARCH_DIR)/bins --checkpoints checkpoint_cache --surrogate $(SURROGATE_MODEL)
+
 run-cycle-latencies-profile:
 	$(PYTHON) scripts/evaluate/evaluate_cycle_latencies_current.py exps_128_q/current/exp_conv2d_trace/meta/ --scale $(SCALE)
 
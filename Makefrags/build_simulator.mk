@@ -1,4 +1,4 @@
-.PHONY: all clean verilog verilator-run
+.PHONY: all clean verilog verilator-run verilator-lib
 
 SRC_DIR      := src
 VERILOG_DIR  := $(SRC_DIR)/main/resources/vsrc
@@ -41,7 +41,16 @@ verilog:
 
 
 verilator-trace: 
-	verilator --cc --exe --build -Mdir obj_dir -o V$(TOP_MODULE) src/main/resources/vsrc/MultiChannelSystem.sv ./sims/sim_trace.cpp
+	verilator --cc --exe --build --savable -CFLAGS -DSIM_SAVABLE -Mdir obj_dir -o V$(TOP_MODULE) src/main/resources/vsrc/MultiChannelSystem.sv ./sims/sim_trace.cpp
+
+# Shared library for the in-process Python driver (scripts/evaluate/memsim.py)
+LIB_DIR        := obj_lib
+VERILATOR_ROOT ?= $(shell verilator --getenv VERILATOR_ROOT)
+
+verilator-lib:
+	verilator --cc --build -Mdir $(LIB_DIR) -CFLAGS -fPIC src/main/resources/vsrc/MultiChannelSystem.sv
+	$(CXX) -std=c++17 -O2 -shared -fPIC -pthread -I$(LIB_DIR) -I$(VERILATOR_ROOT)/include -I$(VERILATOR_ROOT)/include/vltstd \
+		sims/memsim_lib.cpp $(LIB_DIR)/V$(TOP_MODULE)__ALL.a $(LIB_DIR)/libverilated.a -o $(LIB_DIR)/libmemsim.so
 
 verilator-sanity-test:
 	verilator --cc --exe --build -Mdir obj_dir -o V$(TOP_MODULE) src/main/resources/vsrc/MultiChannelSystem.sv ./sims/sim_random.cpp
@@ -52,7 +61,7 @@ all: verilog verilator-trace
 # Clean up generated files
 build-clean:
 	@echo "Cleaning up simulation files..."
-	rm -rf obj_dir
+	rm -rf obj_dir $(LIB_DIR)
 	rm -f V$(TOP_MODULE)
 	rm -f *.csv
 	rm -f *.log
@@ -2,6 +2,8 @@
 PYTHON := python
 EXAMPLES_DIR := benchmarks
 TRACES_DIR := traces
+# Experiments reference their traces by content hash in this store instead of copying them
+TRACE_STORE_DIR := trace_store
 
 EXPERIMENT_DIR := exps/current
 DRAMSIM_EXPERIMENT_DIR := exps/dramsim
@@ -9,20 +11,71 @@ DIFF_EXPERIMENTS_DIR := exps/diff
 
 TOTAL_SIMULATION_CYCLES := 100000
 
+# LLC filter applied while converting Lackey traces (LLC_SIZE=0 keeps every CPU access)
+LLC_SIZE ?= 0
+LLC_WAYS ?= 16
+LLC_LINE ?= 64
+# Merge same-burst accesses at most COALESCE_WINDOW cycles apart (0 disables coalescing)
+COALESCE_WINDOW ?= 0
+# COMPRESS_TRACES=1 writes traces as compressed, seekable .mtrace files
+COMPRESS_TRACES ?= 0
+TRACE_FILTER_FLAGS := --llc-size $(LLC_SIZE) --llc-ways $(LLC_WAYS) --llc-line $(LLC_LINE) --coalesce-window $(COALESCE_WINDOW) $(if $(filter 1,$(COMPRESS_TRACES)),--compress)
+
+# Trace replay: open (issue at trace cycles) or closed (at most REPLAY_MSHRS requests outstanding)
+REPLAY_MODE ?= open
+REPLAY_MSHRS ?= 16
+REPLAY_FLAGS := --replay $(REPLAY_MODE) --mshrs $(REPLAY_MSHRS)
+
+# STEADY_STATE=1 stops each run once latency/throughput converge within STEADY_TOLERANCE
+STEADY_STATE ?= 0
+STEADY_TOLERANCE ?= 0.02
+STEADY_FLAGS := $(if $(filter 1,$(STEADY_STATE)),--steady-state --steady-tolerance $(STEADY_TOLERANCE))
+
+# OFFLINE_VERIFY=1 records compact request/response records and checks data integrity after each run
+OFFLINE_VERIFY ?= 0
+VERIFY_FLAGS := $(if $(filter 1,$(OFFLINE_VERIFY)),--offline-verify)
+
+# PROFILE=1 records wall/CPU time, peak RSS and I/O of every script step to $(PROFILE_DIR)/timeline.jsonl
+# (PROFILE_CPROFILE=1 also dumps a cProfile per step)
+PROFILE ?= 0
+PROFILE_CPROFILE ?= 0
+PROFILE_DIR := profile
+ifeq ($(PROFILE),1)
+export MEMCTRL_PROFILE := $(abspath $(PROFILE_DIR))
+export MEMCTRL_PROFILE_CPROFILE := $(PROFILE_CPROFILE)
+endif
+PROFILE_FLAGS := $(if $(filter 1,$(PROFILE)),--profile $(PROFILE_DIR) $(if $(filter 1,$(PROFILE_CPROFILE)),--cprofile))
+
+# Performance regression gate
+REGRESSION_BASELINE := regression/baseline.json
+REGRESSION_WORKDIR := regression_runs
+
+# Simulator wall-clock benchmarks
+BENCHMARK_DIR := bench_results
+BENCHMARK_SIZES := 1000 10000 0
+
+# Sampled (windowed) simulation of long traces
+SAMPLED_TRACE ?= $(TRACES_DIR)/conv2d_trace.txt
+SAMPLED_WORKDIR := sampled_runs
+SAMPLED_WINDOW := 10000
+SAMPLED_WARMUP := 2000
+# Warm-state snapshot cache shared by sampled windows and checkpoint forks (needs the --savable verilator-trace build)
+CHECKPOINT_CACHE := checkpoint_cache
+
 # DRAMSim3 Configuration
 DRAMSIM_BINARY := /home/nixos/CodingWorkspace/hardware/mem-controller/DRAMsim3/build/dramsim3main
 DRAMSIM_MEMORY_CONFIG := HBM2_4Gb_x128.ini
 
-.PHONY: convert-traces evaluate-current evaluate-dramsim3 compare-experiments post-job-cleanup evaluate evaluate-dramsim evaluate-all
+.PHONY: convert-traces evaluate-current evaluate-dramsim3 compare-experiments post-job-cleanup evaluate evaluate-dramsim evaluate-all regression-baseline regression-gate benchmark-simulator sampled-simulation lifecycle-current queues-current tail-current energy-current pipeline report-current sharded-simulation sweep-serve sweep-worker checkpoint-fork load-latency verify-records heatmaps-current profile-summary
 
 # Convert C programs to trace format
 convert-traces:
 	rm -rf $(TRACES_DIR)
-	$(PYTHON) scripts/preprocess/convert_c_to_traces.py $(EXAMPLES_DIR) -o $(TRACES_DIR)
+	$(PYTHON) scripts/preprocess/convert_c_to_traces.py $(EXAMPLES_DIR) -o $(TRACES_DIR) $(TRACE_FILTER_FLAGS)
 
 evaluate-current-no-rebuild: 
 	rm -rf $(EXPERIMENT_DIR)
-	$(PYTHON) scripts/evaluate/evaluate_trace_current.py --sim $(TARGET) --traces $(TRACES_DIR) --outdir $(EXPERIMENT_DIR) --csv_dir . --cycles $(TOTAL_SIMULATION_CYCLES)
+	$(PYTHON) scripts/evaluate/evaluate_trace_current.py --sim $(TARGET) --traces $(TRACES_DIR) --outdir $(EXPERIMENT_DIR) --csv_dir . --cycles $(TOTAL_SIMULATION_CYCLES) --trace-store $(TRACE_STORE_DIR) --sim-config src/main/config/config.json $(REPLAY_FLAGS) $(STEADY_FLAGS) $(VERIFY_FLAGS)
 
 # Evaluate custom Chisel-based simulator
 # verilator-trace and verilog should be a job in build_simulator that elaborates our Chisel + builds our sim exe
@@ -34,7 +87,7 @@ visualize-current:
 # Evaluate DRAMSim3 reference
 evaluate-dramsim3: convert-traces
 	rm -rf $(DRAMSIM_EXPERIMENT_DIR)
-	$(PYTHON) scripts/evaluate/evaluate_trace_dramsim3.py --sim $(DRAMSIM_BINARY) --traces $(TRACES_DIR) --outdir $(DRAMSIM_EXPERIMENT_DIR) --csv_dir . --cycles $(TOTAL_SIMULATION_CYCLES) --dramsim-config $(DRAMSIM_MEMORY_CONFIG)
+	$(PYTHON) scripts/evaluate/evaluate_trace_dramsim3.py --sim $(DRAMSIM_BINARY) --traces $(TRACES_DIR) --outdir $(DRAMSIM_EXPERIMENT_DIR) --csv_dir . --cycles $(TOTAL_SIMULATION_CYCLES) --dramsim-config $(DRAMSIM_MEMORY_CONFIG) --trace-store $(TRACE_STORE_DIR)
 
 visualize-dramsim3:
 	$(PYTHON) scripts/visualize/visualize_experiments.py $(DRAMSIM_EXPERIMENT_DIR) --num-cycles $(TOTAL_SIMULATION_CYCLES) --prefix dramsim
@@ -43,6 +96,84 @@ visualize-dramsim3:
 compare-experiments:
 	$(PYTHON) scripts/compare/diff_experiments.py --current-dir $(EXPERIMENT_DIR) --baseline-dir $(DRAMSIM_EXPERIMENT_DIR) --out-dir $(DIFF_EXPERIMENTS_DIR)
 
+# Record the current simulator's performance on the benchmark traces as the regression baseline
+regression-baseline:
+	$(PYTHON) scripts/evaluate/regression_gate.py --sim $(TARGET) --traces $(TRACES_DIR) --cycles $(TOTAL_SIMULATION_CYCLES) --baseline $(REGRESSION_BASELINE) --workdir $(REGRESSION_WORKDIR) $(REPLAY_FLAGS) --update-baseline
+
+# Fail (non-zero exit) if throughput or latency quantiles regressed against the baseline
+regression-gate:
+	$(PYTHON) scripts/evaluate/regression_gate.py --sim $(TARGET) --traces $(TRACES_DIR) --cycles $(TOTAL_SIMULATION_CYCLES) --baseline $(REGRESSION_BASELINE) --workdir $(REGRESSION_WORKDIR) --report $(REGRESSION_WORKDIR)/report.txt $(REPLAY_FLAGS)
+
+# Measure simulated cycles/s, requests/s, wall time and peak RSS of the trace harness
+benchmark-simulator:
+	$(PYTHON) scripts/evaluate/benchmark_simulator.py --sim default=$(TARGET) --traces $(TRACES_DIR) --sizes $(BENCHMARK_SIZES) --cycles $(TOTAL_SIMULATION_CYCLES) --outdir $(BENCHMARK_DIR) $(REPLAY_FLAGS)
+
+# Estimate whole-trace latency/throughput from clustered representative windows (no cycle cap truncation)
+sampled-simulation:
+	$(PYTHON) scripts/evaluate/sampled_simulation.py --sim $(TARGET) --trace $(SAMPLED_TRACE) --window $(SAMPLED_WINDOW) --warmup $(SAMPLED_WARMUP) --workdir $(SAMPLED_WORKDIR) --out $(SAMPLED_WORKDIR)/estimate.json --checkpoints $(CHECKPOINT_CACHE) $(REPLAY_FLAGS)
+
+# Simulate every current trace from one warm-state snapshot at CHECKPOINT_CYCLE, once per cap in CHECKPOINT_CAPS
+CHECKPOINT_CYCLE ?= 20000
+CHECKPOINT_CAPS ?= $(TOTAL_SIMULATION_CYCLES)
+
+checkpoint-fork:
+	$(PYTHON) scripts/evaluate/checkpoints.py --sim $(TARGET) --traces $(wildcard $(TRACES_DIR)/*.txt) --warm-cycle $(CHECKPOINT_CYCLE) --cycles $(CHECKPOINT_CAPS) --outdir checkpoint_runs --cache $(CHECKPOINT_CACHE) $(REPLAY_FLAGS)
+
+# Load-latency curve and saturation knee (synthetic traffic unless LOAD_TRACE is set)
+LOAD_TRACE ?=
+LOAD_KNEE_MULTIPLE ?= 3
+
+load-latency:
+	$(PYTHON) scripts/evaluate/load_latency.py --sim $(TARGET) $(if $(LOAD_TRACE),--trace $(LOAD_TRACE)) --knee-multiple $(LOAD_KNEE_MULTIPLE) --outdir load_latency --workdir load_latency_runs --plot
+
+# Simulate a SHARDED_CHANNELS-channel trace as one single-channel (numChannels: 1) build per channel, in parallel
+SHARDED_TRACE ?= $(TRACES_DIR)/conv2d_trace.txt
+SHARDED_CHANNELS ?= 8
+SHARDED_WORKDIR := sharded_runs
+sharded-simulation:
+	$(PYTHON) scripts/evaluate/sharded_simulation.py --sim $(TARGET) --trace $(SHARDED_TRACE) --channels $(SHARDED_CHANNELS) --cycles $(TOTAL_SIMULATION_CYCLES) --workdir $(SHARDED_WORKDIR) --summary $(SHARDED_WORKDIR)/summary.json $(REPLAY_FLAGS)
+
+# Per-request stage waterfall (timeline + per-rank/bank stage wait quantiles) for every current experiment
+lifecycle-current:
+	for meta in $(EXPERIMENT_DIR)/exp_*/meta; do \
+		$(PYTHON) scripts/analyze/lifecycle.py $$meta --out $$meta/../lifecycle.npy --summary $$meta/../stage_waits.csv; \
+	done
+
+# Queue occupancy, backpressure against queueSize and Little's-law checks for every current experiment
+queues-current:
+	for meta in $(EXPERIMENT_DIR)/exp_*/meta; do \
+		$(PYTHON) scripts/analyze/queue_occupancy.py $$meta --summary $$meta/../queue_summary.csv --timeseries $$meta/../queue_occupancy.csv; \
+	done
+
+# Attribute the slowest TAIL_FRACTION of requests to refresh, row conflicts, turnarounds and bank queueing
+TAIL_FRACTION ?= 0.01
+tail-current:
+	for meta in $(EXPERIMENT_DIR)/exp_*/meta; do \
+		$(PYTHON) scripts/analyze/tail_latency.py $$meta --tail $(TAIL_FRACTION) --json $$meta/../tail_causes.json; \
+	done
+
+# DRAM energy (IDD model from $(DRAMSIM_MEMORY_CONFIG)), pJ/bit and requests per joule per experiment
+energy-current:
+	$(PYTHON) scripts/analyze/energy.py $(EXPERIMENT_DIR) --ini $(DRAMSIM_MEMORY_CONFIG) --cycles $(TOTAL_SIMULATION_CYCLES) --out $(EXPERIMENT_DIR)/energy.csv
+
+# Bank/row access and latency heatmaps of every current experiment
+heatmaps-current:
+	$(PYTHON) scripts/visualize/plot_bank_heatmaps.py $(wildcard $(EXPERIMENT_DIR)/exp_*) --outdir $(EXPERIMENT_DIR)/heatmaps
+
+# Per-stage and per-experiment totals of a PROFILE=1 run
+profile-summary:
+	$(PYTHON) scripts/evaluate/profiling.py summary $(PROFILE_DIR)
+	$(PYTHON) scripts/evaluate/profiling.py summary $(PROFILE_DIR) --by experiment
+
+# Self-contained HTML report (latency PDFs, Pareto curve, breakdown; DRAMSim3 overlay when available)
+report-current:
+	$(PYTHON) scripts/visualize/build_report.py $(EXPERIMENT_DIR) --out $(EXPERIMENT_DIR)/report.html $(if $(wildcard $(DRAMSIM_EXPERIMENT_DIR)/exp_*),--baseline $(DRAMSIM_EXPERIMENT_DIR))
+
+# Same workflow as a content-hashed DAG: only stages whose scripts, inputs or parameters changed rerun
+PIPELINE_JOBS ?= 4
+pipeline:
+	$(PYTHON) scripts/pipeline.py --jobs $(PIPELINE_JOBS) --cycles $(TOTAL_SIMULATION_CYCLES) --examples-dir $(EXAMPLES_DIR) --traces-dir $(TRACES_DIR) --trace-store $(TRACE_STORE_DIR) --experiment-dir $(EXPERIMENT_DIR) --dramsim-experiment-dir $(DRAMSIM_EXPERIMENT_DIR) --diff-dir $(DIFF_EXPERIMENTS_DIR) --dramsim $(DRAMSIM_BINARY) --dramsim-config $(DRAMSIM_MEMORY_CONFIG) --tail-fraction $(TAIL_FRACTION) --trace-flags="$(TRACE_FILTER_FLAGS)" --replay-flags="$(REPLAY_FLAGS)" $(PROFILE_FLAGS)
+
 # Post-run cleanup of metadata and intermediate outputs
 post-job-cleanup: clean
 	mkdir -p $(DRAMSIM_EXPERIMENT_DIR)/metadata
@@ -64,3 +195,21 @@ clean:
 	rm -f *.trace 
 	rm -f *.csv
 	rm -f *.json
+
+# Distributed sweep: serve the current traces as jobs, and attach workers (on this or other hosts) to SWEEP_URL
+SWEEP_ADDRESS ?= 0.0.0.0:8765
+SWEEP_URL ?= http://localhost:8765
+SWEEP_SLOTS ?= 1
+# Prebuilt simulator for jobs without config overrides (e.g. $(TARGET)); jobs with overrides are built per config under the worker's bins/
+SWEEP_SIM ?=
+
+sweep-serve:
+	rm -rf $(EXPERIMENT_DIR)
+	$(PYTHON) scripts/evaluate/evaluate_trace_current.py --sim $(TARGET) --traces $(TRACES_DIR) --outdir $(EXPERIMENT_DIR) --csv_dir . --cycles $(TOTAL_SIMULATION_CYCLES) --serve $(SWEEP_ADDRESS) $(REPLAY_FLAGS)
+
+sweep-worker:
+	$(PYTHON) scripts/evaluate/distributed_sweep.py work $(SWEEP_URL) --slots $(SWEEP_SLOTS) $(if $(SWEEP_SIM),--sim $(SWEEP_SIM))
+
+# Check the harness records of the last -V run in the working directory
+verify-records:
+	$(PYTHON) scripts/evaluate/verify_records.py . --write-report
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Command-count energy model and performance-per-watt for RTL runs.
+
+Uses the ``[power]`` IDD currents and VDD of a DRAMSim3 ini (by default
+``HBM2_4Gb_x128.ini``) with the same per-command increments DRAMSim3 applies:
+
+    ACTIVATE   VDD * (IDD0 * tRC - (IDD3N * tRAS + IDD2N * (tRC - tRAS)))
+    READ       VDD * (IDD4R - IDD3N) * burst_cycles
+    WRITE      VDD * (IDD4W - IDD3N) * burst_cycles
+    REFRESH    VDD * (IDD5AB - IDD3N) * tRFC
+
+plus background energy per rank: VDD * IDD3N while any bank of the rank has an
+open row, VDD * IDD6x in self refresh and VDD * IDD2N otherwise. Residencies
+come from the ACTIVATE -> PRECHARGE/REFRESH intervals in the
+``bank_req_queue_stats_*`` logs. With currents in mA and tCK in ns every
+increment is in pJ.
+"""
+import argparse
+import configparser
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from queue_occupancy import occupancy
+from stage_logs import BANK_COMMAND, SYSTEM_INPUT, SYSTEM_OUTPUT, load_stage
+
+DEFAULT_INI = Path(__file__).resolve().parents[2] / "HBM2_4Gb_x128.ini"
+CLOSES_ROW = ("PRECHARGE", "REFRESH", "SELF REFRESH ENTER")
+
+
+class PowerModel:
+    def __init__(self, vdd, idd, timing, bus_width=128, device_width=128, burst_length=4, tck=1.0):
+        self.vdd = vdd
+        self.idd = idd
+        self.timing = timing
+        self.tck = tck
+        self.devices = max(1, bus_width // device_width)
+        self.burst_cycles = burst_length // 2
+        self.bits_per_burst = bus_width * burst_length
+
+    @classmethod
+    def from_ini(cls, path=DEFAULT_INI):
+        ini = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+        with open(path, "r") as f:
+            ini.read_file(f)
+        power = {k.upper(): float(v) for k, v in ini["power"].items()}
+        timing = {k: float(v) for k, v in ini["timing"].items()}
+        structure, system = ini["dram_structure"], ini["system"]
+        return cls(power.pop("VDD"), power, timing,
+                   bus_width=system.getint("bus_width", 128),
+                   device_width=structure.getint("device_width", 128),
+                   burst_length=structure.getint("BL", 4),
+                   tck=timing.get("tck", 1.0))
+
+    def _pj(self, current_ma, cycles):
+        return self.vdd * current_ma * cycles * self.tck * self.devices
+
+    @property
+    def command_energy(self):
+        """pJ per command type."""
+        t, i = self.timing, self.idd
+        trc = t["tras"] + t["trp"]
+        return {
+            "ACTIVATE": self._pj(1, i["IDD0"] * trc - (i["IDD3N"] * t["tras"] + i["IDD2N"] * (trc - t["tras"]))),
+            "READ": self._pj(i["IDD4R"] - i["IDD3N"], self.burst_cycles),
+            "WRITE": self._pj(i["IDD4W"] - i["IDD3N"], self.burst_cycles),
+            "REFRESH": self._pj(i["IDD5AB"] - i["IDD3N"], t["trfc"]),
+        }
+
+    def background_energy(self, active_cycles, sref_cycles, total_cycles):
+        """pJ of standby/self-refresh energy for the given residencies."""
+        precharged = np.clip(total_cycles - active_cycles - sref_cycles, 0, None)
+        return (self._pj(self.idd["IDD3N"], active_cycles) + self._pj(self.idd["IDD2N"], precharged)
+                + self._pj(self.idd.get("IDD6X", self.idd["IDD2P"]), sref_cycles))
+
+
+def _intervals(cmds, opens, closes, end):
+    """(bank row index, start, end) for every ``opens`` command until the next ``closes`` one on that bank."""
+    cmds = cmds.sort_values(["bank_key", "Cycle"], kind="stable")
+    is_close = cmds["Type"].isin(closes).to_numpy()
+    key = cmds["bank_key"].to_numpy()
+    cycle = cmds["Cycle"].to_numpy()
+    span = int(max(end, cycle.max() + 1)) + 1
+    close_keys = key[is_close] * span + cycle[is_close]
+
+    is_open = cmds["Type"].isin(opens).to_numpy()
+    starts = cycle[is_open]
+    stops = np.full(starts.shape, end, dtype=np.int64)
+    if close_keys.size:
+        pos = np.searchsorted(close_keys, key[is_open] * span + starts, side="right")
+        nxt = close_keys[np.minimum(pos, close_keys.size - 1)]
+        found = (pos < close_keys.size) & (nxt // span == key[is_open])
+        stops = np.where(found, nxt % span, stops)
+    return key[is_open], starts, np.maximum(stops, starts)
+
+
+def _union_cycles(group, starts, stops):
+    """Cycles covered by at least one interval, per group."""
+    out = {}
+    for g in np.unique(group):
+        sel = group == g
+        times, depth = occupancy(starts[sel], stops[sel])
+        out[g] = int((np.diff(times) * (depth[:-1] > 0)).sum()) if times.size else 0
+    return out
+
+
+def estimate_energy(cmds, total_cycles, model, num_banks):
+    """Per-bank and per-rank energy tables (pJ) from bank command logs."""
+    cmds = cmds.assign(bank_key=cmds["rank"].astype(np.int64) * num_banks + cmds["bank"].astype(np.int64))
+    counts = cmds.groupby(["rank", "bank", "Type"]).size().unstack(fill_value=0)
+    for cmd in model.command_energy:
+        if cmd not in counts:
+            counts[cmd] = 0
+    per_bank = counts[list(model.command_energy)].copy()
+    per_bank["command_pj"] = sum(per_bank[c] * e for c, e in model.command_energy.items())
+
+    act_key, act_start, act_stop = _intervals(cmds, ("ACTIVATE",), CLOSES_ROW, total_cycles)
+    open_cycles = pd.Series(act_stop - act_start, index=act_key).groupby(level=0).sum()
+    per_bank["active_cycles"] = [int(open_cycles.get(r * num_banks + b, 0)) for r, b in per_bank.index]
+
+    sref_key, sref_start, sref_stop = _intervals(cmds, ("SELF REFRESH ENTER",), ("SELF REFRESH EXIT",), total_cycles)
+    rank_active = _union_cycles(act_key // num_banks, act_start, act_stop)
+    rank_sref = _union_cycles(sref_key // num_banks, sref_start, sref_stop)
+    ranks = sorted(per_bank.index.get_level_values(0).unique())
+    per_rank = pd.DataFrame({
+        "active_cycles": [rank_active.get(r, 0) for r in ranks],
+        "sref_cycles": [rank_sref.get(r, 0) for r in ranks],
+    }, index=pd.Index(ranks, name="rank"))
+    per_rank["background_pj"] = model.background_energy(per_rank["active_cycles"].to_numpy(),
+                                                        per_rank["sref_cycles"].to_numpy(), total_cycles)
+    per_rank["command_pj"] = per_bank.groupby(level=0)["command_pj"].sum()
+    return per_bank, per_rank
+
+
+def latency_stats(run_dir):
+    sys_in = load_stage(run_dir, SYSTEM_INPUT, ["RequestID", "Cycle"]).groupby("RequestID")["Cycle"].min()
+    sys_out = load_stage(run_dir, SYSTEM_OUTPUT, ["RequestID", "Cycle"]).groupby("RequestID")["Cycle"].min()
+    latency = (sys_out - sys_in).dropna()
+    return {
+        "requests": int(latency.size),
+        "mean_latency": float(latency.mean()) if latency.size else float("nan"),
+        "p99_latency": float(latency.quantile(0.99)) if latency.size else float("nan"),
+        "last_cycle": int(sys_out.max()) if sys_out.size else 0,
+    }
+
+
+def evaluate_run(run_dir, model, num_banks=8, cycles=None):
+    """Energy, pJ/bit, requests per joule and latency for one run's logs."""
+    cmds = load_stage(run_dir, BANK_COMMAND, ["RequestID", "Type", "Cycle"])
+    perf = latency_stats(run_dir)
+    if cmds.empty:
+        return {**perf, "total_pj": float("nan")}, None, None
+    total_cycles = cycles or int(max(perf["last_cycle"], cmds["Cycle"].max())) + 1
+    per_bank, per_rank = estimate_energy(cmds, total_cycles, model, num_banks)
+
+    command_pj = float(per_bank["command_pj"].sum())
+    background_pj = float(per_rank["background_pj"].sum())
+    total_pj = command_pj + background_pj
+    bits = int(per_bank["READ"].sum() + per_bank["WRITE"].sum()) * model.bits_per_burst
+    summary = {
+        **perf,
+        "cycles": total_cycles,
+        "command_pj": command_pj,
+        "background_pj": background_pj,
+        "total_pj": total_pj,
+        "pj_per_bit": total_pj / bits if bits else float("nan"),
+        "requests_per_joule": perf["requests"] / (total_pj * 1e-12) if total_pj else float("nan"),
+        "avg_power_mw": total_pj / (total_cycles * model.tck),
+    }
+    return summary, per_bank, per_rank
+
+
+def find_runs(path):
+    """A single run dir, or every ``*/meta`` run below an experiments directory."""
+    path = Path(path)
+    if any(path.glob(f"{SYSTEM_INPUT}.*")):
+        return {path.name: path}
+    return {d.name: d / "meta" for d in sorted(path.iterdir()) if (d / "meta").is_dir()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate DRAM energy and performance per watt from command logs.")
+    parser.add_argument("path", help="Run directory with stats logs, or an experiments directory (exp_*/meta).")
+    parser.add_argument("--ini", default=str(DEFAULT_INI), help="DRAMSim3 ini providing [power] and [timing].")
+    parser.add_argument("--banks", type=int, default=8, help="Banks per rank.")
+    parser.add_argument("--cycles", type=int, help="Simulated cycles (default: last logged cycle).")
+    parser.add_argument("--out", help="Write the per-experiment summary as CSV.")
+    parser.add_argument("--per-bank", help="Write per-bank command counts/energy as CSV (single run only).")
+    args = parser.parse_args()
+
+    model = PowerModel.from_ini(args.ini)
+    runs = find_runs(args.path)
+    if not runs:
+        print(f"❌ No runs found under {args.path}")
+        return
+
+    rows = []
+    for name, run_dir in runs.items():
+        summary, per_bank, per_rank = evaluate_run(run_dir, model, args.banks, args.cycles)
+        rows.append({"experiment": name, **summary})
+        if per_bank is None:
+            print(f"⚠️  {name}: no bank command logs, energy unavailable")
+        elif args.per_bank and len(runs) == 1:
+            per_bank.to_csv(args.per_bank)
+            print(f"✅ Wrote per-bank energy to {args.per_bank}")
+
+    table = pd.DataFrame(rows)
+    cols = ["experiment", "requests", "mean_latency", "p99_latency", "total_pj", "pj_per_bit",
+            "requests_per_joule", "avg_power_mw"]
+    print("📊 Energy per experiment (pJ)")
+    print(table[[c for c in cols if c in table]].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"✅ Wrote energy summary to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Per-request lifecycle waterfall across every pipeline stage.
+
+Joins the stage logs of one run once, keyed by RequestID, into a compact
+timeline with one row per request and one int64 timestamp column per stage
+boundary (-1 where a stage was not observed):
+
+    t_in         system input (input_request_stats)
+    t_sched_in   accepted by the bank scheduler (input_request_stats_scheduler_*)
+    t_first_cmd  first command issued by the scheduler (memory_request_queue_stats_scheduler_*)
+    t_cas        READ/WRITE issued by the scheduler
+    t_bank_data  first bank response at or after the CAS (bank_resp_queue_stats_*)
+    t_sched_out  response leaves the scheduler (output_response_stats_scheduler_*)
+    t_out        system output (output_request_stats)
+
+Stage waits are differences of consecutive boundaries and are summarised per
+rank/bank, so a tail request can be attributed to the stage it stalled in.
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stage_logs import (BANK_RESPONSE, SCHEDULER_COMMAND, SCHEDULER_INPUT, SCHEDULER_OUTPUT, SYSTEM_INPUT,
+                        SYSTEM_OUTPUT, first_cycle, load_stage)
+
+BOUNDARIES = ["t_in", "t_sched_in", "t_first_cmd", "t_cas", "t_bank_data", "t_sched_out", "t_out"]
+STAGES = {
+    "frontend": ("t_in", "t_sched_in"),          # controller request queue / routing
+    "scheduler": ("t_sched_in", "t_first_cmd"),  # waiting for the bank FSM (refresh, busy bank)
+    "activate": ("t_first_cmd", "t_cas"),        # PRECHARGE/ACTIVATE before the column command
+    "column": ("t_cas", "t_bank_data"),          # command transit + CAS latency
+    "return": ("t_bank_data", "t_sched_out"),    # bank response back through the scheduler
+    "response": ("t_sched_out", "t_out"),        # response queue and channel arbiter
+}
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def build_lifecycle(run_dir):
+    """One row per request: type, rank, bank, stage boundary cycles, stage waits and total latency."""
+    sys_in = load_stage(run_dir, SYSTEM_INPUT, ["RequestID", "Read", "Write", "Cycle"])
+    sys_in = sys_in.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+    timeline = sys_in.set_index("RequestID")[["Read", "Write", "Cycle"]].rename(columns={"Cycle": "t_in"})
+
+    sched_in = load_stage(run_dir, SCHEDULER_INPUT, ["RequestID", "Cycle"])
+    sched_in = sched_in.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+    timeline = timeline.join(sched_in.set_index("RequestID")[["Cycle", "rank", "bank"]]
+                             .rename(columns={"Cycle": "t_sched_in"}))
+
+    # Refreshes carry synthetic ids, drop them before keying on RequestID
+    cmds = load_stage(run_dir, SCHEDULER_COMMAND, ["RequestID", "Type", "Cycle"])
+    cmds = cmds[cmds["Type"] != "REFRESH"]
+    timeline = timeline.join(first_cycle(cmds, "t_first_cmd"))
+    timeline = timeline.join(first_cycle(cmds[cmds["Type"].isin(["READ", "WRITE"])], "t_cas"))
+
+    bank_resp = load_stage(run_dir, BANK_RESPONSE, ["RequestID", "Cycle"])
+    if not bank_resp.empty and timeline["t_cas"].notna().any():
+        after = bank_resp.merge(timeline["t_cas"].dropna().reset_index(), on="RequestID")
+        after = after[after["Cycle"] >= after["t_cas"]]
+        timeline = timeline.join(first_cycle(after, "t_bank_data"))
+    else:
+        timeline["t_bank_data"] = np.nan
+
+    timeline = timeline.join(first_cycle(load_stage(run_dir, SCHEDULER_OUTPUT, ["RequestID", "Cycle"]), "t_sched_out"))
+    timeline = timeline.join(first_cycle(load_stage(run_dir, SYSTEM_OUTPUT, ["RequestID", "Cycle"]), "t_out"))
+
+    for name, (start, end) in STAGES.items():
+        timeline[name] = timeline[end] - timeline[start]
+    timeline["total"] = timeline["t_out"] - timeline["t_in"]
+
+    for col in BOUNDARIES + list(STAGES) + ["total"]:
+        timeline[col] = timeline[col].fillna(-1).astype(np.int64)
+    for col in ("rank", "bank"):
+        timeline[col] = timeline[col].fillna(-1).astype(np.int16)
+    for col in ("Read", "Write"):
+        timeline[col] = timeline[col].fillna(0).astype(np.int8)
+    return timeline.reset_index().sort_values("RequestID").reset_index(drop=True)
+
+
+def to_array(timeline):
+    """Compact structured array of the timeline, suitable for ``np.save``."""
+    return timeline.to_records(index=False)
+
+
+def stage_wait_summary(timeline, by=("rank", "bank"), quantiles=QUANTILES):
+    """Count/mean/quantiles of every stage wait, grouped by ``by`` (stages with -1 are excluded)."""
+    long = timeline.melt(id_vars=list(by), value_vars=list(STAGES) + ["total"], var_name="stage", value_name="wait")
+    long = long[long["wait"] >= 0]
+    grouped = long.groupby([*by, "stage"], sort=True)["wait"]
+    summary = grouped.agg(["count", "mean"])
+    for q in quantiles:
+        summary[f"p{round(q * 100)}"] = grouped.quantile(q)
+    summary["max"] = grouped.max()
+    return summary.reset_index()
+
+
+def tail_attribution(timeline, quantile=0.99):
+    """For requests above the latency quantile, how often each stage was the longest wait."""
+    complete = timeline[timeline["total"] >= 0]
+    if complete.empty:
+        return pd.DataFrame(columns=["stage", "requests", "share", "mean_wait"])
+    cutoff = complete["total"].quantile(quantile)
+    tail = complete[complete["total"] >= cutoff]
+    waits = tail[list(STAGES)].to_numpy()
+    dominant = np.array(list(STAGES))[np.argmax(np.where(waits >= 0, waits, -1), axis=1)]
+    counts = pd.Series(dominant).value_counts()
+    return pd.DataFrame({
+        "stage": counts.index,
+        "requests": counts.to_numpy(),
+        "share": counts.to_numpy() / len(tail),
+        "mean_wait": [tail.loc[dominant == s, s].mean() for s in counts.index],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-request lifecycle timelines and per-stage wait distributions.")
+    parser.add_argument("run_dir", help="Directory with one run's statistics logs (e.g. an experiment's meta/ dir).")
+    parser.add_argument("--out", help="Write the timeline as a .npy structured array (or .csv).")
+    parser.add_argument("--summary", help="Write the per-rank/bank stage wait summary as CSV.")
+    parser.add_argument("--by", nargs="*", default=["rank", "bank"], help="Grouping columns for the summary.")
+    parser.add_argument("--tail", type=float, default=0.99, help="Latency quantile defining tail requests.")
+    args = parser.parse_args()
+
+    run_dir = Path(args.run_dir)
+    if not (run_dir / f"{SYSTEM_INPUT}.csv").exists() and not (run_dir / f"{SYSTEM_INPUT}.bin").exists():
+        print(f"❌ No {SYSTEM_INPUT} log found in {run_dir}")
+        return
+
+    timeline = build_lifecycle(run_dir)
+    complete = (timeline["total"] >= 0).sum()
+    print(f"📊 {len(timeline)} requests, {complete} completed")
+
+    overall = stage_wait_summary(timeline, by=())
+    print(overall.to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+    print(f"\nDominant stage for requests above p{round(args.tail * 100)}:")
+    print(tail_attribution(timeline, args.tail).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    if args.out:
+        if args.out.endswith(".csv"):
+            timeline.to_csv(args.out, index=False)
+        else:
+            np.save(args.out, to_array(timeline))
+        print(f"✅ Wrote timeline to {args.out}")
+    if args.summary:
+        stage_wait_summary(timeline, by=tuple(args.by)).to_csv(args.summary, index=False)
+        print(f"✅ Wrote stage summary to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Queue occupancy over time and Little's-law validation from the stage logs.
+
+Every queue between two logged handshakes is reconstructed with cumulative-sum
+event arithmetic: arrivals add +1 and departures -1 at their cycle, and the
+running sum is the queue depth, held constant until the next event. From that
+step function we get the time-averaged depth L, the maximum depth, the time
+spent at or above capacity (``queueSize`` from config.json, i.e. backpressure),
+and a binned depth time series.
+
+For queues whose logs share request ids, the mean time in queue W is also
+measured directly by joining arrivals and departures, and L is checked against
+Little's law L = lambda * W. A large discrepancy means events are missing from
+the logs (truncated run, sampled stats, lost responses).
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stage_logs import (COMMAND_QUEUE_INPUT, COMMAND_QUEUE_OUTPUT, SCHEDULER_INPUT, SCHEDULER_OUTPUT, SYSTEM_INPUT,
+                        SYSTEM_OUTPUT, load_stage)
+
+DEFAULT_CONFIG = Path(__file__).resolve().parents[2] / "src" / "main" / "config" / "config.json"
+
+# name -> (arrival log, departure log, keyed by RequestID, capacity in units of queueSize, per rank/bank)
+QUEUES = {
+    "system": (SYSTEM_INPUT, SYSTEM_OUTPUT, True, None, False),
+    "request_queue": (SYSTEM_INPUT, SCHEDULER_INPUT, True, 1, False),
+    "bank_scheduler": (SCHEDULER_INPUT, SCHEDULER_OUTPUT, True, None, True),
+    "response_queue": (SCHEDULER_OUTPUT, SYSTEM_OUTPUT, True, 1, False),
+    # Refreshes carry synthetic ids, so commands are only counted, not joined
+    "command_queue": (COMMAND_QUEUE_INPUT, COMMAND_QUEUE_OUTPUT, False, 1, False),
+}
+
+
+def occupancy(arrivals, departures):
+    """Depth step function: (event cycles, depth from that cycle until the next event)."""
+    cycles = np.concatenate([arrivals, departures]).astype(np.int64)
+    delta = np.concatenate([np.ones(len(arrivals), np.int64), -np.ones(len(departures), np.int64)])
+    times, inverse = np.unique(cycles, return_inverse=True)
+    return times, np.cumsum(np.bincount(inverse, weights=delta, minlength=len(times)).astype(np.int64))
+
+
+def _area_at(times, depth, cum_area, t):
+    """Integral of the depth step function from times[0] up to cycles ``t``."""
+    idx = np.searchsorted(times, t, side="right") - 1
+    valid = idx >= 0
+    idx = np.clip(idx, 0, None)
+    prev = np.where(idx > 0, cum_area[idx - 1], 0)
+    return np.where(valid, prev + depth[idx] * (t - times[idx]), 0)
+
+
+def occupancy_stats(arrivals, departures, capacity=None, start=None, end=None):
+    """Time-averaged/max depth and time at capacity over [start, end)."""
+    times, depth = occupancy(arrivals, departures)
+    if times.size == 0:
+        return {"events": 0}
+    start = times[0] if start is None else start
+    end = times[-1] + 1 if end is None else end
+    duration = np.diff(np.append(times, end)).clip(min=0)
+    span = max(end - start, 1)
+    stats = {
+        "arrivals": int(len(arrivals)),
+        "departures": int(len(departures)),
+        "span_cycles": int(span),
+        "mean_depth": float((depth * duration).sum() / span),
+        "max_depth": int(depth.max()),
+        "final_depth": int(depth[-1]),
+    }
+    if capacity is not None:
+        full = duration[depth >= capacity].sum()
+        stats["capacity"] = capacity
+        stats["cycles_full"] = int(full)
+        stats["fraction_full"] = float(full / span)
+    return stats
+
+
+def binned_occupancy(arrivals, departures, bin_cycles, end=None):
+    """Mean and max depth per ``bin_cycles`` bin starting at cycle 0."""
+    times, depth = occupancy(arrivals, departures)
+    if times.size == 0:
+        return pd.DataFrame(columns=["bin_start", "mean_depth", "max_depth"])
+    end = times[-1] + 1 if end is None else end
+    edges = np.arange(0, end + bin_cycles, bin_cycles, dtype=np.int64)
+    duration = np.diff(np.append(times, end)).clip(min=0)
+    cum_area = np.cumsum(depth * duration)
+    mean = np.diff(_area_at(times, depth, cum_area, edges)) / bin_cycles
+
+    # Max over a bin: depth carried in at the bin start, or any level reached inside it
+    start_idx = np.searchsorted(times, edges[:-1], side="right") - 1
+    carried = np.where(start_idx >= 0, depth[np.clip(start_idx, 0, None)], 0)
+    bins = times // bin_cycles
+    inside = np.full(len(edges) - 1, np.iinfo(np.int64).min)
+    keep = bins < len(inside)
+    np.maximum.at(inside, bins[keep], depth[keep])
+    return pd.DataFrame({"bin_start": edges[:-1], "mean_depth": mean, "max_depth": np.maximum(carried, inside)})
+
+
+def _events(run_dir, arrival, departure, keyed):
+    """Arrival/departure frames (RequestID, Cycle, rank, bank); keyed logs are deduplicated per id."""
+    arr = load_stage(run_dir, arrival, ["RequestID", "Cycle"])
+    dep = load_stage(run_dir, departure, ["RequestID", "Cycle"])
+    if keyed:
+        # System logs are written once per channel; keep the earliest copy of every id
+        arr = arr.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+        dep = dep.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+    return arr, dep
+
+
+def littles_law(arr, dep, stats):
+    """Measured W from the id join and the L = lambda * W check against the occupancy L."""
+    matched = arr.merge(dep, on="RequestID", suffixes=("_in", "_out"))
+    matched = matched[matched["Cycle_out"] >= matched["Cycle_in"]]
+    if matched.empty:
+        return {}
+    wait = (matched["Cycle_out"] - matched["Cycle_in"]).to_numpy()
+    throughput = len(matched) / stats["span_cycles"]
+    predicted = throughput * wait.mean()
+    return {
+        "matched": int(len(matched)),
+        "throughput": throughput,
+        "mean_wait": float(wait.mean()),
+        "littles_depth": predicted,
+        "littles_error": (stats["mean_depth"] - predicted) / max(stats["mean_depth"], 1e-12),
+    }
+
+
+def analyze(run_dir, queue_size=None, bin_cycles=None):
+    """Summary rows (one per queue, and per rank/bank where applicable) and an optional binned series."""
+    rows, series = [], []
+    for name, (arrival, departure, keyed, capacity_units, per_bank) in QUEUES.items():
+        arr, dep = _events(run_dir, arrival, departure, keyed)
+        if arr.empty and dep.empty:
+            continue
+        capacity = queue_size * capacity_units if (queue_size and capacity_units) else None
+        # Common window so every queue is measured over the same span
+        start = int(min(arr["Cycle"].min() if len(arr) else np.inf, dep["Cycle"].min() if len(dep) else np.inf))
+        end = int(max(arr["Cycle"].max() if len(arr) else -1, dep["Cycle"].max() if len(dep) else -1)) + 1
+
+        groups = [((-1, -1), arr, dep)]
+        if per_bank:
+            # Departure logs of per-bank queues carry their own rank/bank tag
+            groups += [((r, b), arr[(arr["rank"] == r) & (arr["bank"] == b)], g)
+                       for (r, b), g in dep.groupby(["rank", "bank"])]
+        for (rank, bank), a, d in groups:
+            stats = occupancy_stats(a["Cycle"].to_numpy(), d["Cycle"].to_numpy(), capacity, start, end)
+            if keyed:
+                stats.update(littles_law(a, d, stats))
+            rows.append({"queue": name, "rank": rank, "bank": bank, **stats})
+
+        if bin_cycles:
+            binned = binned_occupancy(arr["Cycle"].to_numpy(), dep["Cycle"].to_numpy(), bin_cycles, end)
+            series.append(binned.assign(queue=name))
+
+    summary = pd.DataFrame(rows)
+    series = pd.concat(series, ignore_index=True) if series else None
+    return summary, series
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue occupancy and Little's-law validation from stage logs.")
+    parser.add_argument("run_dir", help="Directory with one run's statistics logs (e.g. an experiment's meta/ dir).")
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG), help="config.json providing queueSize.")
+    parser.add_argument("--queue-size", type=int, help="Override queueSize from the config.")
+    parser.add_argument("--bin", type=int, default=1000, help="Cycle bin width of the occupancy time series.")
+    parser.add_argument("--timeseries", help="Write the binned occupancy series as CSV.")
+    parser.add_argument("--summary", help="Write the per-queue summary as CSV.")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Relative Little's-law error that is flagged.")
+    args = parser.parse_args()
+
+    queue_size = args.queue_size
+    if queue_size is None and Path(args.config).exists():
+        with open(args.config) as f:
+            queue_size = json.load(f).get("queueSize")
+
+    summary, series = analyze(args.run_dir, queue_size, args.bin if args.timeseries else None)
+    if summary.empty:
+        print(f"❌ No queue logs found in {args.run_dir}")
+        return
+
+    print(f"📊 Queue occupancy (queueSize = {queue_size})")
+    top = summary[summary["rank"] < 0].drop(columns=["rank", "bank"])
+    print(top.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    banks = summary[summary["rank"] >= 0]
+    if not banks.empty:
+        print("\nPer rank/bank:")
+        cols = [c for c in ["queue", "rank", "bank", "mean_depth", "max_depth", "mean_wait", "littles_error"]
+                if c in banks.columns]
+        print(banks[cols].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    if "fraction_full" in top.columns:
+        for _, row in top.dropna(subset=["fraction_full"]).iterrows():
+            if row["fraction_full"] > 0:
+                print(f"⚠️  {row['queue']} at capacity for {row['fraction_full']:.1%} of the run")
+    if "littles_error" in summary.columns:
+        for _, row in summary.dropna(subset=["littles_error"]).iterrows():
+            if abs(row["littles_error"]) > args.tolerance:
+                where = "" if row["rank"] < 0 else f" (rank {row['rank']}, bank {row['bank']})"
+                print(f"⚠️  {row['queue']}{where}: L = {row['mean_depth']:.3f} but lambda*W = "
+                      f"{row['littles_depth']:.3f}; logs have unmatched events")
+
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+        print(f"✅ Wrote summary to {args.summary}")
+    if args.timeseries and series is not None:
+        series.to_csv(args.timeseries, index=False)
+        print(f"✅ Wrote occupancy time series to {args.timeseries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Vectorized loaders for the per-stage statistics logs of one simulation run.
+
+Every SV monitor writes one file per (rank, bank) or one per system, either as
+text CSV or (``statsMode: "binary"``) as ``*.bin`` records. These helpers find
+the files of one stage family, read them with the C CSV parser (or the binary
+decoder), tag each row with the rank/bank from its file name, and concatenate
+them into a single DataFrame.
+"""
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from decode_stats import read_stats_binary  # noqa: E402
+
+SYSTEM_INPUT = "input_request_stats"
+SYSTEM_OUTPUT = "output_request_stats"
+COMMAND_QUEUE_INPUT = "memory_request_queue_stats"
+COMMAND_QUEUE_OUTPUT = "memory_response_queue_stats"
+SCHEDULER_INPUT = "input_request_stats_scheduler"
+SCHEDULER_OUTPUT = "output_response_stats_scheduler"
+SCHEDULER_COMMAND = "memory_request_queue_stats_scheduler"
+SCHEDULER_RESPONSE = "memory_response_queue_stats_scheduler"
+BANK_COMMAND = "bank_req_queue_stats"
+BANK_RESPONSE = "bank_resp_queue_stats"
+
+RANK_BANK_RE = re.compile(r"_rank(\d+)_bank(\d+)$")
+NUMERIC = ("RequestID", "Address", "Cycle", "Read", "Write", "Data", "Input Data", "Active Row", "Active Col")
+
+# Older scheduler input/output logs had a 4-column header over 5-field rows
+_SCHEDULER_REQUEST_COLUMNS = ["RequestID", "Address", "Read", "Write", "Cycle"]
+
+
+def _read_one(path):
+    if path.suffix == ".bin":
+        return read_stats_binary(path)
+    df = pd.read_csv(path, skipinitialspace=True, index_col=False)
+    if path.stem.startswith((SCHEDULER_INPUT, SCHEDULER_OUTPUT)) and len(df.columns) == 4:
+        df = pd.read_csv(path, skipinitialspace=True, header=None, skiprows=1, names=_SCHEDULER_REQUEST_COLUMNS)
+    df.columns = [c.strip() for c in df.columns]
+    for col in NUMERIC:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "Type" in df.columns and df["Type"].dtype == object:
+        df["Type"] = df["Type"].str.strip()
+    df = df.dropna(subset=["RequestID", "Cycle"])
+    df["RequestID"] = df["RequestID"].astype(np.int64)
+    df["Cycle"] = df["Cycle"].astype(np.int64)
+    return df
+
+
+def stage_files(run_dir, prefix):
+    """Files of one stage family, preferring the CSV when both a .csv and a .bin exist."""
+    run_dir = Path(run_dir)
+    per_bank = re.compile(rf"^{re.escape(prefix)}_rank\d+_bank\d+$")
+    found = {}
+    for path in sorted(run_dir.iterdir()):
+        if path.suffix not in (".csv", ".bin"):
+            continue
+        if path.stem == prefix or per_bank.match(path.stem):
+            if path.stem not in found or path.suffix == ".csv":
+                found[path.stem] = path
+    return list(found.values())
+
+
+def load_stage(run_dir, prefix, columns=None):
+    """All rows of one stage family with ``rank``/``bank`` columns (-1 for system-level logs)."""
+    frames = []
+    for path in stage_files(run_dir, prefix):
+        df = _read_one(path)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        m = RANK_BANK_RE.search(path.stem)
+        df["rank"] = np.int16(m.group(1)) if m else np.int16(-1)
+        df["bank"] = np.int16(m.group(2)) if m else np.int16(-1)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=[*(columns or ["RequestID", "Cycle"]), "rank", "bank"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def first_cycle(df, name):
+    """Earliest cycle per RequestID as a Series called ``name``."""
+    if df.empty:
+        return pd.Series(dtype=np.int64, name=name)
+    return df.groupby("RequestID", sort=False)["Cycle"].min().rename(name)
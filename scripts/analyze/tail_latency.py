@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Attribute tail latency to DRAM events on the request's bank.
+
+Takes the slowest k% of requests (system input -> output latency) and overlaps
+each request's [t_in, t_out) interval with the events on its bank from the
+``bank_req_queue_stats_*`` logs, using sorted-sweep joins on a composite
+(bank, cycle) key:
+
+    refresh     cycles of REFRESH windows (refresh until the bank's next command)
+    conflict    own PRECHARGE before the ACTIVATE (row miss), PRECHARGE -> ACTIVATE cycles
+    turnaround  READ issued shortly after another request's WRITE on the same bank
+    queueing    cycles waiting behind earlier same-bank requests still in flight
+
+Each cause yields a stall estimate in cycles; the largest is the request's
+primary cause. Cause shares are reported for the tail and for all requests, so
+a cause that is over-represented in the tail stands out.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stage_logs import BANK_COMMAND, SCHEDULER_INPUT, SYSTEM_INPUT, SYSTEM_OUTPUT, load_stage
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from address_map import AddressMapping  # noqa: E402
+
+CAUSES = ["refresh", "conflict", "turnaround", "queueing"]
+DEFAULT_CONFIG = Path(__file__).resolve().parents[2] / "src" / "main" / "config" / "config.json"
+# CWL + BL/2 + tWTR_L of the default HBM2 timing
+TURNAROUND_WINDOW = 14
+REFRESH_CAP = 3900
+
+
+def _composite(bank, cycle, span):
+    return bank.astype(np.int64) * span + cycle.astype(np.int64)
+
+
+def interval_overlap(ev_bank, ev_start, ev_end, bank, lo, hi, span):
+    """Cycles of [lo, hi) covered by the (per-bank disjoint) event windows on ``bank``."""
+    order = np.lexsort((ev_start, ev_bank))
+    ev_bank, ev_start, ev_end = ev_bank[order], ev_start[order], ev_end[order]
+    starts = _composite(ev_bank, ev_start, span)
+    ends = _composite(ev_bank, ev_end, span)
+    cum = np.concatenate([[0], np.cumsum(ev_end - ev_start)])
+
+    first = np.searchsorted(ends, _composite(bank, lo, span), side="right")  # first window ending after lo
+    stop = np.searchsorted(starts, _composite(bank, hi, span), side="left")  # windows starting before hi
+    hit = stop > first
+    total = cum[stop] - cum[first]
+    f, l = np.clip(first, 0, len(ev_start) - 1), np.clip(stop - 1, 0, len(ev_start) - 1)
+    total = total - np.clip(lo - ev_start[f], 0, None) - np.clip(ev_end[l] - hi, 0, None)
+    return np.where(hit, total, 0)
+
+
+def refresh_windows(cmds, cap=REFRESH_CAP):
+    """REFRESH windows per bank: from the refresh until the bank's next command (capped)."""
+    cmds = cmds.sort_values(["bank_key", "Cycle"])
+    nxt = cmds.groupby("bank_key")["Cycle"].shift(-1)
+    ref = cmds["Type"] == "REFRESH"
+    start = cmds.loc[ref, "Cycle"].to_numpy()
+    end = nxt[ref].fillna(cmds.loc[ref, "Cycle"] + 1).to_numpy().astype(np.int64)
+    return cmds.loc[ref, "bank_key"].to_numpy(), start, np.minimum(end, start + cap)
+
+
+def request_table(run_dir, mapping):
+    """Completed requests with latency and flat bank key."""
+    sys_in = load_stage(run_dir, SYSTEM_INPUT, ["RequestID", "Address", "Read", "Write", "Cycle"])
+    sys_in = sys_in.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+    sys_out = load_stage(run_dir, SYSTEM_OUTPUT, ["RequestID", "Cycle"])
+    sys_out = sys_out.groupby("RequestID")["Cycle"].min().rename("t_out")
+    reqs = sys_in.rename(columns={"Cycle": "t_in"}).drop(columns=["rank", "bank"]).join(sys_out, on="RequestID")
+    reqs = reqs.dropna(subset=["t_out"])
+    reqs["t_out"] = reqs["t_out"].astype(np.int64)
+    reqs["latency"] = reqs["t_out"] - reqs["t_in"]
+
+    # Rank/bank from the scheduler that accepted the request, falling back to the address decoder
+    sched = load_stage(run_dir, SCHEDULER_INPUT, ["RequestID", "Cycle"]).drop_duplicates("RequestID")
+    reqs = reqs.merge(sched[["RequestID", "rank", "bank"]], on="RequestID", how="left")
+    decoded = mapping.decode(reqs["Address"].to_numpy())
+    reqs["rank"] = reqs["rank"].fillna(pd.Series(decoded["rank"], index=reqs.index)).astype(np.int64)
+    reqs["bank"] = reqs["bank"].fillna(pd.Series(decoded["bank"], index=reqs.index)).astype(np.int64)
+    reqs["bank_key"] = reqs["rank"] * mapping.num_banks + reqs["bank"]
+    return reqs.reset_index(drop=True)
+
+
+def attribute(reqs, cmds, turnaround_window=TURNAROUND_WINDOW, refresh_cap=REFRESH_CAP):
+    """Per-request stall estimate (cycles) for every cause, plus the primary cause."""
+    if reqs.empty:
+        return pd.DataFrame(columns=CAUSES + ["primary"], index=reqs.index)
+    span = int(max(reqs["t_out"].max(), cmds["Cycle"].max() if len(cmds) else 0)) + 2
+    bank, lo, hi = reqs["bank_key"].to_numpy(), reqs["t_in"].to_numpy(), reqs["t_out"].to_numpy()
+    out = pd.DataFrame(index=reqs.index)
+
+    rb, rs, re_ = refresh_windows(cmds, refresh_cap)
+    out["refresh"] = interval_overlap(rb, rs, re_, bank, lo, hi, span) if len(rs) else 0
+
+    # Own row miss: PRECHARGE issued for this request before its first ACTIVATE
+    own = cmds[cmds["Type"] != "REFRESH"]
+    first = own.pivot_table(index="RequestID", columns="Type", values="Cycle", aggfunc="min")
+    pre = first["PRECHARGE"] if "PRECHARGE" in first else pd.Series(dtype=float)
+    act = first["ACTIVATE"] if "ACTIVATE" in first else pd.Series(dtype=float)
+    miss = (act - pre).where(act > pre)
+    out["conflict"] = reqs["RequestID"].map(miss).fillna(0).to_numpy()
+
+    # Write -> read turnaround: previous column command on the bank was another request's WRITE
+    cols = own[own["Type"].isin(["READ", "WRITE"])].sort_values(["bank_key", "Cycle"])
+    prev_type = cols.groupby("bank_key")["Type"].shift(1)
+    prev_cycle = cols.groupby("bank_key")["Cycle"].shift(1)
+    prev_id = cols.groupby("bank_key")["RequestID"].shift(1)
+    gap = cols["Cycle"] - prev_cycle
+    turn = (cols["Type"] == "READ") & (prev_type == "WRITE") & (prev_id != cols["RequestID"]) & (gap <= turnaround_window)
+    turn_gap = gap[turn].groupby(cols.loc[turn, "RequestID"]).min()
+    out["turnaround"] = reqs["RequestID"].map(turn_gap).fillna(0).to_numpy()
+
+    # Same-bank queueing: wait until every earlier-arrived request on the bank has completed
+    order = reqs.sort_values(["bank_key", "t_in", "RequestID"])
+    ahead = order.groupby("bank_key")["t_out"].cummax().groupby(order["bank_key"]).shift(1)
+    wait = (ahead - order["t_in"]).clip(lower=0).fillna(0)
+    out["queueing"] = np.minimum(wait.reindex(reqs.index).to_numpy(), reqs["latency"].to_numpy())
+
+    stalls = out[CAUSES].to_numpy(dtype=float)
+    out["primary"] = np.where(stalls.max(axis=1) > 0, np.array(CAUSES)[stalls.argmax(axis=1)], "none")
+    return out
+
+
+def cause_shares(attrib):
+    """Fraction of requests with each cause present, and each primary-cause share."""
+    present = {c: float((attrib[c] > 0).mean()) for c in CAUSES}
+    primary = attrib["primary"].value_counts(normalize=True)
+    return pd.DataFrame({
+        "present": pd.Series(present),
+        "primary": primary.reindex(CAUSES + ["none"]).fillna(0.0),
+        "mean_stall": attrib[CAUSES].mean(),
+    }).reindex(CAUSES + ["none"]).fillna(0.0)
+
+
+def analyze(run_dir, tail=0.01, config=DEFAULT_CONFIG, turnaround_window=TURNAROUND_WINDOW, refresh_cap=REFRESH_CAP):
+    mapping = AddressMapping.from_config(config) if Path(config).exists() else AddressMapping()
+    reqs = request_table(run_dir, mapping)
+    cmds = load_stage(run_dir, BANK_COMMAND, ["RequestID", "Type", "Cycle"])
+    cmds["bank_key"] = cmds["rank"].astype(np.int64) * mapping.num_banks + cmds["bank"].astype(np.int64)
+
+    attrib = pd.concat([reqs, attribute(reqs, cmds, turnaround_window, refresh_cap)], axis=1)
+    cutoff = attrib["latency"].quantile(1.0 - tail)
+    attrib["tail"] = attrib["latency"] >= cutoff
+    return attrib, cutoff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attribute tail-latency requests to refresh, row conflicts, "
+                                                 "write-to-read turnarounds and same-bank queueing.")
+    parser.add_argument("run_dir", help="Directory with one run's statistics logs (e.g. an experiment's meta/ dir).")
+    parser.add_argument("--tail", type=float, default=0.01, help="Fraction of slowest requests to analyze.")
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG), help="config.json for the address mapping.")
+    parser.add_argument("--turnaround-window", type=int, default=TURNAROUND_WINDOW,
+                        help="Max WRITE -> READ gap (cycles) counted as a turnaround.")
+    parser.add_argument("--refresh-cap", type=int, default=REFRESH_CAP, help="Cap on one refresh window (cycles).")
+    parser.add_argument("--out", help="Write per-request attribution of the tail as CSV.")
+    parser.add_argument("--json", help="Write overall and per-bank cause shares as JSON.")
+    args = parser.parse_args()
+
+    attrib, cutoff = analyze(args.run_dir, args.tail, args.config, args.turnaround_window, args.refresh_cap)
+    if attrib.empty:
+        print(f"❌ No completed requests found in {args.run_dir}")
+        return
+    tail = attrib[attrib["tail"]]
+    print(f"📊 {len(tail)} of {len(attrib)} requests at or above {cutoff:.0f} cycles "
+          f"(slowest {args.tail:.1%})")
+
+    shares = cause_shares(tail).join(cause_shares(attrib), rsuffix="_all")
+    print(shares.to_string(float_format=lambda v: f"{v:.3f}"))
+
+    per_bank = (tail.groupby(["rank", "bank"])["primary"].value_counts(normalize=True)
+                .unstack(fill_value=0.0).reindex(columns=CAUSES + ["none"], fill_value=0.0))
+    per_bank.insert(0, "requests", tail.groupby(["rank", "bank"]).size())
+    print("\nPrimary cause share per bank (tail only):")
+    print(per_bank.to_string(float_format=lambda v: f"{v:.2f}"))
+
+    if args.out:
+        tail.to_csv(args.out, index=False)
+        print(f"✅ Wrote tail attribution to {args.out}")
+    if args.json:
+        report = {
+            "tail_fraction": args.tail,
+            "cutoff_cycles": float(cutoff),
+            "tail_requests": int(len(tail)),
+            "causes": shares.to_dict(orient="index"),
+            "per_bank": {f"rank{r}_bank{b}": row.to_dict() for (r, b), row in per_bank.iterrows()},
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote cause shares to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from diff_dramsim import load_latencies, summarize_and_write
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from profiling import stage  # noqa: E402
+
 def load_breadcrumb(bc_path):
     """
     Read breadcrumb.json and return a dict mapping experiment folder name
@@ -102,23 +106,24 @@ def main():
                     print(f"❌ Expected {fname} in {simulator} at {path / fname}, but not found.")
                     return
 
-        # 4) Load latencies & compute diffs
-        cur_reads,  cur_writes  = load_latencies(str(curr_path))
-        base_reads, base_writes = load_latencies(str(base_path))
+        with stage("diff", experiment=name):
+            # 4) Load latencies & compute diffs
+            cur_reads,  cur_writes  = load_latencies(str(curr_path))
+            base_reads, base_writes = load_latencies(str(base_path))
 
-        n_r = min(len(cur_reads), len(base_reads))
-        n_w = min(len(cur_writes), len(base_writes))
-        read_diffs  = cur_reads[:n_r]  - base_reads[:n_r]
-        write_diffs = cur_writes[:n_w] - base_writes[:n_w]
+            n_r = min(len(cur_reads), len(base_reads))
+            n_w = min(len(cur_writes), len(base_writes))
+            read_diffs  = cur_reads[:n_r]  - base_reads[:n_r]
+            write_diffs = cur_writes[:n_w] - base_writes[:n_w]
 
-        # 5) Write per-experiment diff CSVs
-        diff_folder = out_dir / name
-        diff_folder.mkdir(parents=True, exist_ok=True)
-        read_csv  = diff_folder / "read_diff_stats.csv"
-        write_csv = diff_folder / "write_diff_stats.csv"
+            # 5) Write per-experiment diff CSVs
+            diff_folder = out_dir / name
+            diff_folder.mkdir(parents=True, exist_ok=True)
+            read_csv  = diff_folder / "read_diff_stats.csv"
+            write_csv = diff_folder / "write_diff_stats.csv"
 
-        summarize_and_write(read_diffs,  str(read_csv))
-        summarize_and_write(write_diffs, str(write_csv))
+            summarize_and_write(read_diffs,  str(read_csv))
+            summarize_and_write(write_diffs, str(write_csv))
 
         # 6) Append bandwidth/utilization diffs separately for read & write
         for kind, diff_csv in [('read', read_csv), ('write', write_csv)]:
@@ -6,7 +6,15 @@ from pathlib import Path
 import shutil
 import json
 
-def run_simulation(sim_exe, trace_path, out_dir, csv_dir, cycles):
+from decode_stats import decode_directory
+from distributed_sweep import add_serve_arguments, make_jobs, serve_from_args
+from profiling import stage
+from sim_harness import add_replay_arguments, replay_args
+from steady_state import STEADY_FILE, add_steady_state_arguments, run_until_steady, steady_settings
+from trace_store import DEFAULT_STORE, reference_trace, simulator_trace
+
+def run_simulation(sim_exe, trace_path, out_dir, csv_dir, cycles, extra_args=(), store_dir=DEFAULT_STORE,
+                   steady=None):
     trace_name = trace_path.stem
     exp_dir = out_dir / f"hardware_config_{queue_size}"
     meta_dir = exp_dir / "meta"
@@ -17,20 +25,33 @@ def run_simulation(sim_exe, trace_path, out_dir, csv_dir, cycles):
 
     try:
         # Build 
-        os.system("make verilog")
-        os.system("make verilator-trace")
+        with stage("build", experiment=exp_dir.name):
+            os.system("make verilog")
+            os.system("make verilator-trace")
 
         # Run simulation
-        subprocess.run([sim_exe, "-t", str(trace_path), "-c", str(cycles)],
-                       check=True)
+        with stage("simulate", experiment=exp_dir.name), \
+                simulator_trace(trace_path, csv_dir) as text_trace:
+            if steady:
+                run_until_steady(sim_exe, text_trace, cycles, csv_dir, extra_args,
+                                 record=exp_dir / STEADY_FILE, stdout=None, **steady)
+            else:
+                subprocess.run([sim_exe, "-t", str(text_trace), "-c", str(cycles), *extra_args],
+                               check=True)
     except subprocess.CalledProcessError:
         print(f"❌ Error while running simulation on {trace_path}")
         return
 
-    shutil.copy(trace_path, exp_dir / trace_path.name)
+    # Reference the trace by content hash instead of copying it
+    reference_trace(trace_path, exp_dir, store_dir)
 
-    for csv_file in csv_dir.glob("*.csv"):
-        shutil.copy(csv_file, meta_dir / csv_file.name)
+    # Binary statistics mode writes *.bin records; decode them to the usual CSVs
+    with stage("decode", experiment=exp_dir.name):
+        decode_directory(csv_dir)
+
+    with stage("copy-csvs", experiment=exp_dir.name):
+        for csv_file in csv_dir.glob("*.csv"):
+            shutil.copy(csv_file, meta_dir / csv_file.name)
 
     print(f"✅ Finished simulation for queueSize={queue_size}")
 
@@ -56,6 +77,10 @@ def main():
     parser.add_argument("--start", required=True, type=int, help="Starting queue size.")
     parser.add_argument("--end", required=True, type=int, help="Ending queue size (inclusive).")
     parser.add_argument("--config_dir", default="src/main/config", help="Path to config.json and default.json file.")
+    parser.add_argument("--trace-store", default=str(DEFAULT_STORE), help="Content-addressed store for experiment traces.")
+    add_replay_arguments(parser)
+    add_steady_state_arguments(parser)
+    add_serve_arguments(parser)
 
     args = parser.parse_args()
 
@@ -65,12 +90,23 @@ def main():
     csv_dir = Path(args.csv_dir).resolve()
     config_dir = Path(args.config_dir).resolve()
 
-    if not sim_exe.exists():
-        print(f"❌ Simulator not found at {sim_exe}")
-        return
     if not trace_path.exists():
         print(f"❌ Trace file not found at {trace_path}")
         return
+
+    # Serve one job per queue size; each worker builds (or reuses) the binary for its config
+    if args.serve:
+        sizes = [args.start]
+        while sizes[-1] * 2 <= args.end:
+            sizes.append(sizes[-1] * 2)
+        configs = [(f"hardware_config_{q}", {"queueSize": q}) for q in sizes]
+        jobs = make_jobs([trace_path], configs, args.cycles, replay_args(args.replay, args.mshrs), args.trace_store)
+        serve_from_args(args, jobs, out_dir, args.trace_store)
+        return
+
+    if not sim_exe.exists():
+        print(f"❌ Simulator not found at {sim_exe}")
+        return
     if not csv_dir.is_dir():
         print(f"❌ CSV output directory not found at {csv_dir}")
         return
@@ -88,7 +124,8 @@ def main():
 
         # Run simulation
         print("Running simulations ", queue_size)
-        run_simulation(sim_exe, trace_path, out_dir, csv_dir, args.cycles)
+        run_simulation(sim_exe, trace_path, out_dir, csv_dir, args.cycles, replay_args(args.replay, args.mshrs),
+                       args.trace_store, steady_settings(args))
         print("Done writing simulations ", queue_size)
 
         # Exponentially increase
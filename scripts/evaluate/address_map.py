@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Python mirror of ``AddressDecoder``: split request addresses into channel/bank/rank/row/column.
+
+Field order from the LSB up is channel, bank, rank, row, column, with widths
+taken from ``config.json`` and ``DRAMBankParameters``.
+"""
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CONFIG = Path("src/main/config/config.json")
+NUM_ROWS = 32768
+NUM_COLS = 2048
+
+
+def _bits(n):
+    return int(math.ceil(math.log2(n))) if n > 1 else 0
+
+
+class AddressMapping:
+    def __init__(self, num_channels=1, num_ranks=2, num_banks=8, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        self.num_channels = num_channels
+        self.num_ranks = num_ranks
+        self.num_banks = num_banks
+        self.channel_bits = _bits(num_channels)
+        self.bank_bits = _bits(num_banks)
+        self.rank_bits = _bits(num_ranks)
+        self.row_bits = _bits(num_rows)
+        self.bank_start = self.channel_bits
+        self.rank_start = self.bank_start + self.bank_bits
+        self.row_start = self.rank_start + self.rank_bits
+        self.col_start = self.row_start + self.row_bits
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_CONFIG):
+        with open(path, "r") as f:
+            cfg = json.load(f)
+        return cls(cfg.get("numChannels", 1), cfg.get("numRanks", 2), cfg.get("numBanks", 8))
+
+    @property
+    def total_banks(self):
+        """Banks across all channels and ranks."""
+        return self.num_channels * self.num_ranks * self.num_banks
+
+    @staticmethod
+    def _field(addr, start, bits):
+        if bits == 0:
+            return np.zeros(np.shape(addr), dtype=np.int64)
+        return ((addr >> np.uint64(start)) & np.uint64((1 << bits) - 1)).astype(np.int64)
+
+    def decode(self, addr):
+        """Dict of int64 arrays: channel, bank, rank, row, column."""
+        addr = np.asarray(addr, dtype=np.uint64) & np.uint64(0xFFFFFFFF)
+        return {
+            "channel": self._field(addr, 0, self.channel_bits),
+            "bank": self._field(addr, self.bank_start, self.bank_bits),
+            "rank": self._field(addr, self.rank_start, self.rank_bits),
+            "row": self._field(addr, self.row_start, self.row_bits),
+            "column": (addr >> np.uint64(self.col_start)).astype(np.int64),
+        }
+
+    def flat_bank(self, addr):
+        """Global bank index ((channel * ranks + rank) * banks + bank) for each address."""
+        f = self.decode(addr)
+        return (f["channel"] * self.num_ranks + f["rank"]) * self.num_banks + f["bank"]
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Wall-clock benchmark suite for the Verilated trace harness.
+
+Measures how fast the simulator itself runs (simulated cycles/s, requests/s,
+wall time, peak RSS) across simulator builds, traces and trace sizes, and
+estimates how much of the runtime goes to the [RESP] console logging and to
+the per-fire $fwrite statistics modules. Results are written as JSON and a
+one-line-per-run history file for trend tracking.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+
+from sim_harness import add_replay_arguments, replay_args
+
+CONFIG_PATH = Path("src/main/config/config.json")
+BUILT_BINARY = Path("obj_dir/VMultiChannelSystem")
+COMPLETED_RE = re.compile(r"Simulation completed in (\d+) cycles")
+
+
+def build_config_binary(config_file, bins_dir):
+    """Elaborate + verilate one config.json and stash the resulting binary under bins_dir."""
+    dest = bins_dir / config_file.stem / BUILT_BINARY.name
+    if dest.exists():
+        return dest
+
+    print(f"🔨 Building simulator for {config_file.name}...")
+    original = CONFIG_PATH.read_text()
+    try:
+        shutil.copy(config_file, CONFIG_PATH)
+        subprocess.run(["make", "verilog"], check=True)
+        subprocess.run(["make", "verilator-trace"], check=True)
+    finally:
+        CONFIG_PATH.write_text(original)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(BUILT_BINARY, dest)
+    return dest
+
+
+def truncate_trace(trace_path, size, traces_dir):
+    """First `size` requests of a trace (0 keeps the whole trace)."""
+    if size <= 0:
+        return trace_path
+    out = traces_dir / f"{trace_path.stem}_{size}.txt"
+    if not out.exists():
+        traces_dir.mkdir(parents=True, exist_ok=True)
+        with open(trace_path, "r") as fin, open(out, "w") as fout:
+            for i, line in enumerate(fin):
+                if i >= size:
+                    break
+                fout.write(line)
+    return out
+
+
+def count_lines(path):
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def run_once(sim_exe, trace_path, cycles, workdir, quiet, extra_args=()):
+    """One timed simulator run. Returns wall/CPU time, peak RSS and what the run produced."""
+    if workdir.exists():
+        shutil.rmtree(workdir)
+    workdir.mkdir(parents=True)
+
+    cmd = [str(sim_exe), "-t", str(trace_path), "-c", str(cycles), *extra_args]
+    if quiet:
+        cmd.append("-q")
+
+    stdout_path = workdir / "sim_stdout.log"
+    with open(stdout_path, "w") as out, open(workdir / "sim_stderr.log", "w") as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=workdir, stdout=out, stderr=err)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+    match = COMPLETED_RE.search(stdout_path.read_text())
+    simulated_cycles = int(match.group(1)) if match else cycles
+
+    stats_files = [p for p in workdir.iterdir() if p.suffix in (".csv", ".bin")]
+    stats_bytes = sum(p.stat().st_size for p in stats_files)
+    input_log = workdir / "input_request_stats.csv"
+    requests = max(count_lines(input_log) - 1, 0) if input_log.exists() else count_lines(trace_path)
+
+    return {
+        "wall_s": wall,
+        "user_s": usage.ru_utime,
+        "sys_s": usage.ru_stime,
+        "max_rss_kb": usage.ru_maxrss,
+        "simulated_cycles": simulated_cycles,
+        "requests": requests,
+        "stdout_bytes": stdout_path.stat().st_size,
+        "stats_files": len(stats_files),
+        "stats_bytes": stats_bytes,
+    }
+
+
+def summarise(label, trace_path, size, quiet, runs):
+    wall = median(r["wall_s"] for r in runs)
+    first = runs[0]
+    return {
+        "sim": label,
+        "trace": trace_path.stem,
+        "size": size,
+        "quiet": quiet,
+        "repeats": len(runs),
+        "wall_s": wall,
+        "user_s": median(r["user_s"] for r in runs),
+        "sys_s": median(r["sys_s"] for r in runs),
+        "max_rss_kb": max(r["max_rss_kb"] for r in runs),
+        "simulated_cycles": first["simulated_cycles"],
+        "requests": first["requests"],
+        "cycles_per_s": first["simulated_cycles"] / wall if wall else 0.0,
+        "requests_per_s": first["requests"] / wall if wall else 0.0,
+        "stdout_bytes": first["stdout_bytes"],
+        "stats_files": first["stats_files"],
+        "stats_bytes": first["stats_bytes"],
+    }
+
+
+def attach_overheads(summary, reference_label):
+    """Fraction of runtime spent on [RESP] logging and (vs a stats-free build) on $fwrite statistics."""
+    by_key = {(s["sim"], s["trace"], s["size"], s["quiet"]): s for s in summary}
+    for s in summary:
+        key = (s["sim"], s["trace"], s["size"])
+        if not s["quiet"] and (*key, True) in by_key:
+            s["resp_log_overhead"] = 1.0 - by_key[(*key, True)]["wall_s"] / s["wall_s"]
+        ref = by_key.get((reference_label, s["trace"], s["size"], s["quiet"]))
+        if reference_label and ref and s["sim"] != reference_label:
+            s["stats_overhead"] = 1.0 - ref["wall_s"] / s["wall_s"]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def print_table(summary):
+    header = f"{'sim':<14} {'trace':<28} {'size':>8} {'quiet':>5} {'wall[s]':>9} {'cyc/s':>12} {'req/s':>10} {'RSS[MB]':>8} {'resp%':>6} {'stats%':>7}"
+    print(header)
+    print("-" * len(header))
+    for s in summary:
+        resp = f"{s['resp_log_overhead']:.0%}" if "resp_log_overhead" in s else "-"
+        stats = f"{s['stats_overhead']:.0%}" if "stats_overhead" in s else "-"
+        print(f"{s['sim']:<14} {s['trace']:<28} {s['size']:>8} {str(s['quiet']):>5} {s['wall_s']:>9.2f} "
+              f"{s['cycles_per_s']:>12.0f} {s['requests_per_s']:>10.0f} {s['max_rss_kb'] / 1024:>8.1f} {resp:>6} {stats:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulator wall-clock throughput across builds, traces and sizes.")
+    parser.add_argument("--sim", action="append", default=[],
+                        help="Simulator binary as LABEL=PATH (repeatable). Defaults to default=obj_dir/VMultiChannelSystem.")
+    parser.add_argument("--configs", nargs="*", default=[],
+                        help="config.json variants to elaborate and build; each becomes a simulator labelled by its file stem.")
+    parser.add_argument("--traces", required=True, nargs="+", help="Trace files or directories of *.txt traces.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[0],
+                        help="Trace prefixes to benchmark, in requests (0 = whole trace).")
+    parser.add_argument("--cycles", required=True, type=int, help="Cycle cap passed to the simulator.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per point (median is reported).")
+    parser.add_argument("--outdir", default="bench_results", help="Directory for binaries, scratch runs and JSON results.")
+    parser.add_argument("--reference", help="Label of a build without statistics modules, used to estimate $fwrite overhead.")
+    parser.add_argument("--skip-log-variant", action="store_true",
+                        help="Only run with -q instead of also timing the [RESP] console logging.")
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+
+    out_dir = Path(args.outdir).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    sims = {}
+    for spec in args.sim or [f"default={BUILT_BINARY}"]:
+        label, _, path = spec.partition("=")
+        sims[label] = Path(path).resolve()
+    for cfg in args.configs:
+        sims[Path(cfg).stem] = build_config_binary(Path(cfg).resolve(), out_dir / "bins")
+
+    for label, path in sims.items():
+        if not path.exists():
+            print(f"❌ Simulator {label} not found at {path}")
+            return
+
+    trace_files = []
+    for t in args.traces:
+        p = Path(t).resolve()
+        trace_files.extend(sorted(p.glob("*.txt")) if p.is_dir() else [p])
+    if not trace_files:
+        print("❌ No trace files found.")
+        return
+
+    variants = [True] if args.skip_log_variant else [False, True]
+    summary = []
+    for label, sim_exe in sims.items():
+        for trace in trace_files:
+            for size in args.sizes:
+                sized = truncate_trace(trace, size, out_dir / "traces")
+                for quiet in variants:
+                    print(f"🧪 {label} | {sized.name} | quiet={quiet}")
+                    workdir = out_dir / "runs" / f"{label}_{sized.stem}_{'q' if quiet else 'v'}"
+                    runs = [run_once(sim_exe, sized, args.cycles, workdir, quiet, replay_args(args.replay, args.mshrs))
+                            for _ in range(args.repeat)]
+                    summary.append(summarise(label, trace, size, quiet, runs))
+
+    attach_overheads(summary, args.reference)
+    print_table(summary)
+
+    stamp = datetime.now(timezone.utc)
+    record = {
+        "timestamp": stamp.isoformat(),
+        "git_commit": git_commit(),
+        "host": platform.node(),
+        "cycles": args.cycles,
+        "replay": replay_args(args.replay, args.mshrs),
+        "sims": {k: str(v) for k, v in sims.items()},
+        "results": summary,
+    }
+    result_path = out_dir / f"benchmark_{stamp.strftime('%Y%m%dT%H%M%S')}.json"
+    with open(result_path, "w") as f:
+        json.dump(record, f, indent=2)
+    with open(out_dir / "history.jsonl", "a") as f:
+        for s in summary:
+            f.write(json.dumps({"timestamp": record["timestamp"], "git_commit": record["git_commit"], **s}) + "\n")
+    print(f"✅ Wrote {result_path} and appended {len(summary)} rows to {out_dir / 'history.jsonl'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Warm-state checkpoints for the Verilated trace harness.
+
+``make verilator-trace`` builds the harness with ``--savable``: ``-S file -C
+cycle`` stops the replay at a cycle and writes the model together with the
+replay position, and ``-R file`` starts from such a snapshot instead of reset.
+
+Requests never issue before their trace cycle, so the state at cycle C only
+depends on the leading trace requests before cycle C. Snapshots are cached
+under (binary hash, hash of that trace prefix, C) plus the harness flags, and
+any trace sharing the prefix (another suffix, a longer tail window, a higher
+cycle cap) continues from the cached snapshot instead of simulating the
+warm-up again.
+
+The stats monitors reopen and truncate their files on restore. Each snapshot
+therefore keeps the logs written up to its cycle, and these are prepended to
+the continuation's logs, so a continued run's logs read like a full run's.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from decode_stats import decode_directory
+from sim_harness import add_replay_arguments, replay_args, run_trace_simulation
+from trace_io import iter_trace_chunks
+from trace_store import simulator_trace
+
+DEFAULT_CACHE = Path("checkpoint_cache")
+STATE_FILE = "state.vlt"
+META_FILE = "meta.json"
+LOG_DIR = "logs"
+
+_SAVED_RE = re.compile(r"Checkpoint at cycle (\d+) after (\d+) requests")
+_digests = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def binary_digest(sim_exe):
+    """sha256 of the simulator binary, remembered per (path, size, mtime)."""
+    path = Path(sim_exe).resolve()
+    st = path.stat()
+    key = (str(path), st.st_size, st.st_mtime_ns)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+
+def prefix_digest(trace_path, cycle):
+    """Hash and length of the leading requests with trace cycle < ``cycle``.
+
+    Hashes the same (addr, cycle, is_write) records as ``trace_store.trace_digest``.
+    """
+    h = hashlib.sha256()
+    count = 0
+    for chunk in iter_trace_chunks(trace_path):
+        late = np.flatnonzero(chunk["cycle"] >= cycle)
+        end = int(late[0]) if late.size else chunk["cycle"].size
+        records = np.empty(end, dtype=[("addr", "<u8"), ("cycle", "<i8"), ("is_write", "u1")])
+        records["addr"], records["cycle"] = chunk["addr"][:end], chunk["cycle"][:end]
+        records["is_write"] = chunk["is_write"][:end]
+        h.update(records.tobytes())
+        count += end
+        if late.size:
+            break
+    return h.hexdigest(), count
+
+
+def checkpoint_key(sim_exe, trace_path, cycle, extra_args=()):
+    """Cache key of the snapshot of ``trace_path`` at ``cycle`` and the prefix length it covers."""
+    prefix, count = prefix_digest(trace_path, cycle)
+    h = hashlib.sha256()
+    h.update(json.dumps([binary_digest(sim_exe), prefix, int(cycle), [str(a) for a in extra_args]]).encode())
+    return h.hexdigest()[:24], count
+
+
+def _key_lock(key):
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def save_checkpoint(sim_exe, trace_path, cycle, dest, extra_args=(), resume=None):
+    """Simulate ``trace_path`` up to ``cycle`` and write the snapshot and its logs to ``dest``.
+
+    With ``resume`` (an earlier snapshot of the same trace) only the cycles after it are simulated.
+    """
+    dest = Path(dest)
+    logs = dest / LOG_DIR
+    logs.mkdir(parents=True, exist_ok=True)
+    with simulator_trace(trace_path, dest) as text_trace:
+        cmd = [str(Path(sim_exe).resolve()), "-t", str(Path(text_trace).resolve()), "-c", str(cycle),
+               *[str(a) for a in extra_args], "-q", "-S", str((dest / STATE_FILE).resolve()), "-C", str(cycle)]
+        if resume:
+            cmd += ["-R", str((Path(resume) / STATE_FILE).resolve())]
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=logs, check=True, stdout=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - start
+    m = _SAVED_RE.search(proc.stdout)
+    if not m or not (dest / STATE_FILE).exists():
+        raise RuntimeError(f"{sim_exe} did not write a checkpoint (needs a --savable build)")
+    decode_directory(logs, remove_binary=True)
+    if resume:
+        splice_logs(resume, logs)
+    return {"reached_cycle": int(m.group(1)), "issued": int(m.group(2)), "seconds": elapsed}
+
+
+def ensure_checkpoint(sim_exe, trace_path, cycle, extra_args=(), cache_dir=DEFAULT_CACHE, resume=None):
+    """Directory of the cached snapshot for ``trace_path`` at ``cycle``, creating it on a miss.
+
+    A miss continues from the ``resume`` snapshot when given. Returns (directory, meta dict, hit).
+    """
+    cache_dir = Path(cache_dir)
+    key, count = checkpoint_key(sim_exe, trace_path, cycle, extra_args)
+    final = cache_dir / key
+    with _key_lock(key):
+        if (final / META_FILE).exists():
+            with open(final / META_FILE) as f:
+                return final, json.load(f), True
+
+        tmp = cache_dir / f"{key}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        meta = save_checkpoint(sim_exe, trace_path, cycle, tmp, extra_args, resume)
+        meta.update({
+            "binary_sha256": binary_digest(sim_exe),
+            "cycle": int(cycle),
+            "prefix_requests": count,
+            "extra_args": [str(a) for a in extra_args],
+            "trace": Path(trace_path).name,
+        })
+        with open(tmp / META_FILE, "w") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # Another process stored the same snapshot first
+    return final, meta, False
+
+
+def splice_logs(checkpoint_dir, run_dir):
+    """Prepend the snapshot's logs to the continuation's, dropping the repeated CSV header."""
+    run_dir = Path(run_dir)
+    for prefix in sorted((Path(checkpoint_dir) / LOG_DIR).glob("*.csv")):
+        target = run_dir / prefix.name
+        tmp = target.with_suffix(".csv.tmp")
+        with open(tmp, "wb") as out:
+            with open(prefix, "rb") as f:
+                header = f.readline()
+                out.write(header)
+                shutil.copyfileobj(f, out)
+            if target.exists():
+                with open(target, "rb") as f:
+                    first = f.readline()
+                    if first != header:
+                        out.write(first)
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp, target)
+    # Harness records (sim -V) are headerless fixed-width records
+    for prefix in sorted((Path(checkpoint_dir) / LOG_DIR).glob("*.bin")):
+        target = run_dir / prefix.name
+        tmp = target.with_suffix(".bin.tmp")
+        with open(tmp, "wb") as out:
+            for part in (prefix, target):
+                if part.exists():
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out)
+        os.replace(tmp, target)
+
+
+def run_from_checkpoint(sim_exe, trace_path, cycles, run_dir, checkpoint_dir, extra_args=()):
+    """Continue ``trace_path`` from a snapshot; the logs in ``run_dir`` cover the whole run."""
+    state = (Path(checkpoint_dir) / STATE_FILE).resolve()
+    elapsed = run_trace_simulation(sim_exe, trace_path, cycles, run_dir, [*extra_args, "-R", str(state)])
+    splice_logs(checkpoint_dir, run_dir)
+    return elapsed
+
+
+def run_warm(sim_exe, trace_path, cycles, run_dir, warm_cycle, extra_args=(), cache_dir=DEFAULT_CACHE):
+    """``run_trace_simulation`` that starts from the cached snapshot at ``warm_cycle``.
+
+    Returns (simulator seconds including any snapshot creation, snapshot meta, cache hit).
+    """
+    checkpoint_dir, meta, hit = ensure_checkpoint(sim_exe, trace_path, min(warm_cycle, cycles), extra_args, cache_dir)
+    elapsed = run_from_checkpoint(sim_exe, trace_path, cycles, run_dir, checkpoint_dir, extra_args)
+    return elapsed + (0.0 if hit else meta["seconds"]), meta, hit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fork trace continuations from a shared warm-state checkpoint.")
+    parser.add_argument("--sim", required=True, help="Savable simulator build (make verilator-trace).")
+    parser.add_argument("--traces", nargs="+", required=True,
+                        help="Traces to continue; those sharing the prefix before --warm-cycle share one snapshot.")
+    parser.add_argument("--warm-cycle", type=int, required=True, help="Cycle at which to snapshot the warm state.")
+    parser.add_argument("--cycles", type=int, nargs="+", required=True,
+                        help="Cycle caps; every trace is continued once per cap (tail windows).")
+    parser.add_argument("--outdir", default="checkpoint_runs", help="One log directory per continuation.")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE), help="Snapshot cache directory.")
+    parser.add_argument("--jobs", type=int, default=4, help="Continuations to simulate concurrently.")
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+
+    sim_exe = Path(args.sim).resolve()
+    if not sim_exe.exists():
+        print(f"❌ Simulator not found at {sim_exe}")
+        return
+    out_dir = Path(args.outdir)
+    extra = replay_args(args.replay, args.mshrs)
+
+    runs = {}
+    for trace in map(Path, args.traces):
+        for cap in args.cycles:
+            name = trace.stem if len(args.cycles) == 1 else f"{trace.stem}_c{cap}"
+            runs[name] = (trace, cap)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {name: pool.submit(run_warm, sim_exe, trace, cap, out_dir / name, args.warm_cycle, extra, args.cache)
+                   for name, (trace, cap) in runs.items()}
+        results = {name: f.result() for name, f in futures.items()}
+
+    for name, (elapsed, meta, hit) in results.items():
+        source = "cached" if hit else "new"
+        print(f"✅ {name}: {elapsed:.2f}s from {source} snapshot at cycle {meta['reached_cycle']} "
+              f"({meta['issued']} requests warm)")
+    warm = {m["reached_cycle"] for _, m, _ in results.values()}
+    skipped = sum(m["reached_cycle"] for _, m, hit in results.values() if hit)
+    print(f"⏱️  {len(results)} continuations from {len(warm)} snapshot cycle(s); "
+          f"{skipped} warm-up cycles not re-simulated")
+    print(f"👉 Logs in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Decode the fixed-width ``*.bin`` records written by the SV statistics modules.
+
+With ``statsMode: "binary"`` every monitor writes packed little-endian records
+instead of text CSV rows. This module turns them back into the same columns
+(and the same ``.csv`` files) the analysis scripts already read.
+"""
+import argparse
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# {cs, ras, cas, we} -> command name, matching the text writers
+COMMANDS = {
+    0b0001: "REFRESH",
+    0b0010: "PRECHARGE",
+    0b0011: "ACTIVATE",
+    0b0101: "READ",
+    0b0100: "WRITE",
+    0b0000: "SELF REFRESH ENTER",
+    0b0111: "SELF REFRESH EXIT",
+}
+
+
+def _dtype(*fields):
+    return np.dtype([(name, "<u8" if name == "cycle" else "<u4") for name in fields])
+
+
+# (filename pattern, record dtype, CSV header, column builder). Scheduler patterns
+# come first since the plain command-queue names are substrings of them.
+LAYOUTS = [
+    (r"^input_request_stats_scheduler_rank\d+_bank\d+$",
+     _dtype("request_id", "addr", "flags", "cycle"),
+     ["RequestID", "Address", "Read", "Write", "Cycle"], "request"),
+    (r"^output_response_stats_scheduler_rank\d+_bank\d+$",
+     _dtype("request_id", "addr", "flags", "cycle"),
+     ["RequestID", "Address", "Read", "Write", "Cycle"], "request"),
+    (r"^memory_request_queue_stats_scheduler_rank\d+_bank\d+$",
+     _dtype("request_id", "addr", "cmd", "cycle", "data"),
+     ["RequestID", "Address", "Type", "Cycle", "Input Data"], "command"),
+    (r"^memory_response_queue_stats_scheduler_rank\d+_bank\d+$",
+     _dtype("request_id", "addr", "cycle", "data"),
+     ["RequestID", "Address", "Cycle", "Data"], "plain"),
+    (r"^bank_req_queue_stats_rank\d+_bank\d+$",
+     _dtype("request_id", "addr", "cmd", "cycle"),
+     ["RequestID", "Address", "Type", "Cycle"], "command"),
+    (r"^bank_resp_queue_stats_rank\d+_bank\d+$",
+     _dtype("request_id", "addr", "data", "cycle", "active_row", "active_col"),
+     ["RequestID", "Address", "Data", "Cycle", "Active Row", "Active Col"], "plain"),
+    (r"^memory_request_queue_stats$",
+     _dtype("request_id", "addr", "cmd", "cycle"),
+     ["RequestID", "Address", "Type", "Cycle"], "command"),
+    (r"^memory_response_queue_stats$",
+     _dtype("request_id", "addr", "data", "cycle"),
+     ["RequestID", "Address", "Type", "Cycle"], "plain"),
+    (r"^input_request_stats$",
+     _dtype("request_id", "addr", "flags", "cycle", "wdata"),
+     ["RequestID", "Address", "Read", "Write", "Cycle", "Write Data"], "request"),
+    (r"^output_request_stats$",
+     _dtype("request_id", "addr", "flags", "cycle", "wdata", "data"),
+     ["RequestID", "Address", "Read", "Write", "Cycle", "Write Data", "Response"], "request"),
+]
+
+
+def _layout_for(path):
+    stem = Path(path).stem
+    for pattern, dtype, header, kind in LAYOUTS:
+        if re.match(pattern, stem):
+            return dtype, header, kind
+    raise ValueError(f"No binary record layout known for {path}")
+
+
+def record_dtype(path):
+    """NumPy record dtype of one ``*.bin`` statistics file."""
+    return _layout_for(path)[0]
+
+
+def read_stats_binary(path):
+    """Decode one ``*.bin`` statistics file into a DataFrame with the CSV's columns."""
+    dtype, header, kind = _layout_for(path)
+    raw = np.fromfile(path, dtype=dtype)
+
+    if kind == "command":
+        # Unknown {cs, ras, cas, we} combinations are not logged by the text writers either
+        raw = raw[np.isin(raw["cmd"], list(COMMANDS))]
+
+    columns = {}
+    for name in dtype.names:
+        if name == "flags":
+            columns["Read"] = (raw["flags"] & 1).astype(np.int64)
+            columns["Write"] = ((raw["flags"] >> 1) & 1).astype(np.int64)
+        elif name == "cmd":
+            columns["cmd"] = pd.Series(raw["cmd"]).map(COMMANDS).to_numpy()
+        else:
+            columns[name] = raw[name].astype(np.int64)
+
+    # Record fields are laid out in CSV column order
+    return pd.DataFrame({col: values for col, values in zip(header, columns.values())})
+
+
+def load_stats(path):
+    """Load a statistics log regardless of whether it was written as text or binary."""
+    path = Path(path)
+    if path.suffix == ".bin":
+        return read_stats_binary(path)
+    return pd.read_csv(path, skipinitialspace=True)
+
+
+def decode_directory(directory, remove_binary=False):
+    """Write a ``.csv`` next to every ``.bin`` statistics file in ``directory``.
+
+    Directories from text-mode runs contain no ``.bin`` files and are left untouched.
+    Returns the list of CSVs written.
+    """
+    written = []
+    for bin_path in sorted(Path(directory).glob("*.bin")):
+        try:
+            df = read_stats_binary(bin_path)
+        except ValueError:
+            continue
+        csv_path = bin_path.with_suffix(".csv")
+        df.to_csv(csv_path, index=False)
+        written.append(csv_path)
+        if remove_binary:
+            bin_path.unlink()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode binary statistics records into the CSVs the analysis scripts read.")
+    parser.add_argument("dirs", nargs="+", help="Simulation output directories containing *.bin statistics files.")
+    parser.add_argument("--remove-binary", action="store_true", help="Delete each .bin after decoding it.")
+    args = parser.parse_args()
+
+    for d in args.dirs:
+        written = decode_directory(d, remove_binary=args.remove_binary)
+        if written:
+            print(f"✅ Decoded {len(written)} statistics files in {d}")
+        else:
+            print(f"⚠️  No binary statistics files found in {d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""Budget-aware design-space search over controller configs.
+
+Instead of simulating every grid point for the full cycle budget, as
+ablate_on_queues.py does for queueSize, configs first run with a short cycle
+cap. Only the most promising 1/eta of them move on to the next cap, which is
+eta times longer. This is successive halving. Hyperband runs several such
+brackets that trade the number of configs against their starting budget, which
+hedges against configs that only separate late in the trace.
+
+Configs are compared on mean latency, throughput and energy per request
+(``analyze/energy.py``). Promotion takes whole Pareto fronts first
+(non-dominated sorting). Ties in the last front are broken by crowding
+distance, so the survivors spread along the trade-off. The frontier over the
+full-length runs is written out explicitly.
+
+With ``--checkpoints`` a promoted config continues from the snapshot its
+previous rung ended on (``checkpoints.py``) instead of starting from reset.
+
+With ``--surrogate`` the grid is first screened by the model from
+``surrogate.py``. A config is never simulated when the predictions show another
+config clearly better on latency or throughput and no worse (within a small
+tolerance) on the other. Energy is not modelled, so such a config could still
+have been a low-energy point on the frontier.
+"""
+import argparse
+import itertools
+import json
+import math
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from checkpoints import LOG_DIR, ensure_checkpoint
+from distributed_sweep import config_binary
+from sim_harness import add_replay_arguments, replay_args, run_trace_simulation
+from surrogate import RidgeSurrogate, config_table, ruled_out
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "analyze"))
+from energy import DEFAULT_INI, PowerModel, evaluate_run  # noqa: E402
+
+OBJECTIVES = ("mean_latency", "throughput", "energy_per_request")
+# Multiplier that turns every objective into one to minimize
+SENSE = np.array([1.0, -1.0, 1.0])
+POLICIES = ("OPEN_PAGE", "CLOSED_PAGE")
+
+
+def config_name(cfg):
+    policy = cfg["bankSchedulerPolicy"].split("_")[0].lower()
+    return f"q{cfg['queueSize']}_c{cfg['numChannels']}_r{cfg['numRanks']}_b{cfg['numBanks']}_{policy}"
+
+
+def design_space(queue_sizes, channels, ranks, banks, policies):
+    """Every combination as config.json overrides."""
+    return [{"queueSize": q, "numChannels": c, "numRanks": r, "numBanks": b, "bankSchedulerPolicy": p}
+            for q, c, r, b, p in itertools.product(queue_sizes, channels, ranks, banks, policies)]
+
+
+def pareto_ranks(points):
+    """Non-dominated sorting of rows (all columns minimized); rank 0 is the Pareto front."""
+    points = np.where(np.isnan(points), np.inf, points)
+    no_worse = (points[:, None, :] <= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] < points[None, :, :]).any(axis=2)
+    dominates = no_worse & better  # dominates[i, j]: row i dominates row j
+    ranks = np.full(len(points), -1)
+    remaining = np.ones(len(points), dtype=bool)
+    level = 0
+    while remaining.any():
+        idx = np.flatnonzero(remaining)
+        front = idx[~dominates[np.ix_(idx, idx)].any(axis=0)]
+        ranks[front] = level
+        remaining[front] = False
+        level += 1
+    return ranks
+
+
+def crowding_distance(points):
+    """NSGA-II crowding distance of each row within one front (boundary rows get inf)."""
+    n = len(points)
+    if n <= 2:
+        return np.full(n, np.inf)
+    dist = np.zeros(n)
+    for col in points.T:
+        order = np.argsort(col)
+        values = col[order]
+        span = values[-1] - values[0]
+        dist[order[[0, -1]]] = np.inf
+        if np.isfinite(span) and span > 0:
+            dist[order[1:-1]] += (values[2:] - values[:-2]) / span
+    return dist
+
+
+def select_promising(points, k):
+    """Indices of the ``k`` best rows: whole fronts in rank order, the last one cut by crowding."""
+    ranks = pareto_ranks(points)
+    chosen = []
+    for level in range(ranks.max() + 1):
+        front = np.flatnonzero(ranks == level)
+        if len(chosen) + front.size > k:
+            crowd = crowding_distance(np.where(np.isnan(points[front]), np.inf, points[front]))
+            front = front[np.argsort(-crowd, kind="stable")[:k - len(chosen)]]
+        chosen.extend(int(i) for i in front)
+        if len(chosen) >= k:
+            break
+    return chosen
+
+
+def objective_matrix(rows):
+    return np.array([[row[o] for o in OBJECTIVES] for row in rows], dtype=np.float64) * SENSE
+
+
+class Evaluator:
+    """Runs (config, cycle budget) pairs once each and keeps their objectives."""
+
+    def __init__(self, trace, workdir, bins_dir, extra_args=(), checkpoint_dir=None, ini=DEFAULT_INI):
+        self.trace = Path(trace).resolve()
+        self.workdir = Path(workdir)
+        self.bins_dir = Path(bins_dir)
+        self.extra_args = list(extra_args)
+        self.checkpoint_dir = checkpoint_dir
+        self.model = PowerModel.from_ini(ini)
+        self.results = {}
+        self.snapshots = {}
+        self.simulated_cycles = 0
+        self.sim_seconds = 0.0
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+
+    def evaluate(self, cfg, budget, previous=None):
+        """Objectives of ``cfg`` after ``budget`` cycles, continuing from rung ``previous`` when possible."""
+        name = config_name(cfg)
+        if (name, budget) in self.results:
+            return self.results[name, budget]
+        sim = config_binary(cfg, self.bins_dir, self.build_lock)
+        start = time.perf_counter()
+        if self.checkpoint_dir:
+            resume = self.snapshots.get((name, previous))
+            snapshot, _, hit = ensure_checkpoint(sim, self.trace, budget, self.extra_args, self.checkpoint_dir, resume)
+            self.snapshots[name, budget] = snapshot
+            run_dir = snapshot / LOG_DIR
+            cycles = 0 if hit else budget - (previous if resume else 0)
+        else:
+            run_dir = self.workdir / name / f"c{budget}"
+            shutil.rmtree(run_dir, ignore_errors=True)
+            run_trace_simulation(sim, self.trace, budget, run_dir, self.extra_args)
+            cycles = budget
+        elapsed = time.perf_counter() - start
+
+        summary, _, _ = evaluate_run(run_dir, self.model, cfg["numBanks"], budget)
+        requests = summary["requests"]
+        row = {
+            "config": name,
+            **cfg,
+            "budget": budget,
+            "requests": requests,
+            "mean_latency": summary["mean_latency"],
+            "p99_latency": summary["p99_latency"],
+            "throughput": requests / max(summary["last_cycle"], 1) if requests else 0.0,
+            "energy_per_request": summary["total_pj"] / requests if requests else float("nan"),
+            "seconds": elapsed,
+        }
+        with self.lock:
+            self.results[name, budget] = row
+            self.simulated_cycles += cycles
+            self.sim_seconds += elapsed
+        return row
+
+
+def successive_halving(evaluator, pool, configs, min_budget, max_budget, eta, log=print):
+    """Run ``configs`` from ``min_budget``, keeping the best 1/eta at each eta-times-longer rung."""
+    budget, previous = min_budget, None
+    rungs = []
+    while True:
+        rows = list(pool.map(lambda cfg: evaluator.evaluate(cfg, budget, previous), configs))
+        rungs.append({"budget": budget, "configs": [r["config"] for r in rows]})
+        if budget >= max_budget:
+            return rows, rungs
+        keep = select_promising(objective_matrix(rows), max(1, len(configs) // eta))
+        log(f"   rung {budget:>10} cycles: {len(configs)} configs -> promoting {len(keep)}")
+        configs = [configs[i] for i in keep]
+        budget, previous = min(budget * eta, max_budget), budget
+
+
+def hyperband(evaluator, pool, space, min_budget, max_budget, eta, rng, log=print):
+    """Hyperband brackets from the most exploratory (many configs, shortest budget) to plain full runs."""
+    s_max = max(0, int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9)))
+    brackets = []
+    for s in range(s_max, -1, -1):
+        n = min(len(space), int(math.ceil((s_max + 1) / (s + 1) * eta ** s)))
+        budget = max(1, int(round(max_budget / eta ** s)))
+        picks = rng.choice(len(space), size=n, replace=False)
+        log(f"🎯 Bracket s={s}: {n} configs from {budget} cycles")
+        _, rungs = successive_halving(evaluator, pool, [space[i] for i in picks], budget, max_budget, eta, log)
+        brackets.append({"s": s, "rungs": rungs})
+    return brackets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving / Hyperband search over controller configs.")
+    parser.add_argument("--trace", required=True, help="Trace every config is evaluated on.")
+    parser.add_argument("--cycles", type=int, required=True, help="Full-length cycle budget (last rung).")
+    parser.add_argument("--min-cycles", type=int, help="Shortest budget (default: --cycles / eta^3).")
+    parser.add_argument("--eta", type=int, default=3, help="Promotion ratio and budget growth per rung.")
+    parser.add_argument("--method", choices=("hyperband", "sh"), default="hyperband",
+                        help="hyperband brackets, or one successive-halving run over the whole grid.")
+    parser.add_argument("--queue-sizes", type=int, nargs="+", default=[2, 4, 8, 16, 32, 64])
+    parser.add_argument("--channels", type=int, nargs="+", default=[1])
+    parser.add_argument("--ranks", type=int, nargs="+", default=[2])
+    parser.add_argument("--banks", type=int, nargs="+", default=[8])
+    parser.add_argument("--policies", nargs="+", choices=POLICIES, default=list(POLICIES))
+    parser.add_argument("--outdir", default="design_search", help="Search log, evaluations and frontier.")
+    parser.add_argument("--bins-dir", default="design_search/bins", help="One simulator build per config.")
+    parser.add_argument("--checkpoints", metavar="DIR",
+                        help="Continue promoted configs from their previous rung's snapshot (savable builds).")
+    parser.add_argument("--ini", default=str(DEFAULT_INI), help="DRAMSim3 ini for the energy model.")
+    parser.add_argument("--jobs", type=int, default=4, help="Configs to simulate concurrently.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for Hyperband's config sampling.")
+    parser.add_argument("--surrogate", metavar="MODEL",
+                        help="Skip configs the surrogate model (surrogate.py train) confidently rules out.")
+    parser.add_argument("--surrogate-coverage", type=float, default=0.95,
+                        help="Prediction interval coverage used for ruling configs out.")
+    parser.add_argument("--surrogate-tolerance", type=float, default=0.02,
+                        help="Relative loss on the other objective a config that rules another out may have.")
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+
+    if not Path(args.trace).exists():
+        print(f"❌ Trace file not found at {args.trace}")
+        return
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+    min_budget = args.min_cycles or max(1, args.cycles // args.eta ** 3)
+    space = design_space(args.queue_sizes, args.channels, args.ranks, args.banks, args.policies)
+    skipped = []
+    if args.surrogate:
+        model = RidgeSurrogate.load(args.surrogate)
+        pred = model.predict(config_table(args.trace, space), args.surrogate_coverage)
+        out = ruled_out(pred, args.surrogate_tolerance)
+        skipped = [config_name(cfg) for cfg, o in zip(space, out) if o]
+        space = [cfg for cfg, o in zip(space, out) if not o]
+        print(f"🎯 Surrogate ruled out {len(skipped)} of {len(skipped) + len(space)} configs "
+              f"at {args.surrogate_coverage:.0%} coverage")
+        if not space:
+            print("❌ The surrogate ruled out every config; raise --surrogate-coverage, lower --surrogate-tolerance, "
+                  "or retrain the model")
+            return
+    out_dir = Path(args.outdir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    evaluator = Evaluator(args.trace, out_dir / "runs", args.bins_dir, replay_args(args.replay, args.mshrs),
+                          args.checkpoints, args.ini)
+    print(f"🧪 {len(space)} configs, budgets {min_budget}..{args.cycles} cycles, eta={args.eta} ({args.method})")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        if args.method == "sh":
+            _, rungs = successive_halving(evaluator, pool, space, min_budget, args.cycles, args.eta)
+            schedule = [{"s": None, "rungs": rungs}]
+        else:
+            schedule = hyperband(evaluator, pool, space, min_budget, args.cycles, args.eta,
+                                 np.random.default_rng(args.seed))
+    wall = time.perf_counter() - start
+
+    evaluations = pd.DataFrame(list(evaluator.results.values())).sort_values(["budget", "config"])
+    evaluations.to_csv(out_dir / "evaluations.csv", index=False)
+    full = evaluations[evaluations["budget"] == args.cycles].reset_index(drop=True)
+    frontier = full.iloc[np.flatnonzero(pareto_ranks(objective_matrix(full.to_dict("records"))) == 0)]
+    frontier = frontier.sort_values("mean_latency")
+    frontier.to_csv(out_dir / "frontier.csv", index=False)
+
+    grid_cycles = (len(space) + len(skipped)) * args.cycles
+    with open(out_dir / "search.json", "w") as f:
+        json.dump({
+            "trace": str(Path(args.trace).resolve()),
+            "method": args.method,
+            "eta": args.eta,
+            "budgets": [min_budget, args.cycles],
+            "configs": len(space),
+            "schedule": schedule,
+            "simulated_cycles": evaluator.simulated_cycles,
+            "grid_cycles": grid_cycles,
+            "sim_seconds": evaluator.sim_seconds,
+            "wall_seconds": wall,
+            "frontier": frontier["config"].tolist(),
+            "surrogate_skipped": skipped,
+        }, f, indent=2)
+
+    print(f"\n📊 Pareto frontier at {args.cycles} cycles ({len(full)} full-length runs)")
+    cols = ["config", "mean_latency", "p99_latency", "throughput", "energy_per_request"]
+    print(frontier[cols].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    print(f"⏱️  Simulated {evaluator.simulated_cycles} cycles, {evaluator.simulated_cycles / grid_cycles:.1%} of the "
+          f"{grid_cycles} a full-length grid over {len(space)} configs needs ({wall:.1f}s wall)")
+    print(f"👉 Evaluations and frontier in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
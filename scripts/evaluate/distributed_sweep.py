@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""Coordinator/worker mode for trace x config sweeps over plain HTTP.
+
+The coordinator holds the job list (one job per trace, config and cycle
+budget) and serves it with the standard library's HTTP server:
+
+    POST /lease              {"worker": name} -> job JSON, 204 (none free yet) or 410 (sweep done)
+    GET  /trace/<sha256>     the trace as a compressed .mtrace from the trace store
+    POST /result/<job id>    tar.gz bundle of the run's statistics CSVs
+    POST /fail/<job id>      error text; the job is retried up to --retries times
+                             (both carry the lease id in X-Lease; 409 if it is no longer current)
+    GET  /status             counts of pending/leased/done/failed jobs
+
+Workers lease a job, fetch the trace once per digest, pick the simulator
+(``--sim`` for jobs without config overrides, otherwise a per-config build
+made with ``make verilog verilator-trace``), run it through
+``run_trace_simulation`` and post the bundle back. A lease that is not
+completed within ``--lease-timeout`` seconds is handed to the next worker, so a
+worker that dies only delays its job; results and failures posted under an
+expired lease are discarded, so a late run never overwrites or double-counts
+the reissued one.
+Bundles are unpacked into the same layout the local runners write
+(``<exp>/meta/*.csv`` plus ``trace_ref.json``), so the analysis and report
+scripts work unchanged. Everything runs against localhost as well.
+"""
+import argparse
+import hashlib
+import io
+import json
+import shutil
+import socket
+import tarfile
+import tempfile
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from sim_harness import add_replay_arguments, replay_args, run_trace_simulation
+from trace_store import DEFAULT_STORE, SUFFIX, TraceReader, reference_trace, store_trace
+
+DEFAULT_PORT = 8765
+TOKEN_HEADER = "X-Sweep-Token"
+CONFIG_PATH = Path("src/main/config/config.json")
+# Copied next to meta/ as well, like evaluate_trace_current.py does
+TOP_LEVEL_LOGS = ("input_request_stats.csv", "memory_request_queue_stats.csv", "memory_response_queue_stats.csv",
+                  "output_request_stats.csv")
+
+
+def make_jobs(traces, configs, cycles, extra_args=(), store_dir=DEFAULT_STORE):
+    """One job per (trace, config). ``configs`` is a list of (name, config.json overrides).
+
+    Experiment directories follow the local runners: ``exp_<trace>`` for one
+    config, ``<config name>`` (e.g. ``hardware_config_<queueSize>``) for one
+    trace, and ``<config name>/exp_<trace>`` for a full matrix.
+    """
+    jobs = []
+    for trace in traces:
+        digest, _ = store_trace(trace, store_dir)
+        for name, overrides in configs:
+            if len(configs) == 1:
+                exp = f"exp_{Path(trace).stem}"
+            elif len(traces) == 1:
+                exp = name
+            else:
+                exp = f"{name}/exp_{Path(trace).stem}"
+            jobs.append({"id": len(jobs), "exp": exp, "trace": Path(trace).name, "sha256": digest,
+                         "config": dict(overrides), "cycles": int(cycles), "extra_args": [str(a) for a in extra_args]})
+    return jobs
+
+
+class Coordinator:
+    """Job queue with leases; thread-safe, shared by the HTTP handler threads."""
+
+    def __init__(self, jobs, out_dir, store_dir=DEFAULT_STORE, lease_timeout=3600, retries=2):
+        self.jobs = {j["id"]: j for j in jobs}
+        self.out_dir = Path(out_dir)
+        self.store_dir = Path(store_dir)
+        self.lease_timeout = lease_timeout
+        self.retries = retries
+        self.pending = deque(self.jobs)
+        self.leased = {}    # job id -> (worker, deadline, lease id)
+        self.completing = set()     # job ids whose result bundle is being unpacked
+        self.done = {}      # job id -> result metadata
+        self.failed = {}    # job id -> last error
+        self.attempts = {j: 0 for j in self.jobs}
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.jobs:
+            self.finished.set()
+
+    def _expire(self, now):
+        for job_id, (worker, deadline, _) in list(self.leased.items()):
+            if deadline < now:
+                print(f"⚠️  Lease of job {job_id} by {worker} expired, requeueing")
+                del self.leased[job_id]
+                self.pending.appendleft(job_id)
+
+    def lease(self, worker):
+        """Next job for ``worker``, None if all are leased, or False when the sweep is over."""
+        with self.lock:
+            self._expire(time.time())
+            if not self.pending:
+                return False if not self.leased and not self.completing else None
+            job_id = self.pending.popleft()
+            self.attempts[job_id] += 1
+            # The attempt number identifies the lease; only its holder may report back
+            self.leased[job_id] = (worker, time.time() + self.lease_timeout, self.attempts[job_id])
+            return {**self.jobs[job_id], "lease": self.attempts[job_id]}
+
+    def _claim(self, job_id, lease_id, worker):
+        """Take ``job_id`` out of the leases if ``lease_id`` is its current lease (call with the lock held)."""
+        current = self.leased.get(job_id)
+        if current is None or current[2] != lease_id:
+            print(f"⚠️  Ignoring report for job {job_id} from {worker}: lease {lease_id} is no longer current")
+            return False
+        del self.leased[job_id]
+        return True
+
+    def complete(self, job_id, lease_id, bundle, worker, elapsed):
+        """Store a result; returns False (and stores nothing) for a stale lease."""
+        with self.lock:
+            if not self._claim(job_id, lease_id, worker):
+                return False
+            self.completing.add(job_id)
+        job = self.jobs[job_id]
+        exp_dir = self.out_dir / job["exp"]
+        meta_dir = exp_dir / "meta"
+        try:
+            shutil.rmtree(meta_dir, ignore_errors=True)
+            meta_dir.mkdir(parents=True)
+            with tarfile.open(fileobj=io.BytesIO(bundle), mode="r:gz") as tar:
+                tar.extractall(meta_dir, filter="data")
+            for name in TOP_LEVEL_LOGS:
+                if (meta_dir / name).exists():
+                    shutil.copy(meta_dir / name, exp_dir / name)
+            reference_trace(self.store_dir / f"{job['sha256']}{SUFFIX}", exp_dir, self.store_dir, name=job["trace"])
+            with open(exp_dir / "job.json", "w") as f:
+                json.dump({**job, "worker": worker, "sim_seconds": elapsed}, f, indent=2)
+        except Exception:
+            with self.lock:
+                self.completing.discard(job_id)
+                self.pending.appendleft(job_id)
+            raise
+
+        with self.lock:
+            self.completing.discard(job_id)
+            self.failed.pop(job_id, None)
+            self.done[job_id] = {"worker": worker, "sim_seconds": elapsed, "bundle_bytes": len(bundle)}
+            self._check_finished()
+        print(f"✅ Job {job_id} ({job['exp']}) done by {worker} in {elapsed:.1f}s")
+        return True
+
+    def fail(self, job_id, lease_id, worker, error):
+        """Record a failed run; returns False for a stale lease."""
+        with self.lock:
+            if not self._claim(job_id, lease_id, worker):
+                return False
+            self.failed[job_id] = error
+            if self.attempts[job_id] <= self.retries:
+                self.pending.append(job_id)
+            self._check_finished()
+        print(f"❌ Job {job_id} failed on {worker}: {error.strip().splitlines()[-1] if error.strip() else ''}")
+        return True
+
+    def _check_finished(self):
+        if not self.pending and not self.leased and not self.completing:
+            self.finished.set()
+
+    def status(self):
+        with self.lock:
+            return {"jobs": len(self.jobs), "pending": len(self.pending), "leased": len(self.leased) + len(self.completing),
+                    "done": len(self.done), "failed": len(set(self.failed) - set(self.done))}
+
+
+def _handler(coordinator, token):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, code, body=b"", content_type="application/json"):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if token and self.headers.get(TOKEN_HEADER) != token:
+                self._reply(403)
+                return False
+            return True
+
+        def _body(self):
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path == "/status":
+                self._reply(200, json.dumps(coordinator.status()).encode())
+            elif self.path.startswith("/trace/"):
+                digest = self.path.rsplit("/", 1)[-1]
+                path = coordinator.store_dir / f"{digest}{SUFFIX}"
+                if not digest.isalnum() or not path.exists():
+                    self._reply(404)
+                else:
+                    self._reply(200, path.read_bytes(), "application/octet-stream")
+            else:
+                self._reply(404)
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            parts = self.path.strip("/").split("/")
+            body = self._body()
+            if parts == ["lease"]:
+                job = coordinator.lease(json.loads(body or b"{}").get("worker", self.client_address[0]))
+                if job is False:
+                    self._reply(410)
+                elif job is None:
+                    self._reply(204)
+                else:
+                    self._reply(200, json.dumps(job).encode())
+            elif len(parts) == 2 and parts[0] in ("result", "fail") and parts[1].isdigit():
+                job_id = int(parts[1])
+                if job_id not in coordinator.jobs:
+                    self._reply(404)
+                    return
+                worker = self.headers.get("X-Worker", self.client_address[0])
+                lease_id = int(self.headers.get("X-Lease", -1))
+                if parts[0] == "result":
+                    accepted = coordinator.complete(job_id, lease_id, body, worker,
+                                                    float(self.headers.get("X-Elapsed", 0)))
+                else:
+                    accepted = coordinator.fail(job_id, lease_id, worker, body.decode(errors="replace"))
+                self._reply(200 if accepted else 409)
+            else:
+                self._reply(404)
+
+    return Handler
+
+
+def serve(jobs, out_dir, host="0.0.0.0", port=DEFAULT_PORT, store_dir=DEFAULT_STORE, token=None,
+          lease_timeout=3600, retries=2):
+    """Serve ``jobs`` until every one is done or out of retries; writes breadcrumb.json and sweep.json."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    coordinator = Coordinator(jobs, out_dir, store_dir, lease_timeout, retries)
+    server = ThreadingHTTPServer((host, port), _handler(coordinator, token))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"📡 Serving {len(jobs)} jobs on http://{host}:{server.server_address[1]}")
+    try:
+        while not coordinator.finished.wait(timeout=30):
+            st = coordinator.status()
+            print(f"📊 {st['done']}/{st['jobs']} done, {st['leased']} running, {st['pending']} pending")
+    finally:
+        # Let workers see 410 before the server goes away
+        time.sleep(1)
+        server.shutdown()
+
+    exp_dirs = sorted({str((out_dir / coordinator.jobs[j]["exp"]).resolve()) for j in coordinator.done})
+    with open(out_dir / "breadcrumb.json", "w") as f:
+        json.dump({"experiments": exp_dirs}, f, indent=2)
+    with open(out_dir / "sweep.json", "w") as f:
+        json.dump({"status": coordinator.status(), "done": coordinator.done,
+                   "failed": {j: e for j, e in coordinator.failed.items() if j not in coordinator.done}}, f, indent=2)
+    st = coordinator.status()
+    print(f"✅ Sweep finished: {st['done']} done, {st['failed']} failed; wrote {out_dir / 'breadcrumb.json'}")
+    return coordinator
+
+
+class WorkerClient:
+    """HTTP client side of the protocol."""
+
+    def __init__(self, url, name, token=None, timeout=60):
+        self.url = url.rstrip("/")
+        self.name = name
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, path, data=None, headers=None):
+        req = urllib.request.Request(self.url + path, data=data, headers={"X-Worker": self.name, **(headers or {})})
+        if self.token:
+            req.add_header(TOKEN_HEADER, self.token)
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return resp.status, resp.read()
+
+    def lease(self):
+        """Job dict, None to retry later, or False when the sweep is over."""
+        try:
+            status, body = self._request("/lease", json.dumps({"worker": self.name}).encode())
+        except urllib.error.HTTPError as e:
+            if e.code == 410:
+                return False
+            raise
+        return json.loads(body) if status == 200 else None
+
+    def fetch_trace(self, digest, cache_dir):
+        path = Path(cache_dir) / f"{digest}{SUFFIX}"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _, body = self._request(f"/trace/{digest}")
+            tmp = path.with_suffix(".part")
+            tmp.write_bytes(body)
+            if TraceReader(tmp).digest != digest:
+                tmp.unlink()
+                raise RuntimeError(f"Trace {digest[:16]} failed its digest check")
+            tmp.replace(path)
+        return path
+
+    def _report(self, path, data, headers):
+        """POST a result or failure; False when the coordinator discarded it (lease expired)."""
+        try:
+            self._request(path, data, headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return False
+            raise
+        return True
+
+    def post_result(self, job, bundle, elapsed):
+        return self._report(f"/result/{job['id']}", bundle, {"X-Lease": str(job["lease"]), "X-Elapsed": f"{elapsed:.3f}",
+                                                              "Content-Type": "application/gzip"})
+
+    def post_failure(self, job, error):
+        return self._report(f"/fail/{job['id']}", error.encode(), {"X-Lease": str(job["lease"])})
+
+
+def bundle_results(run_dir):
+    """tar.gz of the statistics CSVs in ``run_dir``."""
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for path in sorted(Path(run_dir).glob("*.csv")):
+            tar.add(path, arcname=path.name)
+    return buf.getvalue()
+
+
+def config_binary(overrides, bins_dir, build_lock):
+    """Simulator built for the default config.json plus ``overrides`` (built once per config)."""
+    from benchmark_simulator import build_config_binary
+
+    with open(CONFIG_PATH) as f:
+        config = {**json.load(f), **overrides}
+    key = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+    bins_dir = Path(bins_dir)
+    bins_dir.mkdir(parents=True, exist_ok=True)
+    config_file = bins_dir / f"{key}.json"
+    with build_lock:
+        # build_config_binary swaps the repo's config.json, so builds never overlap
+        if not config_file.exists():
+            config_file.write_text(json.dumps(config, indent=2))
+        return build_config_binary(config_file, bins_dir)
+
+
+def work(url, workdir, sim=None, bins_dir=None, slots=1, token=None, poll=2.0, name=None, grace=30.0):
+    """Lease and run jobs with ``slots`` concurrent runs until the coordinator reports the sweep done.
+
+    A coordinator that has been reached once and then stays unreachable for
+    ``grace`` seconds is taken to have finished (it shuts down shortly after
+    the last result, possibly while this slot is waiting to poll again).
+    """
+    workdir = Path(workdir)
+    bins_dir = Path(bins_dir) if bins_dir else workdir / "bins"
+    name = name or socket.gethostname()
+    build_lock = threading.Lock()
+    counts = {"done": 0, "failed": 0, "discarded": 0}
+
+    def loop(slot):
+        client = WorkerClient(url, f"{name}/{slot}", token)
+        contacted, lost_since = False, None
+        while True:
+            try:
+                job = client.lease()
+            except urllib.error.HTTPError as e:
+                print(f"❌ {client.name}: coordinator refused the lease ({e.code} {e.reason})")
+                return
+            except (urllib.error.URLError, ConnectionError):
+                # Coordinator not up yet, restarting, or gone after the sweep ended
+                lost_since = lost_since or time.monotonic()
+                if contacted and time.monotonic() - lost_since > grace:
+                    return
+                time.sleep(poll)
+                continue
+            contacted, lost_since = True, None
+            if job is False:
+                return
+            if job is None:
+                time.sleep(poll)
+                continue
+            run_dir = Path(tempfile.mkdtemp(prefix=f"job{job['id']}_", dir=workdir))
+            try:
+                trace = client.fetch_trace(job["sha256"], workdir / "traces")
+                # --sim stands in for the default config only; jobs with overrides need their own build
+                sim_exe = sim if sim and not job["config"] else config_binary(job["config"], bins_dir, build_lock)
+                elapsed = run_trace_simulation(sim_exe, trace, job["cycles"], run_dir, job["extra_args"])
+                accepted = client.post_result(job, bundle_results(run_dir), elapsed)
+                counts["done" if accepted else "discarded"] += 1
+            except Exception:
+                accepted = client.post_failure(job, traceback.format_exc())
+                counts["failed" if accepted else "discarded"] += 1
+            finally:
+                shutil.rmtree(run_dir, ignore_errors=True)
+            if not accepted:
+                print(f"⚠️  {client.name}: lease of job {job['id']} expired before it finished; result discarded")
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(max(1, slots))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"✅ Worker {name}: {counts['done']} jobs done, {counts['failed']} failed, "
+          f"{counts['discarded']} discarded after their lease expired")
+    return counts
+
+
+def parse_address(value, default_host="0.0.0.0"):
+    """``host:port``, ``:port`` or ``port`` -> (host, port)."""
+    host, _, port = value.rpartition(":")
+    return host or default_host, int(port)
+
+
+def add_serve_arguments(parser):
+    """Coordinator options shared by the evaluate and ablation runners."""
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="Serve the runs to distributed_sweep.py workers instead of simulating locally.")
+    parser.add_argument("--token", help="Shared secret workers must send.")
+    parser.add_argument("--lease-timeout", type=float, default=3600, help="Seconds before an unfinished job is reissued.")
+    parser.add_argument("--retries", type=int, default=2, help="Reissues of a failed job.")
+
+
+def serve_from_args(args, jobs, out_dir, store_dir):
+    host, port = parse_address(args.serve)
+    return serve(jobs, out_dir, host, port, store_dir, args.token, args.lease_timeout, args.retries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed trace x config sweeps over HTTP.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="Coordinate a sweep.")
+    p.add_argument("--traces", nargs="+", required=True, help="Trace files or directories of traces.")
+    p.add_argument("--outdir", required=True, help="Experiment output directory.")
+    p.add_argument("--cycles", type=int, required=True, help="Cycle budget per run.")
+    p.add_argument("--queue-sizes", type=int, nargs="*", default=[],
+                   help="queueSize values to sweep (hardware_config_<n>); default: config.json as is.")
+    p.add_argument("--configs", nargs="*", default=[], help="JSON files of config.json overrides, one config each.")
+    p.add_argument("--trace-store", default=str(DEFAULT_STORE))
+    add_serve_arguments(p)
+    add_replay_arguments(p)
+
+    p = sub.add_parser("work", help="Pull and run jobs from a coordinator.")
+    p.add_argument("url", help="Coordinator URL, e.g. http://farm-head:8765")
+    p.add_argument("--workdir", default="sweep_worker", help="Trace cache, per-config builds and scratch runs.")
+    p.add_argument("--sim", help="Use this simulator for jobs without config overrides "
+                                 "(jobs with overrides are always built per config).")
+    p.add_argument("--slots", type=int, default=1, help="Jobs to run concurrently on this machine.")
+    p.add_argument("--token", help="Shared secret of the coordinator.")
+    p.add_argument("--name", help="Worker name in the coordinator's logs (default: hostname).")
+    p.add_argument("--grace", type=float, default=30.0,
+                   help="Seconds to keep retrying once a reached coordinator stops answering.")
+    args = parser.parse_args()
+
+    if args.command == "work":
+        work(args.url, args.workdir, args.sim and str(Path(args.sim).resolve()), slots=args.slots,
+             token=args.token, name=args.name, grace=args.grace)
+        return
+
+    traces = []
+    for t in map(Path, args.traces):
+        traces += sorted(list(t.glob("*.txt")) + list(t.glob(f"*{SUFFIX}"))) if t.is_dir() else [t]
+    configs = [(f"hardware_config_{q}", {"queueSize": q}) for q in args.queue_sizes]
+    for c in map(Path, args.configs):
+        with open(c) as f:
+            configs.append((c.stem, json.load(f)))
+    if not traces:
+        parser.error("no traces found")
+    jobs = make_jobs(traces, configs or [("default", {})], args.cycles, replay_args(args.replay, args.mshrs),
+                     args.trace_store)
+    args.serve = args.serve or f":{DEFAULT_PORT}"
+    serve_from_args(args, jobs, args.outdir, args.trace_store)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,16 @@ from pathlib import Path
 import shutil
 import json
 
-def run_simulation(sim_exe, trace_path, out_dir, csv_dir, cycles, exp_dirs):
+from decode_stats import decode_directory
+from distributed_sweep import CONFIG_PATH, add_serve_arguments, make_jobs, serve_from_args
+from profiling import stage
+from sim_harness import add_replay_arguments, replay_args
+from steady_state import STEADY_FILE, add_steady_state_arguments, run_until_steady, steady_settings
+from trace_store import DEFAULT_STORE, reference_trace, simulator_trace
+from verify_records import PROBLEMS_FILE, REPORT_FILE, REQUEST_FILE, RESPONSE_FILE, has_records, verify_directory
+
+def run_simulation(sim_exe, trace_path, out_dir, csv_dir, cycles, exp_dirs, extra_args=(), store_dir=DEFAULT_STORE,
+                   steady=None, sim_config=None):
     trace_name = trace_path.stem
     exp_dir = out_dir / f"exp_{trace_name}"
     meta_dir = exp_dir / "meta"
@@ -15,24 +24,46 @@ def run_simulation(sim_exe, trace_path, out_dir, csv_dir, cycles, exp_dirs):
     print(f"🧪 Running simulation for {trace_name}...")
 
     try:
-        subprocess.run([sim_exe, "-t", str(trace_path), "-c", str(cycles)],
-                       check=True)
+        with stage("simulate", experiment=exp_dir.name), simulator_trace(trace_path, csv_dir) as text_trace:
+            if steady:
+                run_until_steady(sim_exe, text_trace, cycles, csv_dir, extra_args,
+                                 record=exp_dir / STEADY_FILE, stdout=None, **steady)
+            else:
+                subprocess.run([sim_exe, "-t", str(text_trace), "-c", str(cycles), *extra_args],
+                               check=True)
     except subprocess.CalledProcessError:
         print(f"❌ Error while running simulation on {trace_path}")
         return
 
-    # Copy trace file
-    shutil.copy(trace_path, exp_dir / trace_path.name)
+    # Runs recorded with -V are checked here, after the simulation
+    if has_records(csv_dir):
+        with stage("verify", experiment=exp_dir.name):
+            summary, _ = verify_directory(csv_dir, exp_dir / REPORT_FILE, exp_dir / PROBLEMS_FILE)
+        if not summary["ok"]:
+            print(f"❌ Data mismatches in {trace_name}: {summary['write_mismatches']} write, "
+                  f"{summary['read_mismatches']} read (see {exp_dir / PROBLEMS_FILE})")
 
-    # Move all CSV files into the meta directory
-    for csv_file in csv_dir.glob("*.csv"):
-        shutil.copy(csv_file, meta_dir / csv_file.name)
+    # Reference the trace by content hash instead of copying it
+    reference_trace(trace_path, exp_dir, store_dir)
 
-    # Move all CSV files into the exp directory for backward compatibility
-    whitelist = ['input_request_stats.csv', 'memory_request_queue_stats.csv', 'memory_response_queue_stats.csv', 'output_request_stats.csv']
-    for csv_file in csv_dir.glob("*.csv"):
-        if any([w in str(csv_file) for w in whitelist]):
-            shutil.copy(csv_file, exp_dir / csv_file.name)
+    # Record the config the simulator was built from (surrogate.py trains on it); unknown unless given
+    if sim_config:
+        shutil.copy(sim_config, exp_dir / "config.json")
+
+    # Binary statistics mode writes *.bin records; decode them to the usual CSVs
+    with stage("decode", experiment=exp_dir.name):
+        decode_directory(csv_dir)
+
+    with stage("copy-csvs", experiment=exp_dir.name):
+        # Move all CSV files into the meta directory
+        for csv_file in csv_dir.glob("*.csv"):
+            shutil.copy(csv_file, meta_dir / csv_file.name)
+
+        # Move all CSV files into the exp directory for backward compatibility
+        whitelist = ['input_request_stats.csv', 'memory_request_queue_stats.csv', 'memory_response_queue_stats.csv', 'output_request_stats.csv']
+        for csv_file in csv_dir.glob("*.csv"):
+            if any([w in str(csv_file) for w in whitelist]):
+                shutil.copy(csv_file, exp_dir / csv_file.name)
 
     exp_dirs.append(str(exp_dir.resolve()))
 
@@ -44,6 +75,14 @@ def main():
     parser.add_argument("--outdir", required=True, help="Directory to write experiment outputs.")
     parser.add_argument("--csv_dir", required=True, help="Directory where simulator writes CSV outputs.")
     parser.add_argument("--cycles", required=True, type=int, help="Number of cycles to run for each trace.")
+    parser.add_argument("--trace-store", default=str(DEFAULT_STORE), help="Content-addressed store for experiment traces.")
+    parser.add_argument("--sim-config", help=f"config.json the --sim binary was built from (e.g. {CONFIG_PATH}); "
+                                             "copied into each experiment as config.json.")
+    add_replay_arguments(parser)
+    add_steady_state_arguments(parser)
+    parser.add_argument("--offline-verify", action="store_true",
+                        help="Record compact request/response records (sim -V) and check data integrity after each run.")
+    add_serve_arguments(parser)
     args = parser.parse_args()
 
     sim_exe = Path(args.sim).resolve()
@@ -51,26 +90,42 @@ def main():
     out_dir = Path(args.outdir).resolve()
     csv_dir = Path(args.csv_dir).resolve()
 
-    if not sim_exe.exists():
-        print(f"❌ Simulator not found at {sim_exe}")
-        return
     if not traces_dir.is_dir():
         print(f"❌ Trace directory not found at {traces_dir}")
         return
+    trace_files = list(traces_dir.glob("*.txt")) + list(traces_dir.glob("*.mtrace"))
+    if not trace_files:
+        print("❌ No trace files found.")
+        return
+
+    # Hand the runs to remote workers (distributed_sweep.py work) instead of simulating here
+    if args.serve:
+        jobs = make_jobs(trace_files, [("default", {})], args.cycles, replay_args(args.replay, args.mshrs),
+                         args.trace_store)
+        serve_from_args(args, jobs, out_dir, args.trace_store)
+        return
+
+    if not sim_exe.exists():
+        print(f"❌ Simulator not found at {sim_exe}")
+        return
     if not csv_dir.is_dir():
         print(f"❌ CSV output directory not found at {csv_dir}")
         return
 
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    trace_files = list(traces_dir.glob("*.txt"))
-    if not trace_files:
-        print("❌ No trace files found.")
-        return
+    extra_args = replay_args(args.replay, args.mshrs)
+    if args.offline_verify:
+        extra_args.append("-V")
+    else:
+        # Records of an earlier -V run would otherwise be verified again
+        for name in (REQUEST_FILE, RESPONSE_FILE):
+            (csv_dir / name).unlink(missing_ok=True)
 
     exp_dirs = []
     for trace_file in trace_files:
-        run_simulation(sim_exe, trace_file, out_dir, csv_dir, args.cycles, exp_dirs)
+        run_simulation(sim_exe, trace_file, out_dir, csv_dir, args.cycles, exp_dirs,
+                       extra_args, args.trace_store, steady_settings(args), args.sim_config)
 
     # Write breadcrumb.json
     breadcrumb_path = out_dir / "breadcrumb.json"
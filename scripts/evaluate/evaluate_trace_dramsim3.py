@@ -9,6 +9,8 @@ import sys
 # Import from the plotting script logic
 import csv
 
+from trace_store import DEFAULT_STORE, reference_trace, simulator_trace
+
 
 def convert_dramsim3_json_to_csv(json_path, input_csv, output_csv):
     with open(json_path, 'r') as f:
@@ -51,7 +53,7 @@ def convert_dramsim3_json_to_csv(json_path, input_csv, output_csv):
     print(f"✅ Wrote {len(output_rows)} output rows to {output_csv}")
 
 
-def run_simulation(sim_exe, trace_path, config_path, out_dir, csv_dir, cycles, exp_dirs):
+def run_simulation(sim_exe, trace_path, config_path, out_dir, csv_dir, cycles, exp_dirs, store_dir=DEFAULT_STORE):
     trace_name = trace_path.stem
     exp_dir = out_dir / f"exp_{trace_name}"
     exp_dir.mkdir(parents=True, exist_ok=True)
@@ -59,12 +61,13 @@ def run_simulation(sim_exe, trace_path, config_path, out_dir, csv_dir, cycles, e
     print(f"🧪 Running DRAMSim3 for {trace_name}...")
 
     try:
-        subprocess.run([
-            str(sim_exe),
-            str(config_path),
-            "-c", str(cycles),
-            "-t", str(trace_path)
-        ], check=True)
+        with simulator_trace(trace_path, csv_dir) as text_trace:
+            subprocess.run([
+                str(sim_exe),
+                str(config_path),
+                "-c", str(cycles),
+                "-t", str(text_trace)
+            ], check=True)
     except subprocess.CalledProcessError:
         print(f"❌ Error while running simulation on {trace_path}")
         shutil.rmtree(exp_dir, ignore_errors=True)
@@ -87,7 +90,7 @@ def run_simulation(sim_exe, trace_path, config_path, out_dir, csv_dir, cycles, e
         return
 
     # Save results
-    shutil.copy(trace_path, exp_dir / trace_path.name)
+    reference_trace(trace_path, exp_dir, store_dir)
     for fname in ["input_request_stats.csv", "output_request_stats.csv", "dramsim3.json"]:
         fpath = csv_dir / fname
         if fpath.exists():
@@ -106,6 +109,7 @@ def main():
     parser.add_argument("--outdir", required=True, help="Directory to write experiment outputs.")
     parser.add_argument("--csv_dir", required=True, help="Directory where dramsim3.json is written.")
     parser.add_argument("--cycles", required=True, type=int, help="Number of cycles to run for each trace.")
+    parser.add_argument("--trace-store", default=str(DEFAULT_STORE), help="Content-addressed store for experiment traces.")
     args = parser.parse_args()
 
     sim_exe = Path(args.sim).resolve()
@@ -122,14 +126,14 @@ def main():
 
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    trace_files = list(traces_dir.glob("*.txt"))
+    trace_files = list(traces_dir.glob("*.txt")) + list(traces_dir.glob("*.mtrace"))
     if not trace_files:
         print("❌ No trace files found.")
         return
 
     exp_dirs = []
     for trace_file in trace_files:
-        run_simulation(sim_exe, trace_file, config_path, out_dir, csv_dir, args.cycles, exp_dirs)
+        run_simulation(sim_exe, trace_file, config_path, out_dir, csv_dir, args.cycles, exp_dirs, args.trace_store)
 
     breadcrumb_path = out_dir / "breadcrumb.json"
     with open(breadcrumb_path, 'w') as f:
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Load-latency curves and saturation knees.
+
+A request pattern is taken from a trace (the first ``--requests`` requests) or
+generated synthetically (Poisson arrivals, uniform addresses). It is replayed
+open-loop at controlled injection rates by stretching or compressing its
+arrival times, which keeps its burst structure and address stream. Every probe
+point is one ordinary harness run; completions come from the input/output
+request logs as everywhere else (``sim_harness.load_request_latencies``).
+Latency is measured from each request's arrival cycle in the replayed pattern
+rather than from the cycle the controller accepted it. Otherwise the queueing
+in front of a back-pressured input port never shows up, and a saturated
+controller would look idle.
+
+The idle latency is measured at a very low rate. The knee is the lowest rate
+whose latency exceeds ``--knee-multiple`` times the idle latency, or where
+requests stop completing within the cycle cap. A first round sweeps the whole
+rate range; each following round probes ``--jobs`` rates inside the bracket
+around the knee in parallel, until the bracket is narrower than
+``--tolerance``. All probes together form the curve, and the highest rate
+below the knee is reported as the sustainable bandwidth.
+"""
+import argparse
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sim_harness import load_request_latencies, replay_args, run_trace_simulation
+from trace_io import read_trace, write_trace
+
+# Completion ratio below which a probe counts as saturated regardless of its latency
+MIN_COMPLETION = 0.99
+
+
+def trace_pattern(trace_path, requests):
+    """First ``requests`` requests of a trace (0 keeps all of them)."""
+    arrays = read_trace(trace_path)
+    if requests:
+        arrays = {k: v[:requests] for k, v in arrays.items()}
+    return arrays
+
+
+def synthetic_pattern(requests, read_fraction=0.7, footprint=1 << 26, line=64, seed=0):
+    """Poisson arrivals at one request per cycle over uniformly random lines of a ``footprint``-byte region."""
+    rng = np.random.default_rng(seed)
+    return {
+        "addr": rng.integers(0, footprint // line, size=requests).astype(np.uint64) * np.uint64(line),
+        "is_write": rng.random(requests) >= read_fraction,
+        "cycle": np.cumsum(rng.exponential(1.0, size=requests)),
+    }
+
+
+def at_rate(pattern, rate):
+    """The pattern with arrival times scaled to an average of ``rate`` requests per cycle."""
+    cycle = np.asarray(pattern["cycle"], dtype=np.float64)
+    cycle = cycle - cycle[0]
+    native = (cycle.size - 1) / cycle[-1] if cycle[-1] > 0 else 1.0
+    return {**pattern, "cycle": np.round(cycle * (native / rate)).astype(np.int64)}
+
+
+def probe(sim_exe, pattern, rate, workdir, slack, margin):
+    """Replay ``pattern`` at ``rate`` and summarise its latency and achieved throughput."""
+    arrays = at_rate(pattern, rate)
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    trace = workdir / "trace.txt"
+    write_trace(trace, arrays["addr"], arrays["is_write"], arrays["cycle"])
+    cycles = int(arrays["cycle"][-1] * slack) + margin
+    run_trace_simulation(sim_exe, trace, cycles, workdir, replay_args("open"))
+    trace.unlink()
+
+    df = load_request_latencies(workdir)
+    # RequestIDs follow trace order in open-loop replay, so they index the arrival cycles
+    ids = df["RequestID"].to_numpy(dtype=np.int64)
+    df = df[(ids >= 0) & (ids < arrays["cycle"].size)]
+    arrival = arrays["cycle"][df["RequestID"].to_numpy(dtype=np.int64)]
+    lat = (df["Cycle_out"].to_numpy(dtype=np.int64) - arrival).astype(np.float64)
+    span = int(df["Cycle_out"].max() - arrival.min()) if len(df) else 0
+    return {
+        "offered_rate": rate,
+        "throughput": len(df) / span if span > 0 else 0.0,
+        "mean_latency": float(lat.mean()) if lat.size else np.nan,
+        "p50_latency": float(np.quantile(lat, 0.5)) if lat.size else np.nan,
+        "p99_latency": float(np.quantile(lat, 0.99)) if lat.size else np.nan,
+        "requests": int(arrays["cycle"].size),
+        "completed": int(len(df)),
+        "completion": len(df) / arrays["cycle"].size,
+    }
+
+
+def saturated(point, metric, threshold):
+    return point["completion"] < MIN_COMPLETION or not point[metric] <= threshold
+
+
+def find_knee(run, idle_rate, max_rate, points, jobs, tolerance, max_rounds, is_saturated, pool):
+    """Bracket the lowest saturated rate. ``run(rate)`` simulates one probe.
+
+    Returns (all probes, last unsaturated rate, first saturated rate or None).
+    """
+    curve = {}
+    lo, hi = idle_rate, None
+    rates = list(np.linspace(idle_rate, max_rate, points + 1)[1:])
+    for _ in range(max_rounds):
+        rates = [r for r in rates if r not in curve]
+        for rate, point in zip(rates, pool.map(run, rates)):
+            curve[rate] = point
+        above = [r for r in sorted(curve) if r > lo and (hi is None or r < hi)]
+        for r in above:
+            if is_saturated(curve[r]):
+                hi = r
+                break
+            lo = r
+        if hi is None or (hi - lo) <= tolerance * hi:
+            break
+        rates = list(np.linspace(lo, hi, jobs + 2)[1:-1])
+    return [curve[r] for r in sorted(curve)], lo, hi
+
+
+def plot_curves(results, metric, out_path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(7, 4.5))
+    for label, res in results.items():
+        curve = pd.DataFrame(res["curve"])
+        line, = ax.plot(curve["offered_rate"], curve[metric], marker="o", markersize=3, label=label)
+        ax.axhline(res["threshold"], color=line.get_color(), linestyle=":", linewidth=0.8)
+        if res["knee_rate"] is not None:
+            ax.axvline(res["knee_rate"], color=line.get_color(), linestyle="--", linewidth=0.8)
+    ax.set_xlabel("Offered load (requests/cycle)")
+    ax.set_ylabel(f"{metric.replace('_', ' ')} (cycles)")
+    ax.set_yscale("log")
+    ax.legend()
+    ax.grid(alpha=0.3)
+    fig.savefig(out_path, dpi=120, bbox_inches="tight")
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-latency curve and saturation knee of one or more simulator builds.")
+    parser.add_argument("--sim", nargs="+", required=True, help="Simulator builds, as PATH or LABEL=PATH.")
+    parser.add_argument("--trace", help="Trace whose address stream and burst structure are replayed (default: synthetic).")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per probe (0: whole trace).")
+    parser.add_argument("--read-fraction", type=float, default=0.7, help="Synthetic traffic: share of reads.")
+    parser.add_argument("--footprint", type=int, default=1 << 26, help="Synthetic traffic: address range in bytes.")
+    parser.add_argument("--idle-rate", type=float, default=0.001, help="Rate (requests/cycle) for the idle latency.")
+    parser.add_argument("--max-rate", type=float, default=1.0, help="Highest rate probed (one accept per cycle).")
+    parser.add_argument("--points", type=int, default=8, help="Probes of the first, full-range round.")
+    parser.add_argument("--knee-multiple", type=float, default=3.0, help="Knee: latency above this many idle latencies.")
+    parser.add_argument("--metric", choices=("mean_latency", "p50_latency", "p99_latency"), default="mean_latency")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Stop when the knee bracket is this narrow (relative).")
+    parser.add_argument("--max-rounds", type=int, default=6, help="Probe rounds per build.")
+    parser.add_argument("--cycle-slack", type=float, default=2.0, help="Cycle cap as a multiple of the probe's trace span.")
+    parser.add_argument("--cycle-margin", type=int, default=20000, help="Extra cycles added to every cap.")
+    parser.add_argument("--request-bytes", type=int, default=64, help="Bytes per request for the bandwidth figure.")
+    parser.add_argument("--workdir", default="load_latency_runs", help="Scratch directory for probe logs.")
+    parser.add_argument("--outdir", default="load_latency", help="Curves, summary and plot.")
+    parser.add_argument("--jobs", type=int, default=4, help="Probes simulated concurrently.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic traffic.")
+    parser.add_argument("--plot", action="store_true", help="Also write load_latency.png.")
+    args = parser.parse_args()
+
+    sims = {}
+    for spec in args.sim:
+        label, _, path = spec.rpartition("=")
+        path = Path(path).resolve()
+        if not path.exists():
+            print(f"❌ Simulator not found at {path}")
+            return
+        sims[label or path.parent.name] = path
+
+    if args.trace:
+        pattern = trace_pattern(args.trace, args.requests)
+        source = Path(args.trace).name
+    else:
+        pattern = synthetic_pattern(args.requests or 20000, args.read_fraction, args.footprint, seed=args.seed)
+        source = "synthetic"
+    if pattern["cycle"].size < 2:
+        print("❌ Need at least two requests to set an injection rate.")
+        return
+
+    out_dir = Path(args.outdir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workdir = Path(args.workdir)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for label, sim in sims.items():
+            # Numbered so close bisection probes (or a repeated rate) never share a workdir
+            def run(rate, label=label, sim=sim, counter=itertools.count()):
+                return probe(sim, pattern, rate, workdir / label / f"probe{next(counter):03d}_rate_{float(rate)!r}",
+                             args.cycle_slack, args.cycle_margin)
+
+            idle = run(args.idle_rate)
+            threshold = args.knee_multiple * idle[args.metric]
+            print(f"🧪 {label}: idle {args.metric.replace('_', ' ')} {idle[args.metric]:.1f} cycles, "
+                  f"knee above {threshold:.1f}")
+            curve, lo, hi = find_knee(run, args.idle_rate, args.max_rate, args.points, args.jobs, args.tolerance,
+                                      args.max_rounds, lambda p: saturated(p, args.metric, threshold), pool)
+            curve = [idle, *curve]
+            sustained = next(p for p in curve if p["offered_rate"] == lo)
+            results[label] = {
+                "sim": str(sim),
+                "idle_latency": idle[args.metric],
+                "threshold": threshold,
+                "knee_rate": hi,
+                "sustainable_rate": lo,
+                "sustainable_throughput": sustained["throughput"],
+                "sustainable_bytes_per_cycle": sustained["throughput"] * args.request_bytes,
+                "probes": len(curve),
+                "curve": curve,
+            }
+            pd.DataFrame(curve).to_csv(out_dir / f"{label}_curve.csv", index=False)
+            if hi is None:
+                print(f"✅ {label}: no knee up to {args.max_rate} requests/cycle")
+            else:
+                print(f"✅ {label}: knee between {lo:.4f} and {hi:.4f} requests/cycle, sustainable "
+                      f"{sustained['throughput'] * args.request_bytes:.2f} B/cycle ({len(curve)} probes)")
+
+    with open(out_dir / "summary.json", "w") as f:
+        json.dump({"source": source, "requests": int(pattern["cycle"].size), "metric": args.metric,
+                   "knee_multiple": args.knee_multiple, "configs": results}, f, indent=2)
+    if args.plot:
+        plot_curves(results, args.metric, out_dir / "load_latency.png")
+    print(f"👉 Curves and summary in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
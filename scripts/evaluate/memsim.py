@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""In-process driver for the Verilated MultiChannelSystem.
+
+Loads ``obj_lib/libmemsim.so`` (``make verilator-lib``), which wraps the same
+replay loop as ``sims/sim_trace.cpp``, and runs NumPy request arrays through it
+without spawning a process or writing a trace file. Each ``MemorySystem`` owns
+its own model; ctypes releases the GIL for the duration of ``run``, so models on
+different threads simulate concurrently.
+
+Build the library with ``statsMode: "off"`` in config.json when running several
+models at once, since the SV statistics modules all write to the same CWD.
+"""
+import argparse
+import ctypes
+import os
+from pathlib import Path
+
+import numpy as np
+
+from sim_harness import DEFAULT_MSHRS, REPLAY_MODES
+from trace_io import read_trace
+
+DEFAULT_LIB = Path("obj_lib/libmemsim.so")
+
+_u32p = np.ctypeslib.ndpointer(dtype=np.uint32, flags="C_CONTIGUOUS")
+_u8p = np.ctypeslib.ndpointer(dtype=np.uint8, flags="C_CONTIGUOUS")
+_u64p = np.ctypeslib.ndpointer(dtype=np.uint64, flags="C_CONTIGUOUS")
+_i64p = np.ctypeslib.ndpointer(dtype=np.int64, flags="C_CONTIGUOUS")
+
+_libs = {}
+
+
+def load_library(path=None):
+    """Load (once per path) and type the shared library."""
+    path = Path(path or os.environ.get("MEMSIM_LIB", DEFAULT_LIB)).resolve()
+    if path not in _libs:
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found; build it with `make verilator-lib`")
+        lib = ctypes.CDLL(str(path))
+        lib.memsim_create.argtypes = [ctypes.c_int, ctypes.c_size_t]
+        lib.memsim_create.restype = ctypes.c_void_p
+        lib.memsim_destroy.argtypes = [ctypes.c_void_p]
+        lib.memsim_destroy.restype = None
+        lib.memsim_cycle.argtypes = [ctypes.c_void_p]
+        lib.memsim_cycle.restype = ctypes.c_uint64
+        lib.memsim_mismatches.argtypes = [ctypes.c_void_p]
+        lib.memsim_mismatches.restype = ctypes.c_uint64
+        lib.memsim_run.argtypes = [ctypes.c_void_p, ctypes.c_size_t, _u32p, _u8p, _u64p, _u32p,
+                                   ctypes.c_uint64, _i64p, _i64p, _u32p]
+        lib.memsim_run.restype = ctypes.c_int
+        _libs[path] = lib
+    return _libs[path]
+
+
+def as_requests(requests):
+    """Normalise requests to (addr, is_write, cycle) arrays.
+
+    Accepts a dict/structured array with ``addr``, ``is_write`` (or ``op``) and
+    ``cycle`` fields, or an (N, 3) integer array of addr, op (1 = write), cycle.
+    """
+    if isinstance(requests, dict):
+        fields = requests.keys()
+    else:
+        fields = getattr(getattr(requests, "dtype", None), "names", None) or ()
+    if fields:
+        addr = np.asarray(requests["addr"])
+        is_write = np.asarray(requests["is_write" if "is_write" in fields else "op"])
+        cycle = np.asarray(requests["cycle"])
+    else:
+        arr = np.asarray(requests)
+        if arr.ndim != 2 or arr.shape[1] != 3:
+            raise ValueError("Expected an (N, 3) array of addr, op, cycle")
+        addr, is_write, cycle = arr[:, 0], arr[:, 1], arr[:, 2]
+    return (np.ascontiguousarray(addr, dtype=np.uint32),
+            np.ascontiguousarray(is_write != 0, dtype=np.uint8),
+            np.ascontiguousarray(cycle, dtype=np.uint64))
+
+
+class MemorySystem:
+    """One reset Verilated model. ``run`` may be called repeatedly; state carries over."""
+
+    def __init__(self, replay="open", mshrs=DEFAULT_MSHRS, lib=None):
+        if replay not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode '{replay}', expected one of {REPLAY_MODES}")
+        self._lib = load_library(lib)
+        self._handle = self._lib.memsim_create(int(replay == "closed"), mshrs)
+
+    def run(self, requests, max_cycles=10_000_000, wdata=None, seed=0):
+        """Simulate requests whose cycles are relative to the model's current cycle.
+
+        Returns a dict of per-request arrays: ``issue`` and ``complete`` (absolute
+        model cycles, -1 if never reached), ``latency`` (-1 if incomplete) and
+        ``data``, plus ``completed`` (bool) for the whole batch.
+        """
+        if self._handle is None:
+            raise RuntimeError("MemorySystem has been closed")
+        addr, is_write, cycle = as_requests(requests)
+        n = addr.size
+        if wdata is None:
+            wdata = np.random.default_rng(seed).integers(0, 1 << 31, n, dtype=np.uint32)
+        wdata = np.ascontiguousarray(np.where(is_write != 0, wdata, 0), dtype=np.uint32)
+
+        issue = np.empty(n, dtype=np.int64)
+        complete = np.empty(n, dtype=np.int64)
+        data = np.empty(n, dtype=np.uint32)
+        done = self._lib.memsim_run(self._handle, n, addr, is_write, cycle, wdata,
+                                    max_cycles, issue, complete, data)
+        latency = np.where((issue >= 0) & (complete >= 0), complete - issue, -1)
+        return {"issue": issue, "complete": complete, "latency": latency, "data": data,
+                "completed": bool(done)}
+
+    @property
+    def cycle(self):
+        return int(self._lib.memsim_cycle(self._handle))
+
+    @property
+    def mismatches(self):
+        """Data mismatches seen by the harness's read/write checks so far."""
+        return int(self._lib.memsim_mismatches(self._handle))
+
+    def close(self):
+        # __init__ may have failed before the handle existed; do not mask its error from __del__
+        if getattr(self, "_handle", None) is not None:
+            self._lib.memsim_destroy(self._handle)
+            self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a trace through the in-process simulator library.")
+    parser.add_argument("--trace", required=True, help="Trace file to simulate.")
+    parser.add_argument("--cycles", type=int, default=10_000_000, help="Cycle cap for the run.")
+    parser.add_argument("--lib", help="Path to libmemsim.so (default: $MEMSIM_LIB or obj_lib/libmemsim.so).")
+    parser.add_argument("--replay", choices=REPLAY_MODES, default="open")
+    parser.add_argument("--mshrs", type=int, default=DEFAULT_MSHRS)
+    args = parser.parse_args()
+
+    with MemorySystem(args.replay, args.mshrs, args.lib) as system:
+        result = system.run(read_trace(args.trace), args.cycles)
+        lat = result["latency"][result["latency"] >= 0]
+        print(f"{'✅' if result['completed'] else '⚠️ '} {lat.size} requests completed by cycle {system.cycle}")
+        if lat.size:
+            print(f"   mean latency {lat.mean():.1f}, p99 {np.quantile(lat, 0.99):.0f} cycles, "
+                  f"{system.mismatches} data mismatches")
+
+
+if __name__ == "__main__":
+    main()
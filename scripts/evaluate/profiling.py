@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Opt-in timing and resource instrumentation shared by the scripts.
+
+Set ``MEMCTRL_PROFILE=<dir>`` (``pipeline.py --profile DIR`` and ``make
+PROFILE=DIR`` do it for every stage they start) and each instrumented step
+appends one JSON line to ``<dir>/timeline.jsonl``:
+
+    {"stage": "simulate", "tags": {"experiment": "conv2d_trace"}, "script": ..., "pid": ...,
+     "start": <unix time>, "wall_s": ..., "cpu_user_s": ..., "cpu_sys_s": ...,
+     "peak_rss_mb": ..., "read_bytes": ..., "write_bytes": ..., "ok": true}
+
+CPU time covers the process and the children it waited for during the step
+(simulators, valgrind, make). Peak RSS is the process's or its largest child's
+high-water mark so far. Bytes are the Linux ``/proc/self/io`` read/write
+character counts, which include reaped children. A step that runs concurrently
+with others in the same process (thread pools) shares these counters with
+them; wall time is always its own. ``run()`` starts a command and gets its
+CPU time and peak RSS exactly from ``wait4``.
+
+With ``MEMCTRL_PROFILE_CPROFILE=1`` each step in the main thread is also run
+under cProfile and dumped to ``<dir>/cprofile/<stage>-<pid>-<n>.prof``.
+
+Without ``MEMCTRL_PROFILE`` every helper is a no-op. ``python profiling.py
+summary <dir>`` prints the per-stage (or per-experiment) table.
+"""
+import argparse
+import contextlib
+import cProfile
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ENV_DIR = "MEMCTRL_PROFILE"
+ENV_CPROFILE = "MEMCTRL_PROFILE_CPROFILE"
+TIMELINE = "timeline.jsonl"
+
+_counter = itertools.count()
+_write_lock = threading.Lock()
+
+
+def profile_dir():
+    """Directory profiling writes to, or None when it is disabled."""
+    value = os.environ.get(ENV_DIR)
+    return Path(value) if value else None
+
+
+def enable(directory, cprofile=False):
+    """Turn profiling on for this process and every process it starts."""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    os.environ[ENV_DIR] = str(Path(directory).resolve())
+    if cprofile:
+        os.environ[ENV_CPROFILE] = "1"
+
+
+def _io_counters():
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _snapshot():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "wall": time.perf_counter(),
+        "user": own.ru_utime + children.ru_utime,
+        "sys": own.ru_stime + children.ru_stime,
+        # ru_maxrss is in KiB on Linux
+        "rss_kb": max(own.ru_maxrss, children.ru_maxrss),
+        "io": _io_counters(),
+    }
+
+
+def _record(directory, name, tags, start_time, before, after, ok, extra=None):
+    entry = {
+        "stage": name,
+        "tags": tags,
+        "script": Path(sys.argv[0]).name,
+        "pid": os.getpid(),
+        "start": start_time,
+        "wall_s": round(after["wall"] - before["wall"], 6),
+        "cpu_user_s": round(after["user"] - before["user"], 6),
+        "cpu_sys_s": round(after["sys"] - before["sys"], 6),
+        "peak_rss_mb": round(after["rss_kb"] / 1024, 1),
+        "read_bytes": after["io"][0] - before["io"][0] if before["io"] and after["io"] else None,
+        "write_bytes": after["io"][1] - before["io"][1] if before["io"] and after["io"] else None,
+        "ok": ok,
+        **(extra or {}),
+    }
+    line = json.dumps(entry, default=str) + "\n"
+    directory.mkdir(parents=True, exist_ok=True)
+    # One O_APPEND write per line, so concurrent processes do not interleave
+    with _write_lock:
+        fd = os.open(directory / TIMELINE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+
+@contextlib.contextmanager
+def stage(name, **tags):
+    """Record wall/CPU time, peak RSS and I/O of the enclosed block as ``name``."""
+    directory = profile_dir()
+    if directory is None:
+        yield
+        return
+    profiler = None
+    if os.environ.get(ENV_CPROFILE) == "1" and threading.current_thread() is threading.main_thread() \
+            and sys.getprofile() is None:
+        profiler = cProfile.Profile()
+    start_time = time.time()
+    before = _snapshot()
+    ok = False
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+        ok = True
+    finally:
+        extra = None
+        if profiler:
+            profiler.disable()
+            dump = directory / "cprofile" / f"{name}-{os.getpid()}-{next(_counter)}.prof"
+            dump.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(dump)
+            extra = {"cprofile": str(dump)}
+        _record(directory, name, {k: str(v) for k, v in tags.items()}, start_time, before, _snapshot(), ok, extra)
+
+
+def run(cmd, name, tags=None, **popen_kwargs):
+    """``subprocess.run(cmd, **popen_kwargs)`` that records the command as stage ``name``.
+
+    CPU time and peak RSS come from ``wait4`` on the child, so they are exact even when
+    other stages run concurrently. Returns the exit code.
+    """
+    directory = profile_dir()
+    if directory is None:
+        return subprocess.run(cmd, **popen_kwargs).returncode
+    start_time = time.time()
+    before = _snapshot()
+    proc = subprocess.Popen(cmd, **popen_kwargs)
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    after = _snapshot()
+    child = {"wall": after["wall"], "user": usage.ru_utime, "sys": usage.ru_stime, "rss_kb": usage.ru_maxrss,
+             "io": after["io"]}
+    _record(directory, name, {k: str(v) for k, v in (tags or {}).items()}, start_time,
+            {**before, "user": 0.0, "sys": 0.0}, child, proc.returncode == 0)
+    return proc.returncode
+
+
+def load_timeline(directory):
+    """Every recorded step as a list of dicts."""
+    path = Path(directory) / TIMELINE
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(entries, by="stage"):
+    """Rows of totals per stage (or per ``by`` tag), sorted by total wall time."""
+    groups = {}
+    for e in entries:
+        key = e["stage"] if by == "stage" else e["tags"].get(by, "-")
+        g = groups.setdefault(key, {by: key, "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0,
+                                    "peak_rss_mb": 0.0, "read_mb": 0.0, "write_mb": 0.0, "failed": 0})
+        g["count"] += 1
+        g["wall_s"] += e["wall_s"]
+        g["cpu_s"] += e["cpu_user_s"] + e["cpu_sys_s"]
+        g["max_wall_s"] = max(g["max_wall_s"], e["wall_s"])
+        g["peak_rss_mb"] = max(g["peak_rss_mb"], e["peak_rss_mb"])
+        g["read_mb"] += (e["read_bytes"] or 0) / 1e6
+        g["write_mb"] += (e["write_bytes"] or 0) / 1e6
+        g["failed"] += not e["ok"]
+    return sorted(groups.values(), key=lambda g: -g["wall_s"])
+
+
+def format_table(rows):
+    if not rows:
+        return "(no profiled steps)"
+    columns = list(rows[0])
+    cells = [[f"{r[c]:.2f}" if isinstance(r[c], float) else str(r[c]) for c in columns] for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) if i == 0 else c.rjust(w) for i, (c, w) in enumerate(zip(columns, widths)))]
+    for row in cells:
+        lines.append("  ".join(v.ljust(w) if i == 0 else v.rjust(w) for i, (v, w) in enumerate(zip(row, widths))))
+    return "\n".join(lines)
+
+
+def write_summary(directory, by="stage"):
+    """Write ``summary_<by>.csv`` next to the timeline and return the table as text."""
+    rows = summarize(load_timeline(directory), by)
+    if rows:
+        with open(Path(directory) / f"summary_{by}.csv", "w") as f:
+            f.write(",".join(rows[0]) + "\n")
+            for r in rows:
+                f.write(",".join(str(round(v, 4)) if isinstance(v, float) else str(v) for v in r.values()) + "\n")
+    return format_table(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a profiling timeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summary", help="Per-stage (or per-tag) totals of a timeline.")
+    p.add_argument("dir", help="Profiling directory (the MEMCTRL_PROFILE value).")
+    p.add_argument("--by", default="stage", help="Group by stage (default) or by a tag such as 'experiment'.")
+    args = parser.parse_args()
+
+    if not (Path(args.dir) / TIMELINE).exists():
+        print(f"❌ No {TIMELINE} in {args.dir}")
+        return
+    print(write_summary(args.dir, args.by))
+    print(f"👉 Table written to {Path(args.dir) / f'summary_{args.by}.csv'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Performance regression gate over the benchmark trace suite.
+
+Runs every benchmark trace through the Verilated simulator, summarises
+throughput and read/write latency quantiles, and compares them against a
+stored baseline JSON. A metric only counts as a regression when the whole
+bootstrap confidence interval of its relative change lies beyond the
+tolerance, so sampling noise on short runs does not fail the gate.
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from sim_harness import (add_replay_arguments, completion_counts, count_trace_requests, latency_summary,
+                         load_request_latencies, replay_args, run_trace_simulation)
+
+DEFAULT_BENCHMARKS = ["conv2d", "multihead_attention", "vector_similarity"]
+QUANTILES = (0.5, 0.9, 0.99)
+GRID_POINTS = 1001
+
+
+def sketch_latencies(latencies):
+    """Compact description of a latency sample: moments plus an inverse-CDF grid."""
+    lat = np.sort(np.asarray(latencies, dtype=np.float64))
+    if lat.size == 0:
+        return {"count": 0}
+    probs = np.linspace(0.0, 1.0, GRID_POINTS)
+    return {
+        "count": int(lat.size),
+        "mean": float(lat.mean()),
+        "std": float(lat.std(ddof=1)) if lat.size > 1 else 0.0,
+        "grid": np.quantile(lat, probs).tolist(),
+    }
+
+
+def sketch_throughput(counts, bin_cycles):
+    rates = np.asarray(counts, dtype=np.float64) / bin_cycles
+    if rates.size == 0:
+        return {"bins": 0}
+    return {
+        "bins": int(rates.size),
+        "mean": float(rates.mean()),
+        "std": float(rates.std(ddof=1)) if rates.size > 1 else 0.0,
+    }
+
+
+def profile_trace(sim_exe, trace_path, cycles, workdir, bin_cycles, extra_args=()):
+    """Simulate one trace and reduce its logs to the sketches stored in the baseline."""
+    run_trace_simulation(sim_exe, trace_path, cycles, workdir, extra_args)
+    df = load_request_latencies(workdir)
+
+    expected = count_trace_requests(trace_path)
+    if len(df) < expected:
+        print(f"⚠️  {trace_path.stem}: only {len(df)}/{expected} requests completed within {cycles} cycles")
+
+    return {
+        "summary": latency_summary(df, QUANTILES),
+        "read": sketch_latencies(df.loc[df["Read"] == 1, "Latency"]),
+        "write": sketch_latencies(df.loc[df["Write"] == 1, "Latency"]),
+        "throughput": sketch_throughput(completion_counts(df, bin_cycles), bin_cycles),
+    }
+
+
+def _bootstrap_stat(sketch, stat, rng, n_boot):
+    """Bootstrap distribution of a mean or quantile from a stored sketch.
+
+    Quantiles resample the order-statistic index (Binomial(n, q)), means use the
+    normal approximation; both only need the sketch, not the raw sample.
+    """
+    n = sketch["count"]
+    if stat == "mean":
+        return sketch["mean"] + rng.standard_normal(n_boot) * sketch["std"] / np.sqrt(n)
+    probs = np.linspace(0.0, 1.0, len(sketch["grid"]))
+    ranks = rng.binomial(n, stat, n_boot) / n
+    return np.interp(ranks, probs, sketch["grid"])
+
+
+def _bootstrap_throughput(sketch, rng, n_boot):
+    return sketch["mean"] + rng.standard_normal(n_boot) * sketch["std"] / np.sqrt(sketch["bins"])
+
+
+def compare_trace(name, current, baseline, threshold, confidence, n_boot, rng):
+    """Yield one row per metric: (trace, metric, base, cur, change, lo, hi, status)."""
+    alpha = (1.0 - confidence) / 2.0
+
+    def classify(base_boot, cur_boot, higher_is_better):
+        rel = cur_boot / np.where(base_boot == 0, np.nan, base_boot) - 1.0
+        rel = rel[np.isfinite(rel)]
+        if rel.size == 0:
+            return np.nan, np.nan, "skipped"
+        lo, hi = np.quantile(rel, [alpha, 1.0 - alpha])
+        worse_lo, worse_hi = (-hi, -lo) if higher_is_better else (lo, hi)
+        if worse_lo > threshold:
+            return lo, hi, "REGRESSION"
+        if worse_hi < -threshold:
+            return lo, hi, "improved"
+        return lo, hi, "ok"
+
+    for kind in ("read", "write"):
+        base_sk, cur_sk = baseline.get(kind, {}), current.get(kind, {})
+        if not base_sk.get("count") or not cur_sk.get("count"):
+            continue
+        for stat in ("mean", *QUANTILES):
+            label = f"{kind}_mean" if stat == "mean" else f"{kind}_p{round(stat * 100)}"
+            base_val = base_sk["mean"] if stat == "mean" else float(np.interp(stat, np.linspace(0, 1, GRID_POINTS), base_sk["grid"]))
+            cur_val = cur_sk["mean"] if stat == "mean" else float(np.interp(stat, np.linspace(0, 1, GRID_POINTS), cur_sk["grid"]))
+            lo, hi, status = classify(_bootstrap_stat(base_sk, stat, rng, n_boot),
+                                      _bootstrap_stat(cur_sk, stat, rng, n_boot),
+                                      higher_is_better=False)
+            change = cur_val / base_val - 1.0 if base_val else np.nan
+            yield name, label, base_val, cur_val, change, lo, hi, status
+
+    base_tp, cur_tp = baseline.get("throughput", {}), current.get("throughput", {})
+    if base_tp.get("bins") and cur_tp.get("bins"):
+        lo, hi, status = classify(_bootstrap_throughput(base_tp, rng, n_boot),
+                                  _bootstrap_throughput(cur_tp, rng, n_boot),
+                                  higher_is_better=True)
+        change = cur_tp["mean"] / base_tp["mean"] - 1.0 if base_tp["mean"] else np.nan
+        yield name, "throughput", base_tp["mean"], cur_tp["mean"], change, lo, hi, status
+
+
+def format_report(rows, threshold, confidence):
+    header = f"{'trace':<28} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>9} {'CI':>21}  status"
+    lines = [f"Regression report (tolerance {threshold:.1%}, {confidence:.0%} CI)", header, "-" * len(header)]
+    for name, metric, base, cur, change, lo, hi, status in rows:
+        ci = f"[{lo:+.1%}, {hi:+.1%}]" if np.isfinite(lo) else "n/a"
+        marker = {"REGRESSION": "❌", "improved": "⬆️ ", "ok": "✅"}.get(status, "⚠️ ")
+        lines.append(f"{name:<28} {metric:<12} {base:>12.4f} {cur:>12.4f} {change:>+9.1%} {ci:>21}  {marker} {status}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when benchmark traces regress against a stored baseline.")
+    parser.add_argument("--sim", required=True, help="Path to the simulator executable.")
+    parser.add_argument("--traces", required=True, help="Directory containing <name>_trace.txt files.")
+    parser.add_argument("--baseline", required=True, help="Baseline JSON to compare against (or write).")
+    parser.add_argument("--cycles", required=True, type=int, help="Number of cycles to run for each trace.")
+    parser.add_argument("--benchmarks", nargs="+", default=DEFAULT_BENCHMARKS,
+                        help="Benchmark names to gate on (default: %(default)s).")
+    parser.add_argument("--workdir", default="regression_runs", help="Scratch directory for simulator logs.")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.05, help="Relative tolerance before a change counts (default 5%%).")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Bootstrap confidence level (default 0.95).")
+    parser.add_argument("--bootstrap", type=int, default=2000, help="Bootstrap resamples per metric.")
+    parser.add_argument("--bin-cycles", type=int, default=1000, help="Window size for throughput samples.")
+    parser.add_argument("--jobs", type=int, default=1, help="Traces to simulate concurrently.")
+    parser.add_argument("--report", help="Optionally also write the report to this file.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the bootstrap RNG.")
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+    replay = {"mode": args.replay, "mshrs": args.mshrs if args.replay == "closed" else None}
+
+    sim_exe = Path(args.sim).resolve()
+    traces_dir = Path(args.traces).resolve()
+    baseline_path = Path(args.baseline)
+    workdir = Path(args.workdir).resolve()
+
+    if not sim_exe.exists():
+        print(f"❌ Simulator not found at {sim_exe}")
+        sys.exit(2)
+
+    traces = {}
+    for name in args.benchmarks:
+        trace = traces_dir / f"{name}_trace.txt"
+        if not trace.exists():
+            trace = trace.with_suffix(".mtrace")
+        if not trace.exists():
+            print(f"❌ Trace file not found at {trace}")
+            sys.exit(2)
+        traces[trace.stem] = trace
+
+    print(f"🧪 Profiling {len(traces)} traces for {args.cycles} cycles...")
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {name: pool.submit(profile_trace, sim_exe, trace, args.cycles, workdir / name, args.bin_cycles,
+                                     replay_args(args.replay, args.mshrs))
+                   for name, trace in traces.items()}
+        results = {name: fut.result() for name, fut in futures.items()}
+
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump({"cycles": args.cycles, "bin_cycles": args.bin_cycles, "replay": replay, "traces": results}, f, indent=2)
+        print(f"✅ Wrote baseline for {len(results)} traces to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"❌ Baseline not found at {baseline_path}; run with --update-baseline first")
+        sys.exit(2)
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    if baseline.get("cycles") != args.cycles:
+        print(f"⚠️  Baseline was recorded with {baseline.get('cycles')} cycles, comparing against {args.cycles}")
+    if baseline.get("replay", {"mode": "open", "mshrs": None}) != replay:
+        print(f"⚠️  Baseline was recorded with replay {baseline.get('replay')}, comparing against {replay}")
+
+    rng = np.random.default_rng(args.seed)
+    rows = []
+    for name, current in results.items():
+        if name not in baseline["traces"]:
+            print(f"❌ {name} has no baseline entry; run with --update-baseline")
+            sys.exit(2)
+        rows.extend(compare_trace(name, current, baseline["traces"][name],
+                                  args.threshold, args.confidence, args.bootstrap, rng))
+
+    report = format_report(rows, args.threshold, args.confidence)
+    print(report)
+    if args.report:
+        Path(args.report).write_text(report + "\n")
+
+    regressions = [r for r in rows if r[-1] == "REGRESSION"]
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed beyond {args.threshold:.1%}")
+        sys.exit(1)
+    print("\n✅ No performance regressions detected")
+
+
+if __name__ == "__main__":
+    main()
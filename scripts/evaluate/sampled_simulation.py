@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""SimPoint-style sampled simulation of long traces.
+
+The trace is cut into fixed-size windows of requests, each window is reduced
+to a feature vector (arrival rate, write mix, bank spread, row locality,
+footprint), and the windows are clustered with k-means (k picked by BIC as in
+SimPoint). Only a few representative windows per cluster are simulated, each
+with a warm-up prefix whose requests are discarded, and their latency
+statistics are combined with the cluster weights into a whole-trace estimate
+with stratified-sampling error bars.
+
+With ``--checkpoints`` each window's warm-up is simulated once and kept as a
+snapshot (see ``checkpoints.py``), so reruns with the same binary and trace
+continue from the warm state instead of replaying the warm-up.
+"""
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from address_map import AddressMapping
+from checkpoints import run_warm
+from sim_harness import add_replay_arguments, load_request_latencies, replay_args, run_trace_simulation
+from trace_io import iter_trace_chunks, write_trace
+
+QUANTILES = (0.5, 0.9, 0.99)
+Z_95 = 1.959964
+
+
+def iter_windows(trace_path, window):
+    """Yield (index, first_line, arrays) for consecutive windows of ``window`` requests."""
+    pending = None
+    index = line = 0
+    for chunk in iter_trace_chunks(trace_path):
+        if pending is not None:
+            chunk = {k: np.concatenate([pending[k], chunk[k]]) for k in chunk}
+        n = len(chunk["cycle"])
+        full = n // window * window
+        for start in range(0, full, window):
+            yield index, line, {k: v[start:start + window] for k, v in chunk.items()}
+            index += 1
+            line += window
+        pending = {k: v[full:] for k, v in chunk.items()}
+    if pending is not None and len(pending["cycle"]):
+        yield index, line, pending
+
+
+def window_features(arrays, mapping):
+    """Feature vector describing one window's arrival rate and address behaviour."""
+    addr, cycle = arrays["addr"], arrays["cycle"]
+    n = len(cycle)
+    span = max(int(cycle[-1] - cycle[0]), 1)
+    banks = mapping.flat_bank(addr)
+    rows = mapping.decode(addr)["row"]
+
+    # Row locality: how often a request hits the same row as the previous request to its bank
+    order = np.argsort(banks, kind="stable")
+    same_bank = banks[order][1:] == banks[order][:-1]
+    same_row = same_bank & (rows[order][1:] == rows[order][:-1])
+    row_locality = same_row.sum() / max(same_bank.sum(), 1)
+
+    bank_hist = np.bincount(banks, minlength=mapping.total_banks)[:mapping.total_banks] / n
+    footprint = np.unique(addr >> np.uint64(6)).size / n
+    strides = np.abs(np.diff(addr.astype(np.int64)))
+    sequential = (strides <= 64).mean() if n > 1 else 0.0
+
+    return np.concatenate([
+        [np.log1p(n / span), arrays["is_write"].mean(), row_locality, footprint, sequential],
+        bank_hist,
+    ])
+
+
+def _kmeans(x, k, rng, iters=100):
+    """Lloyd's algorithm with k-means++ seeding. Returns (labels, centroids, sse)."""
+    centroids = [x[rng.integers(len(x))]]
+    for _ in range(1, k):
+        d2 = np.min([((x - c) ** 2).sum(axis=1) for c in centroids], axis=0)
+        total = d2.sum()
+        centroids.append(x[rng.choice(len(x), p=d2 / total)] if total > 0 else x[rng.integers(len(x))])
+    centroids = np.array(centroids)
+
+    labels = np.zeros(len(x), dtype=np.int64)
+    sq_norms = (x ** 2).sum(axis=1)[:, None]
+    for it in range(iters):
+        dist = sq_norms - 2.0 * x @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+        new_labels = dist.argmin(axis=1)
+        if it and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = x[labels == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+    sse = float(((x - centroids[labels]) ** 2).sum())
+    return labels, centroids, sse
+
+
+def _bic(x, labels, k, sse):
+    """Bayesian information criterion of a k-means clustering (Pelleg & Moore, as used by SimPoint)."""
+    r, m = x.shape
+    if r <= k:
+        return -np.inf
+    variance = max(sse / (m * (r - k)), 1e-12)
+    sizes = np.bincount(labels, minlength=k)
+    sizes = sizes[sizes > 0]
+    loglik = np.sum(sizes * np.log(sizes) - sizes * np.log(r)
+                    - sizes * m / 2.0 * np.log(2 * np.pi * variance) - (sizes - k) / 2.0)
+    params = (k - 1) + m * k + 1
+    return loglik - params / 2.0 * np.log(r)
+
+
+def cluster_windows(features, max_k, seed, bic_fraction=0.9):
+    """Cluster windows, choosing the smallest k whose BIC reaches ``bic_fraction`` of the best."""
+    scale = features.std(axis=0)
+    x = (features - features.mean(axis=0)) / np.where(scale > 0, scale, 1.0)
+    rng = np.random.default_rng(seed)
+
+    candidates = []
+    for k in range(1, min(max_k, len(x)) + 1):
+        labels, centroids, sse = _kmeans(x, k, rng)
+        candidates.append((k, labels, centroids, _bic(x, labels, k, sse)))
+
+    scores = np.array([c[3] for c in candidates])
+    finite = scores[np.isfinite(scores)]
+    if finite.size == 0:
+        k, labels, centroids, _ = candidates[0]
+        return x, labels, centroids
+    lo, hi = finite.min(), finite.max()
+    for k, labels, centroids, score in candidates:
+        if np.isfinite(score) and score >= lo + bic_fraction * (hi - lo):
+            return x, labels, centroids
+    return x, candidates[-1][1], candidates[-1][2]
+
+
+def pick_representatives(x, labels, centroids, extra_per_cluster, rng):
+    """Per cluster: the window closest to the centroid, plus random members for variance estimates."""
+    chosen = {}
+    for c in range(len(centroids)):
+        members = np.flatnonzero(labels == c)
+        if members.size == 0:
+            continue
+        closest = members[((x[members] - centroids[c]) ** 2).sum(axis=1).argmin()]
+        others = members[members != closest]
+        extra = rng.choice(others, size=min(extra_per_cluster, others.size), replace=False)
+        chosen[c] = [int(closest), *map(int, extra)]
+    return chosen
+
+
+def extract_windows(trace_path, ranges, out_dir):
+    """Write each (first_line, warmup_start, end) range to its own rebased trace file.
+
+    Returns (path, trace span, rebased cycle of the first measured request) per window.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    parts = {w: [] for w in ranges}
+    last = max(hi for _, _, hi in ranges.values())
+    offset = 0
+    for chunk in iter_trace_chunks(trace_path):
+        n = len(chunk["cycle"])
+        for w, (_, lo, hi) in ranges.items():
+            a, b = max(lo - offset, 0), min(hi - offset, n)
+            if a < b:
+                parts[w].append({k: v[a:b] for k, v in chunk.items()})
+        offset += n
+        if offset >= last:
+            break
+
+    paths = {}
+    for w, chunks in parts.items():
+        arrays = {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+        path = out_dir / f"window_{w}.txt"
+        write_trace(path, arrays["addr"], arrays["is_write"], arrays["cycle"] - arrays["cycle"][0])
+        first, lo, _ = ranges[w]
+        paths[w] = (path, int(arrays["cycle"][-1] - arrays["cycle"][0]),
+                    int(arrays["cycle"][first - lo] - arrays["cycle"][0]))
+    return paths
+
+
+def simulate_window(sim_exe, trace_path, span, warmup, expected, workdir, slack, margin, extra_args=(),
+                    warm_cycle=None, checkpoint_dir=None):
+    """Simulate one window trace and return its post-warm-up latency statistics."""
+    cycles = int(span * slack) + margin
+    if checkpoint_dir and warm_cycle:
+        run_warm(sim_exe, trace_path, cycles, workdir, warm_cycle, extra_args, checkpoint_dir)
+    else:
+        run_trace_simulation(sim_exe, trace_path, cycles, workdir, extra_args)
+    df = load_request_latencies(workdir)
+    df = df[df["RequestID"] >= warmup]
+
+    if len(df) < expected:
+        print(f"⚠️  {trace_path.stem}: only {len(df)}/{expected} measured requests completed within {cycles} cycles")
+
+    stats = {"completed": int(len(df)), "expected": int(expected)}
+    for kind in ("Read", "Write"):
+        lat = df.loc[df[kind] == 1, "Latency"].to_numpy(dtype=np.float64)
+        key = kind.lower()
+        stats[f"{key}_latencies"] = lat
+        stats[f"{key}_mean"] = float(lat.mean()) if lat.size else np.nan
+        for q in QUANTILES:
+            stats[f"{key}_p{round(q * 100)}"] = float(np.quantile(lat, q)) if lat.size else np.nan
+    # Rates do not average across windows of different length; cycles per request does
+    span_out = (df["Cycle_out"].max() - df["Cycle_in"].min()) if len(df) else 0
+    stats["cycles_per_request"] = float(span_out / len(df)) if span_out > 0 else np.nan
+    return stats
+
+
+def _weighted_quantile(samples, weights, q):
+    values = np.concatenate(samples)
+    if values.size == 0:
+        return np.nan
+    w = np.concatenate([np.full(s.size, wt / s.size) for s, wt in zip(samples, weights) if s.size])
+    order = np.argsort(values)
+    cdf = np.cumsum(w[order])
+    return float(values[order][np.searchsorted(cdf, q * cdf[-1])])
+
+
+def combine(results, chosen, weights):
+    """Stratified estimate (value, 95% half-width) of every metric across clusters.
+
+    Each cluster contributes the mean over its simulated windows, weighted by its
+    share of the trace. The variance is the stratified-sampling variance
+    sum(w_c^2 s_c^2 / n_c); clusters with a single simulated window borrow the
+    pooled relative variance of the other clusters. Quantiles are read off the
+    weighted mixture of window latency distributions instead of averaged, and
+    throughput is the inverse of the combined cycles per request.
+    """
+    metrics = [k for k in next(iter(results.values())) if not k.endswith("_latencies") and k not in ("completed", "expected")]
+    estimate = {}
+    for metric in metrics:
+        means, variances, ws = [], [], []
+        for c, windows in chosen.items():
+            vals = np.array([results[w][metric] for w in windows], dtype=np.float64)
+            vals = vals[np.isfinite(vals)]
+            if vals.size == 0:
+                continue
+            means.append(vals.mean())
+            variances.append(vals.var(ddof=1) / vals.size if vals.size > 1 else np.nan)
+            ws.append(weights[c])
+        if not ws:
+            estimate[metric] = {"value": None, "ci95": None}
+            continue
+        means, variances, ws = np.array(means), np.array(variances), np.array(ws)
+        ws = ws / ws.sum()
+        known = np.isfinite(variances) & (means != 0)
+        rel = np.mean(variances[known] / means[known] ** 2) if known.any() else 0.0
+        variances = np.where(np.isfinite(variances), variances, rel * means ** 2)
+        value = float((ws * means).sum())
+        half = float(Z_95 * np.sqrt((ws ** 2 * variances).sum()))
+        estimate[metric] = {"value": value, "ci95": half}
+
+    cpr = estimate.get("cycles_per_request", {})
+    if cpr.get("value"):
+        # Delta method for 1 / cycles_per_request
+        estimate["throughput"] = {"value": 1.0 / cpr["value"], "ci95": cpr["ci95"] / cpr["value"] ** 2}
+
+    for kind in ("read", "write"):
+        samples, ws = [], []
+        for c, windows in chosen.items():
+            for w in windows:
+                samples.append(results[w][f"{kind}_latencies"])
+                ws.append(weights[c] / len(windows))
+        for q in QUANTILES:
+            key = f"{kind}_p{round(q * 100)}"
+            if key in estimate and samples:
+                estimate[key]["value"] = _weighted_quantile(samples, ws, q)
+    return estimate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate whole-trace latency/throughput by simulating representative windows.")
+    parser.add_argument("--sim", required=True, help="Path to the simulator executable.")
+    parser.add_argument("--trace", required=True, help="Trace file to sample.")
+    parser.add_argument("--window", type=int, default=10000, help="Requests per window.")
+    parser.add_argument("--warmup", type=int, default=2000, help="Requests simulated before each window and discarded.")
+    parser.add_argument("--max-k", type=int, default=10, help="Largest number of clusters to consider.")
+    parser.add_argument("--extra-per-cluster", type=int, default=1,
+                        help="Random windows simulated per cluster in addition to the centroid (for error bars).")
+    parser.add_argument("--cycle-slack", type=float, default=4.0,
+                        help="Cycle cap per window as a multiple of its trace span.")
+    parser.add_argument("--cycle-margin", type=int, default=20000, help="Extra cycles added to each window's cap.")
+    parser.add_argument("--config", default=str(Path("src/main/config/config.json")),
+                        help="config.json whose channel/rank/bank counts define the address mapping.")
+    parser.add_argument("--workdir", default="sampled_runs", help="Scratch directory for window traces and logs.")
+    parser.add_argument("--jobs", type=int, default=4, help="Windows to simulate concurrently.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for clustering and representative selection.")
+    parser.add_argument("--out", help="Write the estimate and clustering as JSON to this file.")
+    parser.add_argument("--checkpoints", metavar="DIR",
+                        help="Cache warm-up snapshots here and continue windows from them (savable build).")
+    add_replay_arguments(parser)
+    args = parser.parse_args()
+
+    sim_exe = Path(args.sim).resolve()
+    trace_path = Path(args.trace).resolve()
+    workdir = Path(args.workdir).resolve()
+    if not sim_exe.exists():
+        print(f"❌ Simulator not found at {sim_exe}")
+        return
+    if not trace_path.exists():
+        print(f"❌ Trace file not found at {trace_path}")
+        return
+
+    mapping = AddressMapping.from_config(args.config)
+
+    print(f"📊 Extracting window features from {trace_path.name}...")
+    starts, sizes, features = [], [], []
+    for _, line, arrays in iter_windows(trace_path, args.window):
+        starts.append(line)
+        sizes.append(len(arrays["cycle"]))
+        features.append(window_features(arrays, mapping))
+    if not features:
+        print("❌ Trace is empty.")
+        return
+    features = np.vstack(features)
+    sizes = np.array(sizes)
+    total_requests = int(sizes.sum())
+
+    x, labels, centroids = cluster_windows(features, args.max_k, args.seed)
+    rng = np.random.default_rng(args.seed)
+    chosen = pick_representatives(x, labels, centroids, args.extra_per_cluster, rng)
+    weights = {c: float(sizes[labels == c].sum() / total_requests) for c in chosen}
+
+    ranges = {}
+    for windows in chosen.values():
+        for w in windows:
+            first = starts[w]
+            ranges[w] = (first, max(first - args.warmup, 0), first + int(sizes[w]))
+    simulated = sum(hi - lo for _, lo, hi in ranges.values())
+    print(f"🧩 {len(starts)} windows -> {len(chosen)} clusters, simulating {len(ranges)} windows "
+          f"({simulated}/{total_requests} requests, {simulated / total_requests:.1%})")
+
+    paths = extract_windows(trace_path, ranges, workdir / "traces")
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {
+            w: pool.submit(simulate_window, sim_exe, paths[w][0], paths[w][1], first - lo, hi - first,
+                           workdir / f"window_{w}", args.cycle_slack, args.cycle_margin,
+                           replay_args(args.replay, args.mshrs), paths[w][2], args.checkpoints)
+            for w, (first, lo, hi) in ranges.items()
+        }
+        results = {w: fut.result() for w, fut in futures.items()}
+
+    estimate = combine(results, chosen, weights)
+
+    print(f"\nWhole-trace estimate for {trace_path.name} ({total_requests} requests, ±95% CI)")
+    for metric, e in estimate.items():
+        if e["value"] is None:
+            continue
+        ci = f" ± {e['ci95']:.3f}" if e["ci95"] is not None else ""
+        print(f"  {metric:<20} {e['value']:>12.3f}{ci}")
+
+    if args.out:
+        record = {
+            "trace": str(trace_path),
+            "total_requests": total_requests,
+            "window": args.window,
+            "warmup": args.warmup,
+            "windows": len(starts),
+            "clusters": {str(c): {"weight": weights[c], "windows": ws} for c, ws in chosen.items()},
+            "simulated_requests": simulated,
+            "estimate": estimate,
+            "per_window": {str(w): {k: v for k, v in r.items() if not k.endswith("_latencies")}
+                           for w, r in results.items()},
+        }
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(record, f, indent=2, default=float)
+        print(f"✅ Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Shared helpers for driving the Verilated trace harness and reading back its request logs."""
+import subprocess
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from decode_stats import decode_directory
+from trace_store import TraceReader, is_store_trace, simulator_trace
+
+INPUT_LOG = "input_request_stats.csv"
+OUTPUT_LOG = "output_request_stats.csv"
+
+REPLAY_MODES = ("open", "closed")
+DEFAULT_MSHRS = 16
+
+
+def add_replay_arguments(parser):
+    """Add the --replay/--mshrs options shared by every runner."""
+    parser.add_argument("--replay", choices=REPLAY_MODES, default="open",
+                        help="open: issue at trace cycles; closed: limit outstanding requests to --mshrs.")
+    parser.add_argument("--mshrs", type=int, default=DEFAULT_MSHRS,
+                        help="Outstanding-request window for --replay closed (default %(default)s).")
+
+
+def replay_args(mode="open", mshrs=DEFAULT_MSHRS):
+    """Harness flags for the given replay mode."""
+    if mode not in REPLAY_MODES:
+        raise ValueError(f"Unknown replay mode '{mode}', expected one of {REPLAY_MODES}")
+    if mode == "closed":
+        return ["-m", "closed", "-w", str(mshrs)]
+    return ["-m", "open"]
+
+
+def run_trace_simulation(sim_exe, trace_path, cycles, workdir, extra_args=(), stdout=subprocess.DEVNULL):
+    """Run the simulator on one trace with ``workdir`` as its CWD.
+
+    The SV statistics modules open their CSVs relative to the CWD, so every run
+    gets its own directory and runs never clobber each other's logs. Binary
+    statistics (``statsMode: "binary"``) are decoded to CSV afterwards, and
+    compressed ``.mtrace`` traces are decoded to a temporary text trace first.
+    Returns the wall-clock seconds spent inside the simulator.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    with simulator_trace(trace_path, workdir) as text_trace:
+        cmd = [str(Path(sim_exe).resolve()), "-t", str(Path(text_trace).resolve()), "-c", str(cycles)]
+        cmd += [str(a) for a in extra_args]
+
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=workdir, check=True, stdout=stdout)
+        elapsed = time.perf_counter() - start
+    decode_directory(workdir)
+    return elapsed
+
+
+def count_trace_requests(trace_path):
+    if is_store_trace(trace_path):
+        return len(TraceReader(trace_path))
+    with open(trace_path, "r") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def _read_request_log(path):
+    df = pd.read_csv(path, skipinitialspace=True)
+    for col in ("RequestID", "Cycle", "Address"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna(subset=["RequestID", "Cycle"])
+    df["RequestID"] = df["RequestID"].astype(np.int64)
+    df["Cycle"] = df["Cycle"].astype(np.int64)
+    return df
+
+
+def load_request_latencies(csv_dir):
+    """Join input/output request logs into one row per completed request.
+
+    Returns a DataFrame with RequestID, Address, Read, Write, Cycle_in, Cycle_out and Latency.
+    Duplicate output rows (one per channel monitor) keep their earliest cycle.
+    """
+    csv_dir = Path(csv_dir)
+    df_in = _read_request_log(csv_dir / INPUT_LOG)
+    df_out = _read_request_log(csv_dir / OUTPUT_LOG)
+
+    df_in = df_in.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+    df_out = df_out.sort_values("Cycle").drop_duplicates("RequestID", keep="first")
+
+    merged = pd.merge(
+        df_in[["RequestID", "Address", "Read", "Write", "Cycle"]],
+        df_out[["RequestID", "Address", "Cycle"]],
+        on="RequestID", suffixes=("_in", "_out")
+    )
+    merged = merged[merged["Address_in"] == merged["Address_out"]]
+    merged = merged.rename(columns={"Address_in": "Address"}).drop(columns=["Address_out"])
+    merged["Latency"] = merged["Cycle_out"] - merged["Cycle_in"]
+    return merged.sort_values("RequestID").reset_index(drop=True)
+
+
+def completion_counts(latency_df, bin_cycles):
+    """Completed requests per ``bin_cycles`` window, spanning first arrival to last completion."""
+    if latency_df.empty:
+        return np.zeros(0, dtype=np.int64)
+    start = latency_df["Cycle_in"].min()
+    bins = ((latency_df["Cycle_out"] - start) // bin_cycles).to_numpy()
+    return np.bincount(bins.astype(np.int64))
+
+
+def latency_summary(latency_df, quantiles=(0.5, 0.9, 0.99)):
+    """Mean/quantile latency per request type plus overall throughput (requests/cycle)."""
+    summary = {"completed": int(len(latency_df))}
+    for kind in ("Read", "Write"):
+        lat = latency_df.loc[latency_df[kind] == 1, "Latency"].to_numpy()
+        key = kind.lower()
+        summary[f"{key}_count"] = int(lat.size)
+        summary[f"{key}_mean"] = float(lat.mean()) if lat.size else None
+        for q in quantiles:
+            summary[f"{key}_p{round(q * 100)}"] = float(np.quantile(lat, q)) if lat.size else None
+
+    if len(latency_df):
+        span = latency_df["Cycle_out"].max() - latency_df["Cycle_in"].min()
+        summary["throughput"] = float(len(latency_df) / span) if span > 0 else 0.0
+    else:
+        summary["throughput"] = 0.0
+    return summary
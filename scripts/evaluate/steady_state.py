@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Steady-state detection and early termination of harness runs.
+
+While the simulator runs, the system input/output request logs are tailed as
+they grow (text or binary records; only complete lines/records are consumed).
+Completions are binned into windows of ``window`` cycles, and each window gives
+a mean latency, a p99 latency and a throughput. The warm-up windows are cut
+with MSER (the truncation point that minimises the standard error of the
+remaining window means). The rest are treated as batch means: adjacent windows
+are merged until the lag-1 autocorrelation is small, and a Student-t interval
+is put around each metric.
+
+Once every metric's half-width is within ``tolerance`` of its value, the
+simulator is stopped. The stopping point and the intervals are written to
+``steady_state.json``, so a shortened run records how precise its numbers are.
+"""
+import argparse
+import io
+import json
+import subprocess
+import time
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from decode_stats import decode_directory, record_dtype
+from sim_harness import add_replay_arguments, replay_args
+from trace_store import simulator_trace
+
+INPUT_STEM = "input_request_stats"
+OUTPUT_STEM = "output_request_stats"
+STEADY_FILE = "steady_state.json"
+METRICS = ("mean_latency", "p99_latency", "throughput")
+# Batches are merged until their lag-1 autocorrelation drops below this
+MAX_AUTOCORRELATION = 0.2
+
+
+class LogTail:
+    """Incremental (RequestID, Cycle) reader of a stats log that is still being written."""
+
+    def __init__(self, run_dir, stem):
+        self.run_dir = Path(run_dir)
+        self.stem = stem
+        self.path = None
+        self.offset = 0
+        self.rest = b""
+        self.columns = None
+
+    def _resolve(self):
+        for suffix in (".csv", ".bin"):
+            path = self.run_dir / f"{self.stem}{suffix}"
+            if path.exists():
+                self.path = path
+                return True
+        return False
+
+    def read(self):
+        """RequestIDs and cycles of the records completed since the last call."""
+        empty = np.zeros(0, dtype=np.int64)
+        if self.path is None and not self._resolve():
+            return empty, empty
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        data = self.rest + data
+
+        if self.path.suffix == ".bin":
+            dtype = record_dtype(self.path)
+            end = len(data) // dtype.itemsize * dtype.itemsize
+            self.rest = data[end:]
+            records = np.frombuffer(data[:end], dtype=dtype)
+            return records["request_id"].astype(np.int64), records["cycle"].astype(np.int64)
+
+        end = data.rfind(b"\n") + 1
+        self.rest = data[end:]
+        data = data[:end]
+        if self.columns is None:
+            if not data:
+                return empty, empty
+            header, _, data = data.partition(b"\n")
+            names = [c.strip() for c in header.decode().split(",")]
+            self.columns = [names.index("RequestID"), names.index("Cycle")]
+        if not data:
+            return empty, empty
+        df = pd.read_csv(io.BytesIO(data), header=None, usecols=self.columns, skipinitialspace=True)
+        df = df.apply(pd.to_numeric, errors="coerce").dropna()
+        ids, cycles = df[self.columns[0]], df[self.columns[1]]
+        return ids.to_numpy(dtype=np.int64), cycles.to_numpy(dtype=np.int64)
+
+
+def t_quantile(p, dof):
+    """Student-t quantile (Cornish-Fisher expansion around the normal; ample for dof >= 4)."""
+    z = NormalDist().inv_cdf(p)
+    return z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+
+
+def mser_truncation(x):
+    """Number of leading values to drop (MSER): minimises var(x[d:]) / (n - d) over d <= n / 2."""
+    x = x[np.isfinite(x)]
+    n = x.size
+    if n < 4:
+        return 0
+    scores = [x[d:].var() / (n - d) for d in range(n // 2 + 1)]
+    return int(np.argmin(scores))
+
+
+def _lag1(x):
+    if x.size < 3 or x.std() == 0:
+        return 0.0
+    return float(np.corrcoef(x[:-1], x[1:])[0, 1])
+
+
+class SteadyStateMonitor:
+    """Tails a run directory's request logs and decides when the statistics have converged."""
+
+    def __init__(self, run_dir, window=2000, tolerance=0.02, confidence=0.95, min_windows=10, metrics=METRICS):
+        self.inputs = LogTail(run_dir, INPUT_STEM)
+        self.outputs = LogTail(run_dir, OUTPUT_STEM)
+        self.window = window
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.min_windows = min_windows
+        self.metrics = metrics
+        self.issue = np.zeros(0, dtype=np.int64)  # Accept cycle by RequestID, -1 until logged
+        self.done = np.zeros(0, dtype=bool)
+        self.unmatched = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.out_cycles = []
+        self.latencies = []
+        self.last_cycle = 0
+
+    def _grow(self, size):
+        if size > self.issue.size:
+            extra = max(size, 2 * self.issue.size) - self.issue.size
+            self.issue = np.concatenate([self.issue, np.full(extra, -1, dtype=np.int64)])
+            self.done = np.concatenate([self.done, np.zeros(extra, dtype=bool)])
+
+    def update(self):
+        """Consume newly written log records."""
+        ids, cycles = self.inputs.read()
+        if ids.size:
+            self._grow(int(ids.max()) + 1)
+            first = self.issue[ids] < 0
+            self.issue[ids[first]] = cycles[first]
+
+        ids, cycles = self.outputs.read()
+        ids = np.concatenate([self.unmatched[0], ids])
+        cycles = np.concatenate([self.unmatched[1], cycles])
+        if ids.size:
+            self.last_cycle = max(self.last_cycle, int(cycles.max()))
+            self._grow(int(ids.max()) + 1)
+            # The input log is flushed independently, so an output can show up before its input
+            known = self.issue[ids] >= 0
+            self.unmatched = (ids[~known], cycles[~known])
+            ids, cycles = ids[known], cycles[known]
+            # Several monitors may log the same response; keep the first
+            _, first = np.unique(ids, return_index=True)
+            fresh = first[~self.done[ids[first]]]
+            self.done[ids[fresh]] = True
+            self.out_cycles.append(cycles[fresh])
+            self.latencies.append(cycles[fresh] - self.issue[ids[fresh]])
+
+    def _series(self, batch):
+        """Per-batch metrics over the finished windows, each batch ``batch`` windows long."""
+        cycles = np.concatenate(self.out_cycles) if self.out_cycles else np.zeros(0, dtype=np.int64)
+        latency = np.concatenate(self.latencies) if self.latencies else np.zeros(0, dtype=np.int64)
+        # A window is finished once the log has moved past it and no unmatched completion may still land in it
+        horizon = min([self.last_cycle, *self.unmatched[1].tolist()]) // self.window
+        windows = cycles // self.window
+        if not windows.size:
+            return {}, 0
+        start = int(windows.min())
+        idx = (windows - start) // batch
+        n = (horizon - start) // batch
+        if n <= 0:
+            return {}, start
+        keep = idx < n
+        idx, latency = idx[keep], latency[keep].astype(np.float64)
+        order = np.argsort(idx, kind="stable")
+        counts = np.bincount(idx, minlength=n)
+        groups = np.split(latency[order], np.cumsum(counts)[:-1])
+        series = {
+            "mean_latency": np.array([g.mean() if g.size else np.nan for g in groups]),
+            "p99_latency": np.array([np.quantile(g, 0.99) if g.size else np.nan for g in groups]),
+            "throughput": counts / (batch * self.window),
+        }
+        return series, start
+
+    def status(self):
+        """Interval estimates over the post-warm-up batches and whether they meet the tolerance."""
+        series, start = self._series(1)
+        status = {"converged": False, "windows": 0, "last_cycle": self.last_cycle,
+                  "completed": int(sum(c.size for c in self.out_cycles))}
+        if not series:
+            return status
+        warmup = mser_truncation(series["mean_latency"])
+        batch = 1
+        while True:
+            trimmed = {m: v[warmup // batch:] for m, v in series.items()}
+            correlated = max(abs(_lag1(trimmed[m][np.isfinite(trimmed[m])])) for m in self.metrics)
+            if correlated <= MAX_AUTOCORRELATION or len(trimmed["throughput"]) < 4 * self.min_windows:
+                break
+            batch *= 2
+            series, _ = self._series(batch)
+
+        estimates = {}
+        converged = len(trimmed["throughput"]) >= self.min_windows
+        for m in self.metrics:
+            x = trimmed[m][np.isfinite(trimmed[m])]
+            if x.size < 2:
+                converged = False
+                continue
+            half = t_quantile(0.5 + self.confidence / 2, x.size - 1) * x.std(ddof=1) / np.sqrt(x.size)
+            mean = float(x.mean())
+            relative = half / abs(mean) if mean else np.inf
+            estimates[m] = {"mean": mean, "half_width": float(half), "relative": float(relative)}
+            converged &= relative <= self.tolerance
+        status.update({
+            "converged": bool(converged),
+            "windows": int(len(trimmed["throughput"])),
+            "warmup_windows": int(warmup),
+            "batch_windows": int(batch),
+            "measured_from_cycle": int((start + warmup) * self.window),
+            "metrics": estimates,
+        })
+        return status
+
+
+def _trim_partial(run_dir):
+    """Cut the half-written last record a killed simulator leaves in its logs."""
+    for path in Path(run_dir).glob("*.csv"):
+        with open(path, "rb+") as f:
+            data = f.read()
+            f.truncate(data.rfind(b"\n") + 1)
+    for path in Path(run_dir).glob("*.bin"):
+        try:
+            size = record_dtype(path).itemsize
+        except ValueError:
+            continue
+        with open(path, "rb+") as f:
+            f.truncate(path.stat().st_size // size * size)
+
+
+def run_until_steady(sim_exe, trace_path, cycles, workdir, extra_args=(), window=2000, tolerance=0.02,
+                     confidence=0.95, min_windows=10, poll=0.5, record=None, stdout=subprocess.DEVNULL):
+    """Run the harness like ``run_trace_simulation`` but stop it once the statistics converge.
+
+    Returns the final status (see ``SteadyStateMonitor.status``), also written to ``record``
+    (default ``<workdir>/steady_state.json``). Binary logs are left for ``decode_directory``.
+    """
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    # Logs of an earlier run in the same directory would be tailed as if they were new
+    for stem in (INPUT_STEM, OUTPUT_STEM):
+        for suffix in (".csv", ".bin"):
+            (workdir / f"{stem}{suffix}").unlink(missing_ok=True)
+
+    monitor = SteadyStateMonitor(workdir, window, tolerance, confidence, min_windows)
+    cmd = [str(Path(sim_exe).resolve()), "-t", str(Path(trace_path).resolve()), "-c", str(cycles),
+           *[str(a) for a in extra_args]]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=workdir, stdout=stdout)
+    status = {"converged": False}
+    stopped = False
+    while proc.poll() is None:
+        time.sleep(poll)
+        monitor.update()
+        status = monitor.status()
+        if status["converged"]:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            stopped = True
+            break
+    elapsed = time.perf_counter() - start
+    if not stopped:
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+        monitor.update()
+        status = monitor.status()
+    _trim_partial(workdir)
+
+    status.update({"stopped_early": stopped, "cycle_cap": int(cycles), "elapsed_seconds": elapsed,
+                   "window": window, "tolerance": tolerance, "confidence": confidence})
+    with open(record or workdir / STEADY_FILE, "w") as f:
+        json.dump(status, f, indent=2)
+    return status
+
+
+def add_steady_state_arguments(parser):
+    """Add the --steady-state options shared by the runners."""
+    parser.add_argument("--steady-state", action="store_true",
+                        help="Stop each run once latency/throughput converge instead of running to --cycles.")
+    parser.add_argument("--steady-window", type=int, default=2000, help="Cycles per statistics window.")
+    parser.add_argument("--steady-tolerance", type=float, default=0.02,
+                        help="Stop when every confidence half-width is within this fraction of its estimate.")
+    parser.add_argument("--steady-confidence", type=float, default=0.95, help="Confidence level of the intervals.")
+    parser.add_argument("--steady-min-windows", type=int, default=10, help="Post-warm-up windows needed to stop.")
+
+
+def steady_settings(args):
+    """``run_until_steady`` keyword arguments from parsed options, or None when disabled."""
+    if not args.steady_state:
+        return None
+    return {"window": args.steady_window, "tolerance": args.steady_tolerance,
+            "confidence": args.steady_confidence, "min_windows": args.steady_min_windows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one trace until its statistics reach steady state.")
+    parser.add_argument("--sim", required=True, help="Path to the simulator executable.")
+    parser.add_argument("--trace", required=True, help="Trace file (.txt or .mtrace).")
+    parser.add_argument("--cycles", type=int, required=True, help="Cycle cap if the run never converges.")
+    parser.add_argument("--workdir", default="steady_runs", help="Run directory for the logs.")
+    add_replay_arguments(parser)
+    add_steady_state_arguments(parser)
+    args = parser.parse_args()
+    args.steady_state = True
+
+    # simulator_trace decompresses .mtrace/store inputs into the workdir
+    Path(args.workdir).mkdir(parents=True, exist_ok=True)
+    with simulator_trace(args.trace, args.workdir) as text_trace:
+        status = run_until_steady(args.sim, text_trace, args.cycles, args.workdir,
+                                  replay_args(args.replay, args.mshrs), **steady_settings(args))
+    decode_directory(args.workdir)
+
+    if status["stopped_early"]:
+        print(f"✅ Converged at cycle {status['last_cycle']} of {args.cycles} "
+              f"({status['windows']} windows after {status['warmup_windows']} warm-up)")
+    else:
+        print(f"⚠️  Ran to completion without converging within ±{args.steady_tolerance:.1%}")
+    for m, e in status.get("metrics", {}).items():
+        print(f"  {m:<14} {e['mean']:>10.4g} ± {e['half_width']:.3g} ({e['relative']:.1%})")
+    print(f"👉 Logs and {STEADY_FILE} in {args.workdir}")
+
+
+if __name__ == "__main__":
+    main()
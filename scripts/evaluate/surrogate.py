@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Surrogate performance model trained on finished experiments.
+
+Every experiment directory under the given roots (anything with a
+``trace_ref.json``: ``exp_*``, ``hardware_config_*``, distributed sweep
+results) becomes one training row:
+
+* trace features of the part of the trace the run covered: arrival rate,
+  inter-arrival variability and burstiness, write share, footprint, sequential
+  share, and, under the config's ``AddressDecoder`` layout, row-hit share and
+  bank spread;
+* config fields (``config.json`` next to the experiment, the overrides in a
+  sweep's ``job.json``, or the queue size in a ``hardware_config_<N>`` name on
+  top of ``--config``) and a few products of config and trace features;
+* targets: mean and p99 latency (overall, reads, writes) and throughput.
+
+Each target is fitted in log space by ridge regression on standardized
+features, with the penalty picked by k-fold cross-validation. Prediction
+intervals are split-conformal: the interval half-width is a quantile of the
+absolute cross-validated residuals, so its coverage holds for new configs drawn
+like the training ones. With too few rows for the requested coverage the
+interval is unbounded, and nothing is ruled out on its basis.
+
+``design_search.py --surrogate`` uses the model to drop configs that another
+config confidently beats (see ``ruled_out``).
+"""
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from address_map import DEFAULT_CONFIG, AddressMapping
+from sim_harness import latency_summary, load_request_latencies
+from trace_io import iter_trace_chunks
+from trace_store import REF_FILE, load_reference
+
+TARGETS = ("mean_latency", "p99_latency", "read_mean", "read_p99", "write_mean", "write_p99", "throughput")
+# Objectives ruled_out() compares
+SCREENING_TARGETS = ("mean_latency", "throughput")
+LAMBDAS = (1e-3, 1e-2, 1e-1, 1.0, 10.0, 100.0)
+LINE_BYTES = 64
+MAX_TRACE_REQUESTS = 1_000_000
+QUEUE_SIZE_RE = re.compile(r"^hardware_config_.*?(\d+)$")
+
+
+def load_trace_window(trace_path, max_requests=MAX_TRACE_REQUESTS, until_cycle=None):
+    """Leading requests of a trace (at most ``max_requests``, none after ``until_cycle``)."""
+    parts, count = [], 0
+    for chunk in iter_trace_chunks(trace_path):
+        if until_cycle is not None:
+            chunk = {k: v[chunk["cycle"] <= until_cycle] for k, v in chunk.items()}
+        take = min(chunk["cycle"].size, max_requests - count)
+        parts.append({k: v[:take] for k, v in chunk.items()})
+        count += take
+        if count >= max_requests or take < chunk["cycle"].size or (until_cycle is not None and not take):
+            break
+    if not parts:
+        return {"addr": np.zeros(0, np.uint64), "is_write": np.zeros(0, bool), "cycle": np.zeros(0, np.int64)}
+    return {k: np.concatenate([p[k] for p in parts]) for k in ("addr", "is_write", "cycle")}
+
+
+def trace_features(arrays, mapping):
+    """Engineered features of a request window under ``mapping``."""
+    addr, cycle = arrays["addr"], arrays["cycle"]
+    n = cycle.size
+    if n < 2:
+        raise ValueError("Need at least two requests for trace features")
+    gaps = np.diff(cycle).astype(np.float64)
+    span = max(float(cycle[-1] - cycle[0]), 1.0)
+    lines = addr // np.uint64(LINE_BYTES)
+    bank = mapping.flat_bank(addr)
+    row = mapping.decode(addr)["row"]
+    order = np.argsort(bank, kind="stable")
+    same_bank = bank[order][1:] == bank[order][:-1]
+    row_hits = (row[order][1:] == row[order][:-1]) & same_bank
+    share = np.bincount(bank, minlength=mapping.total_banks) / n
+    nz = share[share > 0]
+    return {
+        "log_rate": math.log(n / span),
+        "write_frac": float(np.mean(arrays["is_write"])),
+        "gap_cv": float(gaps.std() / gaps.mean()) if gaps.mean() > 0 else 0.0,
+        "burst_frac": float(np.mean(gaps == 0)),
+        "log_footprint": math.log2(np.unique(lines).size),
+        "seq_frac": float(np.mean(np.diff(lines.astype(np.int64)) == 1)),
+        "row_hit": float(row_hits.sum() / max(same_bank.sum(), 1)),
+        "bank_entropy": float(-(nz * np.log(nz)).sum() / math.log(mapping.total_banks))
+        if mapping.total_banks > 1 else 1.0,
+    }
+
+
+def config_features(cfg, tf):
+    """Config fields plus their products with the trace features."""
+    banks = cfg["numChannels"] * cfg["numRanks"] * cfg["numBanks"]
+    open_page = 1.0 if cfg["bankSchedulerPolicy"] == "OPEN_PAGE" else 0.0
+    log_queue = math.log2(cfg["queueSize"])
+    log_load = tf["log_rate"] - math.log(banks * max(tf["bank_entropy"], 1e-3))
+    return {
+        **tf,
+        "log_queue": log_queue,
+        "channels": float(cfg["numChannels"]),
+        "ranks": float(cfg["numRanks"]),
+        "log_banks": math.log2(cfg["numBanks"]),
+        "open_page": open_page,
+        "log_load_per_bank": log_load,
+        "load_x_queue": log_load * log_queue,
+        "open_x_row_hit": open_page * tf["row_hit"],
+        "load_x_write": log_load * tf["write_frac"],
+        "load_sq": log_load ** 2,
+    }
+
+
+def experiment_config(exp_dir, default_config=DEFAULT_CONFIG):
+    """Full config.json of an experiment, recovered from what its runner left behind."""
+    exp_dir = Path(exp_dir)
+    with open(default_config) as f:
+        cfg = json.load(f)
+    if (exp_dir / "config.json").exists():
+        with open(exp_dir / "config.json") as f:
+            return {**cfg, **json.load(f)}
+    if (exp_dir / "job.json").exists():
+        with open(exp_dir / "job.json") as f:
+            return {**cfg, **json.load(f).get("config", {})}
+    m = QUEUE_SIZE_RE.match(exp_dir.name)
+    if m:
+        cfg["queueSize"] = int(m.group(1))
+    return cfg
+
+
+def mapping_for(cfg):
+    return AddressMapping(cfg["numChannels"], cfg["numRanks"], cfg["numBanks"])
+
+
+def experiment_row(exp_dir, default_config=DEFAULT_CONFIG):
+    """Features and targets of one finished experiment, or None if it has no usable logs/trace."""
+    exp_dir = Path(exp_dir)
+    run_dir = exp_dir / "meta" if (exp_dir / "meta").is_dir() else exp_dir
+    ref = load_reference(exp_dir)
+    if not ref or not Path(ref["store_path"]).exists():
+        return None
+    try:
+        lat = load_request_latencies(run_dir)
+    except (FileNotFoundError, KeyError):
+        return None
+    if lat.empty:
+        return None
+    summary = latency_summary(lat)
+    cfg = experiment_config(exp_dir, default_config)
+    arrays = load_trace_window(ref["store_path"], until_cycle=int(lat["Cycle_in"].max()))
+    try:
+        features = config_features(cfg, trace_features(arrays, mapping_for(cfg)))
+    except ValueError:
+        return None
+    values = lat["Latency"].to_numpy(dtype=np.float64)
+    targets = {
+        "mean_latency": values.mean(),
+        "p99_latency": np.quantile(values, 0.99),
+        "read_mean": summary["read_mean"],
+        "read_p99": summary["read_p99"],
+        "write_mean": summary["write_mean"],
+        "write_p99": summary["write_p99"],
+        "throughput": summary["throughput"],
+    }
+    return {"experiment": str(exp_dir), "trace": ref["name"], **features,
+            **{t: (np.nan if v is None else float(v)) for t, v in targets.items()}}
+
+
+def collect(roots, default_config=DEFAULT_CONFIG):
+    """Training table over every experiment under ``roots``."""
+    rows = []
+    for root in roots:
+        for ref in sorted(Path(root).rglob(REF_FILE)):
+            row = experiment_row(ref.parent, default_config)
+            if row is not None:
+                rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _ridge(X, y, lam):
+    """Coefficients and intercept of ridge regression on already standardized X."""
+    mean = y.mean()
+    A = X.T @ X + lam * np.eye(X.shape[1])
+    return np.linalg.solve(A, X.T @ (y - mean)), mean
+
+
+def _folds(n, k, seed=0):
+    return np.array_split(np.random.default_rng(seed).permutation(n), min(k, n))
+
+
+class RidgeSurrogate:
+    """Per-target ridge regression in log space with split-conformal intervals."""
+
+    def __init__(self, features, folds=5):
+        self.features = list(features)
+        self.folds = folds
+        self.center = self.scale = None
+        self.models = {}
+
+    def fit(self, df, targets=TARGETS):
+        X = df[self.features].to_numpy(dtype=np.float64)
+        self.center = X.mean(axis=0)
+        self.scale = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        Z = (X - self.center) / self.scale
+        for target in targets:
+            y = np.log(df[target].to_numpy(dtype=np.float64))
+            ok = np.isfinite(y)
+            if ok.sum() < 3:
+                continue
+            Zt, yt = Z[ok], y[ok]
+            best = None
+            for lam in LAMBDAS:
+                residuals = np.empty(yt.size)
+                for fold in _folds(yt.size, self.folds):
+                    train = np.setdiff1d(np.arange(yt.size), fold)
+                    w, b = _ridge(Zt[train], yt[train], lam)
+                    residuals[fold] = yt[fold] - (Zt[fold] @ w + b)
+                score = float(np.mean(residuals ** 2))
+                if best is None or score < best[0]:
+                    best = (score, lam, np.abs(residuals))
+            w, b = _ridge(Zt, yt, best[1])
+            self.models[target] = {"coef": w.tolist(), "intercept": float(b), "lambda": best[1],
+                                   "cv_rmse_log": math.sqrt(best[0]), "residuals": sorted(best[2].tolist()),
+                                   "rows": int(yt.size)}
+        return self
+
+    def half_width(self, target, coverage):
+        """Conformal half-width in log space; inf when the residuals cannot back ``coverage``."""
+        residuals = self.models[target]["residuals"]
+        k = math.ceil((len(residuals) + 1) * coverage)
+        return residuals[k - 1] if k <= len(residuals) else math.inf
+
+    def predict(self, df, coverage=0.9):
+        """DataFrame with ``<target>``, ``<target>_lo`` and ``<target>_hi`` per fitted target."""
+        Z = (df[self.features].to_numpy(dtype=np.float64) - self.center) / self.scale
+        out = {}
+        for target, m in self.models.items():
+            log_pred = Z @ np.asarray(m["coef"]) + m["intercept"]
+            h = self.half_width(target, coverage)
+            out[target] = np.exp(log_pred)
+            with np.errstate(over="ignore"):
+                out[f"{target}_lo"] = np.exp(log_pred - h)
+                out[f"{target}_hi"] = np.exp(log_pred + h)
+        return pd.DataFrame(out, index=df.index)
+
+    def to_json(self):
+        return {"features": self.features, "folds": self.folds, "center": self.center.tolist(),
+                "scale": self.scale.tolist(), "models": self.models}
+
+    @classmethod
+    def from_json(cls, data):
+        model = cls(data["features"], data["folds"])
+        model.center = np.asarray(data["center"])
+        model.scale = np.asarray(data["scale"])
+        model.models = data["models"]
+        return model
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+
+def config_table(trace_path, configs, max_requests=MAX_TRACE_REQUESTS):
+    """Feature rows for running each config on ``trace_path`` (trace read once, features per layout)."""
+    arrays = load_trace_window(trace_path, max_requests)
+    per_layout = {}
+    rows = []
+    for cfg in configs:
+        layout = (cfg["numChannels"], cfg["numRanks"], cfg["numBanks"])
+        if layout not in per_layout:
+            per_layout[layout] = trace_features(arrays, mapping_for(cfg))
+        rows.append(config_features(cfg, per_layout[layout]))
+    return pd.DataFrame(rows)
+
+
+def ruled_out(pred, tolerance=0.02):
+    """Configs another config confidently beats on latency or throughput without losing on the other.
+
+    "Confidently" means the intervals do not overlap (the rival's pessimistic bound beats this
+    config's optimistic one). On the other objective the rival's prediction may be worse by at most
+    ``tolerance`` (relative); in open-loop runs throughput is set by the trace and all configs tie.
+    Nothing is ruled out when the model lacks either objective (too few training rows for it).
+    """
+    if any(t not in pred.columns for t in SCREENING_TARGETS):
+        return np.zeros(len(pred), dtype=bool)
+    lat, lat_lo, lat_hi = (pred[c].to_numpy() for c in ("mean_latency", "mean_latency_lo", "mean_latency_hi"))
+    thr, thr_lo, thr_hi = (pred[c].to_numpy() for c in ("throughput", "throughput_lo", "throughput_hi"))
+    # [i, j]: config j beats config i
+    faster = lat_hi[None, :] < lat_lo[:, None]
+    higher = thr_lo[None, :] > thr_hi[:, None]
+    no_slower = lat[None, :] <= lat[:, None] * (1 + tolerance)
+    no_lower = thr[None, :] >= thr[:, None] * (1 - tolerance)
+    return ((faster & no_lower) | (higher & no_slower)).any(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or query the surrogate performance model.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("train", help="Fit the model on every experiment under the given roots.")
+    p.add_argument("roots", nargs="+", help="Experiment roots (searched recursively for trace_ref.json).")
+    p.add_argument("--config", default=str(DEFAULT_CONFIG), help="Base config.json for experiments without one.")
+    p.add_argument("--out", default="surrogate.json", help="Model file.")
+    p.add_argument("--table", help="Also write the training table as CSV.")
+    p.add_argument("--folds", type=int, default=5, help="Cross-validation folds.")
+    p = sub.add_parser("predict", help="Predict a trace under one or more configs.")
+    p.add_argument("--model", default="surrogate.json", help="Model file.")
+    p.add_argument("--trace", required=True, help="Trace to predict for.")
+    p.add_argument("--config", default=str(DEFAULT_CONFIG), help="Base config.json.")
+    p.add_argument("--queue-sizes", type=int, nargs="+", help="Predict each queue size (default: the config's).")
+    p.add_argument("--coverage", type=float, default=0.9, help="Prediction interval coverage.")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        table = collect(args.roots, args.config)
+        if len(table) < 3:
+            print(f"❌ Only {len(table)} usable experiments under {', '.join(args.roots)}; need at least 3.")
+            return
+        features = [c for c in table.columns if c not in ("experiment", "trace", *TARGETS)]
+        model = RidgeSurrogate(features, args.folds).fit(table)
+        model.save(args.out)
+        if args.table:
+            table.to_csv(args.table, index=False)
+        print(f"✅ Trained on {len(table)} experiments ({table['trace'].nunique()} traces)")
+        for target, m in model.models.items():
+            print(f"  {target:<13} ±{math.expm1(m['cv_rmse_log']):.1%} CV error, λ={m['lambda']:g}, {m['rows']} rows")
+        for target in (t for t in SCREENING_TARGETS if t not in model.models):
+            print(f"⚠️  Fewer than 3 finite {target} values: not modelled, so screening rules nothing out")
+        print(f"👉 Model written to {args.out}")
+        return
+
+    model = RidgeSurrogate.load(args.model)
+    with open(args.config) as f:
+        base = json.load(f)
+    configs = [{**base, "queueSize": q} for q in (args.queue_sizes or [base["queueSize"]])]
+    pred = model.predict(config_table(args.trace, configs), args.coverage)
+    pred.insert(0, "queueSize", [c["queueSize"] for c in configs])
+    print(pred.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Vectorized reading and writing of ``<hex addr> <READ|WRITE> <cycle>`` traces.
+
+Traces produced by ``parse_trace.py`` run to billions of lines, so they are
+read in fixed-size chunks of numpy arrays rather than line by line.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK = 1 << 20
+
+# ASCII byte -> hex nibble, everything else (including NUL padding) -> 0
+_NIBBLE = np.zeros(256, dtype=np.uint64)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _NIBBLE[_c] = _i
+for _i, _c in enumerate(b"ABCDEF"):
+    _NIBBLE[_c] = 10 + _i
+
+
+def parse_hex(values):
+    """Parse an array of hex strings (with or without ``0x``) into uint64 without a Python loop."""
+    raw = np.asarray(values, dtype="S")
+    if raw.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    raw = np.char.replace(np.char.replace(raw, b"0x", b""), b"0X", b"")
+    width = raw.dtype.itemsize
+    digits = raw.view(np.uint8).reshape(-1, width)
+    lengths = (digits != 0).sum(axis=1)
+    # Exponent of each digit position, negative for the NUL padding past the end
+    exponents = lengths[:, None] - 1 - np.arange(width)[None, :]
+    nibbles = _NIBBLE[digits]
+    shifted = np.where(exponents >= 0, nibbles << (4 * np.maximum(exponents, 0)).astype(np.uint64), 0)
+    return shifted.sum(axis=1, dtype=np.uint64)
+
+
+def _frame_to_arrays(df):
+    return {
+        "addr": parse_hex(df["addr"].to_numpy()),
+        "is_write": (df["op"].to_numpy() == "WRITE"),
+        "cycle": df["cycle"].to_numpy(dtype=np.int64),
+    }
+
+
+def iter_trace_chunks(path, chunk_size=DEFAULT_CHUNK):
+    """Yield dicts of ``addr`` (uint64), ``is_write`` (bool) and ``cycle`` (int64) arrays.
+
+    Compressed ``.mtrace`` traces (see ``trace_store``) are decoded block by block.
+    """
+    if str(path).endswith(".mtrace"):
+        from trace_store import TraceReader
+        yield from TraceReader(path).iter_chunks(chunk_size)
+        return
+    reader = pd.read_csv(path, sep=r"\s+", header=None, names=["addr", "op", "cycle"],
+                         dtype={"addr": str, "op": str, "cycle": np.int64},
+                         chunksize=chunk_size, engine="c")
+    for df in reader:
+        yield _frame_to_arrays(df)
+
+
+def read_trace(path):
+    """Whole trace as one dict of arrays (see ``iter_trace_chunks``)."""
+    chunks = list(iter_trace_chunks(path))
+    if not chunks:
+        return {"addr": np.zeros(0, np.uint64), "is_write": np.zeros(0, bool), "cycle": np.zeros(0, np.int64)}
+    return {k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]}
+
+
+def format_trace_lines(addr, is_write, cycle):
+    """List of trace lines in the ``parse_trace.py`` format."""
+    addr = np.asarray(addr, dtype=np.uint64)
+    ops = np.where(np.asarray(is_write, dtype=bool), "WRITE", "READ ")
+    lines = pd.Series([f"0x{a:X}" for a in addr.tolist()], dtype=object).str.ljust(10)
+    return (lines + " " + ops + " " + pd.Series(np.asarray(cycle, dtype=np.int64)).astype(str)).tolist()
+
+
+def write_trace(path, addr, is_write, cycle, append=False):
+    """Write arrays back out in the ``parse_trace.py`` line format (``append`` to stream chunks)."""
+    body = format_trace_lines(addr, is_write, cycle)
+    with open(path, "a" if append else "w") as f:
+        if body:
+            f.write("\n".join(body) + "\n")
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Compressed, seekable trace container (``.mtrace``) and a content-addressed trace store.
+
+Layout of an ``.mtrace`` file::
+
+    header   b"MTRC", version u8, codec u8, 2 pad bytes, block size u32
+    blocks   one compressed payload per block of ``block size`` requests:
+             byte-shuffled int64 address deltas, byte-shuffled int64 cycle
+             deltas, then the packed is_write bits
+    index    one record per block: offset, compressed length, count, first
+             address, first cycle, max cycle
+    footer   index offset u64, block count u64, request count u64,
+             sha256 of the requests (32 bytes), b"MTRC"
+
+Deltas are taken against the block's first request (stored in the index), so
+every block decodes on its own and ``seek`` can jump to any cycle by reading one
+block. The digest covers the decoded requests, not the encoding, so the same
+trace always gets the same hash whatever block size or codec packed it.
+
+Experiments reference traces by that hash (``trace_ref.json``) instead of
+keeping their own copy of the text trace.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import lzma
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"MTRC"
+VERSION = 1
+SUFFIX = ".mtrace"
+DEFAULT_BLOCK = 1 << 16
+DEFAULT_STORE = Path("trace_store")
+REF_FILE = "trace_ref.json"
+
+CODECS = {"zlib": 0, "lzma": 1}
+_HEADER = struct.Struct("<4sBB2xI")
+_FOOTER = struct.Struct("<QQQ32s4s")
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("count", "<u4"),
+                        ("first_addr", "<u8"), ("first_cycle", "<i8"), ("max_cycle", "<i8")])
+# Canonical record layout hashed for the trace digest
+_RECORD = np.dtype([("addr", "<u8"), ("cycle", "<i8"), ("is_write", "u1")])
+
+
+def _compress(codec, data, level):
+    if codec == "lzma":
+        return lzma.compress(data, preset=level if level is not None else 6)
+    return zlib.compress(data, level if level is not None else 6)
+
+
+def _decompress(codec, data):
+    return lzma.decompress(data) if codec == "lzma" else zlib.decompress(data)
+
+
+def _shuffle(values):
+    """Group the bytes of int64 values by significance so the (mostly zero) high bytes compress away."""
+    return np.ascontiguousarray(values.astype("<i8").view(np.uint8).reshape(-1, 8).T).tobytes()
+
+
+def _unshuffle(data, n):
+    return np.frombuffer(data, dtype=np.uint8).reshape(8, n).T.copy().view("<i8").ravel()
+
+
+def is_store_trace(path):
+    return Path(path).suffix == SUFFIX
+
+
+class TraceWriter:
+    """Append request arrays and ``close`` to write the index; usable as a context manager."""
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK, codec="zlib", level=None):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}', expected one of {tuple(CODECS)}")
+        self.path = Path(path)
+        self.block_size = block_size
+        self.codec = codec
+        self.level = level
+        self._f = open(self.path, "wb")
+        self._f.write(_HEADER.pack(MAGIC, VERSION, CODECS[codec], block_size))
+        self._index = []
+        self._pending = []
+        self._pending_n = 0
+        self._hash = hashlib.sha256()
+        self.count = 0
+        self.digest = None
+
+    def write(self, addr, is_write, cycle):
+        chunk = np.empty(len(addr), dtype=_RECORD)
+        chunk["addr"], chunk["cycle"], chunk["is_write"] = addr, cycle, is_write
+        self._pending.append(chunk)
+        self._pending_n += chunk.size
+        if self._pending_n >= self.block_size:
+            buf = np.concatenate(self._pending)
+            full = buf.size - buf.size % self.block_size
+            for start in range(0, full, self.block_size):
+                self._write_block(buf[start:start + self.block_size])
+            self._pending = [buf[full:]]
+            self._pending_n = buf.size - full
+
+    def _write_block(self, records):
+        self._hash.update(records.tobytes())
+        addr = records["addr"].astype(np.int64)
+        cycle = records["cycle"]
+        payload = (_shuffle(np.diff(addr, prepend=addr[0])) + _shuffle(np.diff(cycle, prepend=cycle[0]))
+                   + np.packbits(records["is_write"]).tobytes())
+        data = _compress(self.codec, payload, self.level)
+        self._index.append((self._f.tell(), len(data), records.size, records["addr"][0], cycle[0], cycle.max()))
+        self._f.write(data)
+        self.count += records.size
+
+    def close(self):
+        if self._f is None:
+            return
+        if self._pending_n:
+            self._write_block(np.concatenate(self._pending))
+        self._pending, self._pending_n = [], 0
+        index_offset = self._f.tell()
+        self._f.write(np.array(self._index, dtype=INDEX_DTYPE).tobytes())
+        self.digest = self._hash.hexdigest()
+        self._f.write(_FOOTER.pack(index_offset, len(self._index), self.count, bytes.fromhex(self.digest), MAGIC))
+        self._f.close()
+        self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """Random access to an ``.mtrace`` file: whole-trace streaming, block reads and cycle seeks."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, version, codec, self.block_size = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not an {SUFFIX} trace")
+            if version != VERSION:
+                raise ValueError(f"{self.path}: unsupported {SUFFIX} version {version}")
+            f.seek(-_FOOTER.size, os.SEEK_END)
+            index_offset, n_blocks, self.count, digest, end_magic = _FOOTER.unpack(f.read(_FOOTER.size))
+            if end_magic != MAGIC:
+                raise ValueError(f"{self.path} is truncated (missing footer)")
+            f.seek(index_offset)
+            self.index = np.frombuffer(f.read(n_blocks * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+        self.codec = {v: k for k, v in CODECS.items()}[codec]
+        self.digest = digest.hex()
+        # Running max so the cycle search stays valid for traces with out-of-order cycles
+        self._max_cycle = np.maximum.accumulate(self.index["max_cycle"]) if n_blocks else self.index["max_cycle"]
+
+    def __len__(self):
+        return int(self.count)
+
+    def read_block(self, i, f=None):
+        """Decode block ``i`` into ``addr``/``is_write``/``cycle`` arrays."""
+        entry = self.index[i]
+        n = int(entry["count"])
+        with contextlib.ExitStack() as stack:
+            if f is None:
+                f = stack.enter_context(open(self.path, "rb"))
+            f.seek(int(entry["offset"]))
+            payload = _decompress(self.codec, f.read(int(entry["length"])))
+        addr = (np.cumsum(_unshuffle(payload[:8 * n], n)) + np.int64(entry["first_addr"])).astype(np.uint64)
+        cycle = np.cumsum(_unshuffle(payload[8 * n:16 * n], n)) + entry["first_cycle"]
+        is_write = np.unpackbits(np.frombuffer(payload[16 * n:], dtype=np.uint8), count=n).astype(bool)
+        return {"addr": addr, "is_write": is_write, "cycle": cycle}
+
+    def seek(self, cycle):
+        """(block, offset within block) of the first request at or after ``cycle``."""
+        block = int(np.searchsorted(self._max_cycle, cycle, side="left"))
+        if block >= len(self.index):
+            return len(self.index), 0
+        cycles = self.read_block(block)["cycle"]
+        return block, int(np.searchsorted(cycles, cycle, side="left"))
+
+    def iter_chunks(self, chunk_size=DEFAULT_BLOCK, start_cycle=None, end_cycle=None):
+        """Yield dicts of arrays of about ``chunk_size`` requests, optionally limited to [start, end) cycles."""
+        block, offset = self.seek(start_cycle) if start_cycle is not None else (0, 0)
+        pending, pending_n = [], 0
+        with open(self.path, "rb") as f:
+            for i in range(block, len(self.index)):
+                if end_cycle is not None and self.index[i]["first_cycle"] >= end_cycle:
+                    break
+                chunk = self.read_block(i, f)
+                if i == block and offset:
+                    chunk = {k: v[offset:] for k, v in chunk.items()}
+                if end_cycle is not None:
+                    chunk = {k: v[chunk["cycle"] < end_cycle] for k, v in chunk.items()}
+                pending.append(chunk)
+                pending_n += chunk["addr"].size
+                if pending_n >= chunk_size:
+                    yield {k: np.concatenate([c[k] for c in pending]) for k in pending[0]}
+                    pending, pending_n = [], 0
+        if pending_n:
+            yield {k: np.concatenate([c[k] for c in pending]) for k in pending[0]}
+
+
+def pack_trace(src, dest, block_size=DEFAULT_BLOCK, codec="zlib", level=None):
+    """Convert a text (or another ``.mtrace``) trace into ``dest``; returns the digest."""
+    from trace_io import iter_trace_chunks
+    with TraceWriter(dest, block_size, codec, level) as writer:
+        for chunk in iter_trace_chunks(src):
+            writer.write(chunk["addr"], chunk["is_write"], chunk["cycle"])
+    return writer.digest
+
+
+def unpack_trace(src, dest):
+    """Write an ``.mtrace`` back out as a text trace."""
+    from trace_io import write_trace
+    open(dest, "w").close()
+    for chunk in TraceReader(src).iter_chunks(1 << 20):
+        write_trace(dest, chunk["addr"], chunk["is_write"], chunk["cycle"], append=True)
+
+
+def trace_digest(path):
+    """Content hash of any trace, matching the digest stored in ``.mtrace`` footers."""
+    if is_store_trace(path):
+        return TraceReader(path).digest
+    from trace_io import iter_trace_chunks
+    h = hashlib.sha256()
+    for chunk in iter_trace_chunks(path):
+        records = np.empty(chunk["addr"].size, dtype=_RECORD)
+        records["addr"], records["cycle"], records["is_write"] = chunk["addr"], chunk["cycle"], chunk["is_write"]
+        h.update(records.tobytes())
+    return h.hexdigest()
+
+
+def store_trace(path, store_dir=DEFAULT_STORE, codec="zlib"):
+    """Add a trace to the content-addressed store (once); returns (digest, stored path)."""
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    digest = trace_digest(path)
+    stored = store_dir / f"{digest}{SUFFIX}"
+    if not stored.exists():
+        # Unique temp name: concurrent runs may store the same trace at once
+        fd, tmp = tempfile.mkstemp(dir=store_dir, prefix=f"{digest}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            pack_trace(path, tmp, codec=codec)
+            os.replace(tmp, stored)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+    return digest, stored
+
+
+def reference_trace(trace_path, exp_dir, store_dir=DEFAULT_STORE, name=None):
+    """Record the experiment's trace as a store reference instead of copying it."""
+    digest, stored = store_trace(trace_path, store_dir)
+    ref = {
+        "name": name or Path(trace_path).name,
+        "sha256": digest,
+        "store_path": str(stored.resolve()),
+        "requests": len(TraceReader(stored)),
+    }
+    with open(Path(exp_dir) / REF_FILE, "w") as f:
+        json.dump(ref, f, indent=2)
+    return ref
+
+
+def load_reference(exp_dir):
+    """The experiment's ``trace_ref.json`` contents, or None."""
+    ref_path = Path(exp_dir) / REF_FILE
+    if not ref_path.exists():
+        return None
+    with open(ref_path) as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def simulator_trace(trace_path, workdir):
+    """Text trace path for the C++ harness, decoding ``.mtrace`` input to a temporary file in ``workdir``."""
+    if not is_store_trace(trace_path):
+        yield Path(trace_path)
+        return
+    text = Path(workdir) / f"{Path(trace_path).stem}.trace.tmp"
+    unpack_trace(trace_path, text)
+    try:
+        yield text
+    finally:
+        text.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack, unpack, inspect and store compressed traces.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pack", help="Compress a text trace into an .mtrace file.")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="Requests per block.")
+    p.add_argument("--codec", choices=tuple(CODECS), default="zlib")
+    p.add_argument("--level", type=int, help="Compression level / preset.")
+    p = sub.add_parser("unpack", help="Decode an .mtrace file back to text.")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p = sub.add_parser("info", help="Show an .mtrace file's size, blocks and digest.")
+    p.add_argument("src")
+    p = sub.add_parser("slice", help="Print the requests in [--start, --end) cycles as text.")
+    p.add_argument("src")
+    p.add_argument("--start", type=int)
+    p.add_argument("--end", type=int)
+    p = sub.add_parser("store", help="Add traces to the content-addressed store.")
+    p.add_argument("src", nargs="+")
+    p.add_argument("--store", default=str(DEFAULT_STORE))
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        digest = pack_trace(args.src, args.dest, args.block, args.codec, args.level)
+        ratio = os.path.getsize(args.src) / max(os.path.getsize(args.dest), 1)
+        print(f"✅ Packed {args.src} -> {args.dest} ({ratio:.1f}x smaller, sha256 {digest[:16]})")
+    elif args.command == "unpack":
+        unpack_trace(args.src, args.dest)
+        print(f"✅ Wrote {args.dest}")
+    elif args.command == "info":
+        reader = TraceReader(args.src)
+        cycles = (int(reader.index["first_cycle"].min()), int(reader.index["max_cycle"].max())) if len(reader) else (0, 0)
+        print(f"📦 {args.src}: {len(reader)} requests in {len(reader.index)} {reader.codec} blocks of "
+              f"{reader.block_size}, cycles {cycles[0]}..{cycles[1]}, {os.path.getsize(args.src)} bytes, "
+              f"sha256 {reader.digest}")
+    elif args.command == "slice":
+        from trace_io import format_trace_lines
+        for chunk in TraceReader(args.src).iter_chunks(1 << 16, args.start, args.end):
+            print("\n".join(format_trace_lines(chunk["addr"], chunk["is_write"], chunk["cycle"])))
+    elif args.command == "store":
+        for src in args.src:
+            digest, stored = store_trace(src, args.store)
+            print(f"✅ {src} -> {stored}")
+
+
+if __name__ == "__main__":
+    main()
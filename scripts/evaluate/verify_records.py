@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Offline data-integrity check of the harness' request/response records.
+
+``sim_trace -V`` skips the inline response checks and the per-response console
+log, and only appends one packed record per accepted request
+(``harness_requests.bin``) and per response (``harness_responses.bin``). This
+module checks those records after the run:
+
+* every write response returns the data that request wrote;
+* every read of an address returns the data of the last write to that address
+  accepted before the read (reads with no earlier write are not checked);
+* every response belongs to a request and arrives once.
+
+The read check sorts the requests by (address, acceptance order) and carries
+the last write index forward within each address run, so it is a handful of
+array passes however long the trace is. Unlike the inline check, which compares
+with the last write accepted before the response, a write accepted after the
+read cannot cause a false mismatch here.
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REQUEST_FILE = "harness_requests.bin"
+RESPONSE_FILE = "harness_responses.bin"
+REPORT_FILE = "integrity.json"
+PROBLEMS_FILE = "integrity_problems.csv"
+
+# Layouts of RequestRecord / ResponseRecord in sims/trace_replay.h
+REQUEST_DTYPE = np.dtype([("request_id", "<u4"), ("addr", "<u4"), ("flags", "<u4"), ("wdata", "<u4"),
+                          ("cycle", "<u8")])
+RESPONSE_DTYPE = np.dtype([("request_id", "<u4"), ("addr", "<u4"), ("flags", "<u4"), ("data", "<u4"),
+                           ("cycle", "<u8")])
+WRITE_FLAG = 2
+
+
+def read_records(path, dtype):
+    """Whole records of ``path``; a half-written last record (killed run) is ignored."""
+    raw = np.fromfile(path, dtype=np.uint8)
+    return raw[:raw.size // dtype.itemsize * dtype.itemsize].view(dtype)
+
+
+def has_records(run_dir):
+    return (Path(run_dir) / REQUEST_FILE).exists() and (Path(run_dir) / RESPONSE_FILE).exists()
+
+
+def last_write_before(requests):
+    """Per request: index of the last earlier write to the same address, or -1."""
+    n = requests.size
+    order = np.lexsort((np.arange(n), requests["addr"]))
+    addr = requests["addr"][order]
+    is_write = (requests["flags"][order] & WRITE_FLAG) != 0
+    pos = np.arange(n)
+    run_start = np.maximum.accumulate(np.where(np.r_[True, addr[1:] != addr[:-1]], pos, 0))
+    # Last write at or before each position, shifted so a write does not see itself
+    last = np.maximum.accumulate(np.where(is_write, pos, -1))
+    before = np.r_[-1, last[:-1]]
+    before = np.where(before >= run_start, before, -1)
+    result = np.full(n, -1, dtype=np.int64)
+    result[order] = np.where(before >= 0, order[np.maximum(before, 0)], -1)
+    return result
+
+
+def verify(requests, responses):
+    """Check the records; returns (summary dict, DataFrame with one row per problem)."""
+    # Join responses to requests by id (ids are unique per run)
+    by_id = np.argsort(requests["request_id"], kind="stable")
+    sorted_ids = requests["request_id"][by_id]
+    slot = np.searchsorted(sorted_ids, responses["request_id"])
+    known = slot < sorted_ids.size
+    known[known] = sorted_ids[slot[known]] == responses["request_id"][known]
+    req = np.full(responses.size, -1, dtype=np.int64)
+    req[known] = by_id[slot[known]]
+
+    # Only the first response of a request is checked; later ones are duplicates
+    first = np.zeros(responses.size, dtype=bool)
+    _, first_idx = np.unique(req[known], return_index=True)
+    first[np.flatnonzero(known)[first_idx]] = True
+    duplicate = known & ~first
+
+    r = req[first]
+    resp = responses[first]
+    is_write = (requests["flags"][r] & WRITE_FLAG) != 0
+    source = last_write_before(requests)[r]
+    expected = np.where(is_write, requests["wdata"][r],
+                        requests["wdata"][np.maximum(source, 0)]).astype(np.int64)
+    checked = is_write | (source >= 0)
+    bad = checked & (resp["data"].astype(np.int64) != expected)
+
+    problems = [
+        pd.DataFrame({
+            "kind": np.where(is_write[bad], "write_mismatch", "read_mismatch"),
+            "request_id": resp["request_id"][bad].astype(np.int64),
+            "addr": resp["addr"][bad].astype(np.int64),
+            "cycle": resp["cycle"][bad].astype(np.int64),
+            "expected": expected[bad],
+            "got": resp["data"][bad].astype(np.int64),
+            "source_request_id": np.where(is_write[bad], resp["request_id"][bad].astype(np.int64),
+                                          requests["request_id"][np.maximum(source[bad], 0)].astype(np.int64)),
+        }),
+    ]
+    for kind, mask in (("unknown_request", ~known), ("duplicate_response", duplicate)):
+        rows = responses[mask]
+        problems.append(pd.DataFrame({
+            "kind": kind,
+            "request_id": rows["request_id"].astype(np.int64),
+            "addr": rows["addr"].astype(np.int64),
+            "cycle": rows["cycle"].astype(np.int64),
+            "expected": -1,
+            "got": rows["data"].astype(np.int64),
+            "source_request_id": -1,
+        }))
+    problems = pd.concat(problems, ignore_index=True).sort_values(["cycle", "request_id"], kind="stable")
+
+    summary = {
+        "requests": int(requests.size),
+        "responses": int(responses.size),
+        "unanswered": int(requests.size - first.sum()),
+        "checked_writes": int(is_write.sum()),
+        "checked_reads": int((~is_write & checked).sum()),
+        "write_mismatches": int((bad & is_write).sum()),
+        "read_mismatches": int((bad & ~is_write).sum()),
+        "unknown_responses": int((~known).sum()),
+        "duplicate_responses": int(duplicate.sum()),
+    }
+    summary["ok"] = summary["write_mismatches"] + summary["read_mismatches"] + summary["unknown_responses"] \
+        + summary["duplicate_responses"] == 0
+    return summary, problems.reset_index(drop=True)
+
+
+def verify_directory(run_dir, report=None, problems_csv=None):
+    """Verify the records in ``run_dir``; optionally write the summary JSON and the problem rows CSV."""
+    run_dir = Path(run_dir)
+    requests = read_records(run_dir / REQUEST_FILE, REQUEST_DTYPE)
+    responses = read_records(run_dir / RESPONSE_FILE, RESPONSE_DTYPE)
+    summary, problems = verify(requests, responses)
+    if report:
+        with open(report, "w") as f:
+            json.dump(summary, f, indent=2)
+    if problems_csv:
+        problems.to_csv(problems_csv, index=False)
+    return summary, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the data returned in a run recorded with sim_trace -V.")
+    parser.add_argument("dirs", nargs="+", help="Run directories containing harness_requests.bin/harness_responses.bin.")
+    parser.add_argument("--show", type=int, default=20, help="Problems printed per directory.")
+    parser.add_argument("--write-report", action="store_true",
+                        help=f"Write {REPORT_FILE} and {PROBLEMS_FILE} into each directory.")
+    args = parser.parse_args()
+
+    failed = False
+    for d in args.dirs:
+        d = Path(d)
+        if not has_records(d):
+            print(f"⚠️  No harness records in {d} (run the simulator with -V)")
+            continue
+        summary, problems = verify_directory(d, d / REPORT_FILE if args.write_report else None,
+                                             d / PROBLEMS_FILE if args.write_report else None)
+        if summary["ok"]:
+            print(f"✅ {d}: {summary['checked_writes']} writes and {summary['checked_reads']} reads verified "
+                  f"({summary['unanswered']} requests without a response)")
+            continue
+        failed = True
+        print(f"❌ {d}: {summary['write_mismatches']} write and {summary['read_mismatches']} read mismatches, "
+              f"{summary['unknown_responses']} unknown and {summary['duplicate_responses']} duplicate responses")
+        for row in problems.head(args.show).itertuples():
+            where = f"  {row.kind:<18} id {row.request_id} addr 0x{row.addr:x} cycle {row.cycle}"
+            if row.expected < 0:
+                print(f"{where}: data 0x{row.got:x}")
+            else:
+                print(f"{where}: expected 0x{row.expected:x} (written by id {row.source_request_id}), got 0x{row.got:x}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
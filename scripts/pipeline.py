@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Single entry point for the trace -> simulate -> analyze -> compare workflow.
+
+The Makefile stages (convert-traces, evaluate-current, visualize-current,
+evaluate-dramsim3, compare-experiments and the per-experiment analyses) are
+modelled as a DAG. Every stage runs its script in a fresh process, so this
+driver itself imports nothing heavier than the standard library; ``--help``,
+``--list`` and ``--dry-run`` never touch pandas or matplotlib.
+
+A stage is up to date when its key matches the one recorded the last time it
+succeeded (``.pipeline/stamps/<stage>.json``). The key hashes the contents of
+the stage script and every repo-local module it imports (found by walking its
+import statements), its declared input files, its parameters and the keys of
+the stages it depends on. Editing one analysis script therefore reruns only
+that analysis. Ready stages run concurrently, each in its own scratch
+directory because the simulators write their statistics into their CWD.
+
+``--profile DIR`` times every stage command and has the scripts record their
+own steps (convert, simulate, copy CSVs, merge, plot, ...) per experiment into
+``DIR/timeline.jsonl``; see ``evaluate/profiling.py``.
+"""
+import argparse
+import ast
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = ROOT / "scripts"
+STATE_DIR = ROOT / ".pipeline"
+
+sys.path.insert(0, str(SCRIPTS / "evaluate"))
+import profiling  # noqa: E402
+
+DEFAULT_SIM = "obj_dir/VMultiChannelSystem"
+DEFAULT_DRAMSIM = "/home/nixos/CodingWorkspace/hardware/mem-controller/DRAMsim3/build/dramsim3main"
+DEFAULT_DRAMSIM_CONFIG = "HBM2_4Gb_x128.ini"
+
+
+class Stage:
+    """One node of the pipeline DAG."""
+
+    def __init__(self, name, commands, deps=(), script=None, inputs=(), outputs=(), params=(), clean=False):
+        self.name = name
+        self.commands = commands    # ctx -> list of argv lists, evaluated when the stage runs
+        self.deps = tuple(deps)
+        self.script = script        # main script, also the root of the source-dependency walk
+        self.inputs = tuple(inputs)  # files or globs relative to the repo root
+        self.outputs = tuple(outputs)
+        self.params = tuple(params)  # ctx attributes that change the result
+        self.clean = clean          # remove outputs before running (the Makefile's rm -rf)
+
+
+def _python(script, *args):
+    return [sys.executable, str(SCRIPTS / script), *map(str, args)]
+
+
+def _experiments(exp_dir):
+    return sorted(p for p in Path(exp_dir).glob("exp_*") if (p / "meta").is_dir())
+
+
+def _per_experiment(script, *extra):
+    """One command per ``exp_*`` directory of the current experiments (the Makefile's for-loop)."""
+    def commands(ctx):
+        return [_python(script, exp / "meta", *[a.format(exp=exp) for a in extra])
+                for exp in _experiments(ctx.experiment_dir)]
+    return commands
+
+
+STAGES = [
+    Stage("convert-traces",
+          lambda ctx: [_python("preprocess/convert_c_to_traces.py", ctx.examples_dir, "-o", ctx.traces_dir,
+                               *ctx.trace_flags)],
+          script="preprocess/convert_c_to_traces.py", inputs=["{examples_dir}/**/*.c"],
+          outputs=["{traces_dir}"], params=["trace_flags"], clean=True),
+    Stage("build-simulator",
+          lambda ctx: [["make", "-C", str(ROOT), "verilog", "verilator-trace"]],
+          inputs=["src/main/scala/**/*.scala", "src/main/config/config.json", "sims/sim_trace.cpp", "sims/trace_replay.h", "build.sbt"],
+          outputs=[DEFAULT_SIM]),
+    Stage("evaluate-current",
+          lambda ctx: [_python("evaluate/evaluate_trace_current.py", "--sim", ctx.sim, "--traces", ctx.traces_dir,
+                               "--outdir", ctx.experiment_dir, "--csv_dir", ".", "--cycles", ctx.cycles,
+                               "--trace-store", ctx.trace_store, *ctx.replay_flags,
+                               *(["--sim-config", ctx.sim_config] if ctx.sim_config else []))],
+          deps=["convert-traces", "build-simulator"], script="evaluate/evaluate_trace_current.py",
+          inputs=["{sim}", "{traces_dir}/*"], outputs=["{experiment_dir}"],
+          params=["cycles", "replay_flags", "sim_config"], clean=True),
+    Stage("visualize-current",
+          lambda ctx: [_python("visualize/visualize_experiments.py", ctx.experiment_dir,
+                               "--num-cycles", ctx.cycles, "--prefix", "current")],
+          deps=["evaluate-current"], script="visualize/visualize_experiments.py", params=["cycles"]),
+    Stage("lifecycle-current",
+          _per_experiment("analyze/lifecycle.py", "--out", "{exp}/lifecycle.npy", "--summary", "{exp}/stage_waits.csv"),
+          deps=["evaluate-current"], script="analyze/lifecycle.py"),
+    Stage("queues-current",
+          _per_experiment("analyze/queue_occupancy.py", "--summary", "{exp}/queue_summary.csv",
+                          "--timeseries", "{exp}/queue_occupancy.csv"),
+          deps=["evaluate-current"], script="analyze/queue_occupancy.py", inputs=["src/main/config/config.json"]),
+    Stage("tail-current",
+          lambda ctx: _per_experiment("analyze/tail_latency.py", "--tail", ctx.tail_fraction,
+                                      "--json", "{exp}/tail_causes.json")(ctx),
+          deps=["evaluate-current"], script="analyze/tail_latency.py", inputs=["src/main/config/config.json"],
+          params=["tail_fraction"]),
+    Stage("energy-current",
+          lambda ctx: [_python("analyze/energy.py", ctx.experiment_dir, "--ini", ctx.dramsim_config,
+                               "--cycles", ctx.cycles, "--out", Path(ctx.experiment_dir) / "energy.csv")],
+          deps=["evaluate-current"], script="analyze/energy.py", inputs=["{dramsim_config}"], params=["cycles"]),
+    Stage("report-current",
+          lambda ctx: [_python("visualize/build_report.py", ctx.experiment_dir,
+                               "--out", Path(ctx.experiment_dir) / "report.html")],
+          deps=["evaluate-current"], script="visualize/build_report.py"),
+    Stage("evaluate-dramsim3",
+          lambda ctx: [_python("evaluate/evaluate_trace_dramsim3.py", "--sim", ctx.dramsim, "--traces", ctx.traces_dir,
+                               "--outdir", ctx.dramsim_experiment_dir, "--csv_dir", ".", "--cycles", ctx.cycles,
+                               "--dramsim-config", ctx.dramsim_config, "--trace-store", ctx.trace_store)],
+          deps=["convert-traces"], script="evaluate/evaluate_trace_dramsim3.py",
+          inputs=["{dramsim}", "{dramsim_config}", "{traces_dir}/*"], outputs=["{dramsim_experiment_dir}"],
+          params=["cycles"], clean=True),
+    Stage("visualize-dramsim3",
+          lambda ctx: [_python("visualize/visualize_experiments.py", ctx.dramsim_experiment_dir,
+                               "--num-cycles", ctx.cycles, "--prefix", "dramsim")],
+          deps=["evaluate-dramsim3"], script="visualize/visualize_experiments.py", params=["cycles"]),
+    Stage("compare-experiments",
+          lambda ctx: [_python("compare/diff_experiments.py", "--current-dir", ctx.experiment_dir,
+                               "--baseline-dir", ctx.dramsim_experiment_dir, "--out-dir", ctx.diff_dir)],
+          deps=["visualize-current", "visualize-dramsim3"], script="compare/diff_experiments.py",
+          outputs=["{diff_dir}"], clean=True),
+]
+STAGE_MAP = {s.name: s for s in STAGES}
+
+
+def local_sources(script):
+    """``script`` plus every module under scripts/ it imports, transitively."""
+    search = [p for p in SCRIPTS.iterdir() if p.is_dir()]
+    seen, todo = set(), [SCRIPTS / script]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_text(), str(path))):
+            if isinstance(node, ast.Import):
+                names = [a.name.split(".")[0] for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module.split(".")[0]]
+            else:
+                continue
+            # Sibling imports first, then the directories scripts put on sys.path
+            for name in names:
+                for d in [path.parent, *search]:
+                    if (d / f"{name}.py").is_file():
+                        todo.append(d / f"{name}.py")
+                        break
+    return sorted(seen)
+
+
+class FileHasher:
+    """sha256 of file contents, cached by (size, mtime) across runs."""
+
+    def __init__(self, cache_path):
+        self.cache_path = Path(cache_path)
+        self.cache = json.loads(self.cache_path.read_text()) if self.cache_path.exists() else {}
+
+    def __call__(self, path):
+        st = path.stat()
+        key = str(path)
+        hit = self.cache.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self.cache[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return self.cache[key][2]
+
+    def save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_path.write_text(json.dumps(self.cache))
+
+
+def expand_inputs(patterns, ctx):
+    """Existing files matched by the input patterns (directories expand to their files)."""
+    files = set()
+    for pattern in patterns:
+        pattern = pattern.format(**vars(ctx))
+        path = ROOT / pattern  # absolute patterns replace ROOT
+        if any(c in pattern for c in "*?["):
+            files.update(p for p in Path(path.anchor).glob(str(path.relative_to(path.anchor))) if p.is_file())
+        elif path.is_dir():
+            files.update(p for p in path.rglob("*") if p.is_file())
+        elif path.is_file():
+            files.add(path)
+    return sorted(files)
+
+
+def stage_key(stage, ctx, dep_keys, hasher):
+    """Content key for ``stage``: sources, inputs, parameters and upstream keys."""
+    h = hashlib.sha256(stage.name.encode())
+    files = (local_sources(stage.script) if stage.script else []) + expand_inputs(stage.inputs, ctx)
+    for path in files:
+        h.update(f"{path.relative_to(ROOT) if path.is_relative_to(ROOT) else path}\0{hasher(path)}\n".encode())
+    h.update(json.dumps({p: getattr(ctx, p) for p in stage.params}, sort_keys=True, default=str).encode())
+    for dep in stage.deps:
+        h.update(f"{dep}\0{dep_keys.get(dep, '')}\n".encode())
+    return h.hexdigest()
+
+
+def stamp_path(name):
+    return STATE_DIR / "stamps" / f"{name}.json"
+
+
+def is_up_to_date(stage, key, ctx):
+    path = stamp_path(stage.name)
+    if not path.exists() or json.loads(path.read_text()).get("key") != key:
+        return False
+    return all((ROOT / o.format(**vars(ctx))).exists() for o in stage.outputs)
+
+
+def run_stage(stage, ctx):
+    """Run a stage's commands in its scratch directory; returns (ok, seconds, log path)."""
+    workdir = STATE_DIR / "work" / stage.name
+    log_path = STATE_DIR / "logs" / f"{stage.name}.log"
+    shutil.rmtree(workdir, ignore_errors=True)
+    workdir.mkdir(parents=True)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    if stage.clean:
+        for out in stage.outputs:
+            shutil.rmtree(ROOT / out.format(**vars(ctx)), ignore_errors=True)
+
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        for cmd in stage.commands(ctx):
+            log.write(f"$ {' '.join(map(str, cmd))}\n")
+            log.flush()
+            # Recorded as "pipeline:<stage>" so it does not mix with the steps the script records itself
+            program = next((Path(c).name for c in map(str, cmd) if c.endswith(".py")), Path(str(cmd[0])).name)
+            if profiling.run(cmd, f"pipeline:{stage.name}", {"command": program},
+                             cwd=workdir, stdout=log, stderr=subprocess.STDOUT):
+                return False, time.perf_counter() - start, log_path
+    return True, time.perf_counter() - start, log_path
+
+
+def select(targets):
+    """Targets plus all of their ancestors, in definition (topological) order."""
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(STAGE_MAP[name].deps)
+    return [s for s in STAGES if s.name in wanted]
+
+
+def execute(stages, ctx, jobs=4, force=(), dry_run=False):
+    """Run stale stages, independent ones concurrently. Returns {stage: status}."""
+    hasher = FileHasher(STATE_DIR / "hashes.json")
+    keys, status = {}, {}
+    pending = {s.name: s for s in stages}
+    selected = set(pending)
+    running = {}
+
+    def tail(path, n=20):
+        print("".join(Path(path).read_text().splitlines(keepends=True)[-n:]), end="")
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            # Schedule everything whose dependencies are settled
+            for name, stage in list(pending.items()):
+                deps = [d for d in stage.deps if d in selected]
+                if any(d not in status for d in deps):
+                    continue
+                del pending[name]
+                if any(status[d] in ("failed", "skipped") for d in deps):
+                    status[name] = "skipped"
+                    print(f"⚠️  {name}: skipped (upstream failed)")
+                    continue
+                keys[name] = stage_key(stage, ctx, keys, hasher)
+                if name not in force and "all" not in force and is_up_to_date(stage, keys[name], ctx):
+                    status[name] = "up-to-date"
+                    print(f"✅ {name}: up to date")
+                elif dry_run:
+                    status[name] = "stale"
+                    print(f"👉 {name}: would run")
+                else:
+                    print(f"🧪 {name}: running...")
+                    running[pool.submit(run_stage, stage, ctx)] = stage
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                ok, seconds, log_path = future.result()
+                if ok:
+                    status[stage.name] = "ran"
+                    stamp = stamp_path(stage.name)
+                    stamp.parent.mkdir(parents=True, exist_ok=True)
+                    stamp.write_text(json.dumps({"key": keys[stage.name], "seconds": seconds,
+                                                 "finished": time.time()}, indent=2))
+                    print(f"✅ {stage.name}: done in {seconds:.1f}s")
+                else:
+                    status[stage.name] = "failed"
+                    print(f"❌ {stage.name}: failed after {seconds:.1f}s (log: {log_path})")
+                    tail(log_path)
+    hasher.save()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the evaluation pipeline, rerunning only out-of-date stages.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date (default: all).")
+    parser.add_argument("--list", action="store_true", help="List stages and their dependencies.")
+    parser.add_argument("--dry-run", action="store_true", help="Report which stages would run.")
+    parser.add_argument("--force", nargs="*", default=[], help="Rerun these stages even if up to date ('all' for every stage).")
+    parser.add_argument("--jobs", type=int, default=4, help="Stages to run concurrently.")
+    parser.add_argument("--sim", help=f"Simulator binary (default: build {DEFAULT_SIM} from the Chisel sources).")
+    parser.add_argument("--dramsim", default=DEFAULT_DRAMSIM, help="DRAMSim3 executable.")
+    parser.add_argument("--dramsim-config", default=DEFAULT_DRAMSIM_CONFIG, help="DRAMSim3 .ini (also used by energy-current).")
+    parser.add_argument("--cycles", type=int, default=100000, help="Cycles to simulate per trace.")
+    parser.add_argument("--examples-dir", default="benchmarks", help="C programs to convert into traces.")
+    parser.add_argument("--traces-dir", default="traces")
+    parser.add_argument("--trace-store", default="trace_store")
+    parser.add_argument("--experiment-dir", default="exps/current")
+    parser.add_argument("--dramsim-experiment-dir", default="exps/dramsim")
+    parser.add_argument("--diff-dir", default="exps/diff")
+    parser.add_argument("--tail-fraction", type=float, default=0.01, help="Tail fraction for tail-current.")
+    parser.add_argument("--trace-flags", default="", help="Extra convert_c_to_traces.py flags (LLC filter, coalescing, --compress).")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Record per-step wall/CPU time, peak RSS and I/O of every stage to DIR/timeline.jsonl.")
+    parser.add_argument("--cprofile", action="store_true", help="With --profile, also dump a cProfile per script step.")
+    parser.add_argument("--replay-flags", default="", help="Extra evaluate_trace_current.py flags (e.g. '--replay closed --mshrs 16').")
+    args = parser.parse_args()
+
+    if args.list:
+        for s in STAGES:
+            print(f"{s.name:22s} <- {', '.join(s.deps) or '-'}")
+        return
+
+    unknown = [t for t in args.targets + args.force if t not in STAGE_MAP and t != "all"]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    # Stages run in scratch directories, so every path they see is absolute
+    ctx = argparse.Namespace(
+        sim=str((ROOT / (args.sim or DEFAULT_SIM)).resolve()),
+        dramsim=str((ROOT / args.dramsim).resolve()),
+        dramsim_config=str((ROOT / args.dramsim_config).resolve()),
+        cycles=args.cycles,
+        examples_dir=str((ROOT / args.examples_dir).resolve()),
+        traces_dir=str((ROOT / args.traces_dir).resolve()),
+        trace_store=str((ROOT / args.trace_store).resolve()),
+        experiment_dir=str((ROOT / args.experiment_dir).resolve()),
+        dramsim_experiment_dir=str((ROOT / args.dramsim_experiment_dir).resolve()),
+        diff_dir=str((ROOT / args.diff_dir).resolve()),
+        tail_fraction=args.tail_fraction,
+        trace_flags=args.trace_flags.split(),
+        replay_flags=args.replay_flags.split(),
+        # Only the simulator built here is known to match the repo's config.json
+        sim_config=None if args.sim else str(ROOT / "src/main/config/config.json"),
+    )
+    # An explicit simulator replaces the Chisel build
+    if args.sim:
+        STAGE_MAP["evaluate-current"].deps = ("convert-traces",)
+
+    stages = select(args.targets or [s.name for s in STAGES])
+    if args.sim:
+        stages = [s for s in stages if s.name != "build-simulator"]
+    if args.profile and not args.dry_run:
+        # Exported, so every stage's scripts record their own steps too
+        profiling.enable(ROOT / args.profile, args.cprofile)
+    status = execute(stages, ctx, args.jobs, set(args.force), args.dry_run)
+    if args.profile and not args.dry_run:
+        print(profiling.write_summary(ROOT / args.profile))
+
+    counts = {k: sum(v == k for v in status.values()) for k in ("ran", "up-to-date", "stale", "failed", "skipped")}
+    print("📊 " + ", ".join(f"{v} {k}" for k, v in counts.items() if v))
+    if counts["failed"] or counts["skipped"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Last-level-cache filter between Lackey parsing and DRAM trace emission.
+
+Lackey records every load and store, most of which would hit in the CPU's
+caches. This stage runs the accesses through a set-associative, write-back,
+write-allocate LRU cache and emits only what reaches memory:
+
+    miss              READ of the whole line (the fill; store misses allocate too)
+    dirty eviction    WRITE of the victim line
+
+Cycles follow ``convert_memtrace`` (cumulative access size), so a filtered
+trace lines up with the unfiltered one.
+
+Emitted addresses are line indices (byte address >> log2(line size)), one
+controller address per cache line. ``AddressDecoder`` takes the channel and
+bank from the LSBs, so consecutive lines interleave across channels and banks;
+line-aligned byte addresses would leave those bits zero and send every request
+to channel 0, bank 0. Filtered requests are whole lines, so they are not
+coalesced further (see ``coalesce.py``).
+
+The cache is simulated chunk by chunk with numpy. Within a chunk, repeated
+accesses to the line a set touched last are MRU hits and are collapsed first;
+the remaining accesses are replayed in lockstep across sets (step k handles the
+k-th access of every set at once), which is exact LRU because sets are
+independent.
+"""
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from trace_io import DEFAULT_CHUNK, parse_hex, write_trace  # noqa: E402
+
+
+def _split_op_addr(values, width=24):
+    """Split ``" L 04222cac"``-style fields into op byte and hex address without a Python loop."""
+    raw = np.asarray(values, dtype=f"S{width}").view(np.uint8).reshape(-1, width)
+    text = (raw != 0) & (raw != ord(" ")) & (raw != ord("\t"))
+    op_col = text.argmax(axis=1)
+    cols = np.arange(width)
+    addr_col = (text & (cols > op_col[:, None])).argmax(axis=1)
+    # Left-align the address bytes so parse_hex sees them followed by NUL padding only
+    src = addr_col[:, None] + cols[None, :]
+    aligned = np.take_along_axis(raw, np.minimum(src, width - 1), axis=1)
+    aligned[(src >= width) | ~np.take_along_axis(text, np.minimum(src, width - 1), axis=1)] = 0
+    return raw[np.arange(raw.shape[0]), op_col], parse_hex(aligned.view(f"S{width}").ravel())
+
+
+def iter_lackey_chunks(path, chunk_size=DEFAULT_CHUNK):
+    """Yield dicts of ``addr``, ``is_write`` (S and M) and ``cycle`` arrays from a Lackey log."""
+    reader = pd.read_csv(path, sep=",", header=None, names=["op_addr", "size"], usecols=[0, 1], dtype=str,
+                         chunksize=chunk_size, engine="c", quoting=csv.QUOTE_NONE, on_bad_lines="skip")
+    cycle = 0
+    for df in reader:
+        size = pd.to_numeric(df["size"], errors="coerce").to_numpy()
+        op, addr = _split_op_addr(df["op_addr"].fillna("").to_numpy())
+        # Only data accesses (“L”, “S”, “M”); instruction fetches and Valgrind banner lines are dropped
+        keep = np.isin(op, np.frombuffer(b"LSM", dtype=np.uint8)) & ~np.isnan(size)
+        if not keep.any():
+            continue
+        cycles = cycle + np.cumsum(size[keep].astype(np.int64))
+        cycle = int(cycles[-1])
+        yield {"addr": addr[keep], "is_write": op[keep] != ord("L"), "cycle": cycles}
+
+
+def _log2(value, name):
+    if value <= 0 or value & (value - 1):
+        raise ValueError(f"{name} must be a power of two, got {value}")
+    return value.bit_length() - 1
+
+
+class CacheFilter:
+    """Set-associative write-back LRU cache whose state carries across ``access`` calls."""
+
+    def __init__(self, size=8 << 20, ways=16, line_size=64):
+        self.line_bits = _log2(line_size, "line size")
+        self.num_sets = size // (line_size * ways)
+        self.set_bits = _log2(self.num_sets, "number of sets")
+        self.ways = ways
+        self.tags = np.zeros((self.num_sets, ways), dtype=np.uint64)
+        self.valid = np.zeros((self.num_sets, ways), dtype=bool)
+        self.dirty = np.zeros((self.num_sets, ways), dtype=bool)
+        # Last-use time per way; -1 for invalid ways so they are filled first
+        self.stamp = np.full((self.num_sets, ways), -1, dtype=np.int64)
+        self.clock = 0
+        self.stats = {"accesses": 0, "reads": 0, "writes": 0, "read_hits": 0, "write_hits": 0,
+                      "misses": 0, "writebacks": 0}
+
+    def _line_index(self, tag, set_idx):
+        return (tag << np.uint64(self.set_bits)) | set_idx.astype(np.uint64)
+
+    def access(self, addr, is_write, cycle):
+        """Run one chunk of accesses; returns the emitted ``addr``/``is_write``/``cycle`` arrays."""
+        addr = np.asarray(addr, dtype=np.uint64)
+        is_write = np.asarray(is_write, dtype=bool)
+        cycle = np.asarray(cycle, dtype=np.int64)
+        n = addr.size
+        if n == 0:
+            return {"addr": addr, "is_write": is_write, "cycle": cycle}
+
+        line = addr >> np.uint64(self.line_bits)
+        sets = (line & np.uint64(self.num_sets - 1)).astype(np.int64)
+        order = np.argsort(sets, kind="stable")
+        s_sorted, l_sorted, w_sorted = sets[order], line[order], is_write[order]
+
+        # Runs of the same line within a set: only the head can miss, the rest are MRU hits
+        head = np.ones(n, dtype=bool)
+        head[1:] = (s_sorted[1:] != s_sorted[:-1]) | (l_sorted[1:] != l_sorted[:-1])
+        starts = np.flatnonzero(head)
+        ends = np.append(starts[1:], n) - 1
+        run_set = s_sorted[starts]
+        run_tag = l_sorted[starts] >> np.uint64(self.set_bits)
+        run_write = np.maximum.reduceat(w_sorted.astype(np.uint8), starts).astype(bool)
+        run_first = order[starts]
+        run_last = order[ends]
+
+        # k-th run of every set is handled in step k
+        new_set = np.ones(starts.size, dtype=bool)
+        new_set[1:] = run_set[1:] != run_set[:-1]
+        step = np.arange(starts.size) - np.maximum.accumulate(np.where(new_set, np.arange(starts.size), 0))
+        by_step = np.argsort(step, kind="stable")
+        bounds = np.searchsorted(step[by_step], np.arange(step.max() + 2))
+
+        run_hit = np.zeros(starts.size, dtype=bool)
+        wb_pos, wb_line = [], []
+        for k in range(step.max() + 1):
+            idx = by_step[bounds[k]:bounds[k + 1]]
+            s, t = run_set[idx], run_tag[idx]
+            match = self.valid[s] & (self.tags[s] == t[:, None])
+            hit = match.any(axis=1)
+            way = np.where(hit, match.argmax(axis=1), self.stamp[s].argmin(axis=1))
+
+            evict = ~hit & self.valid[s, way] & self.dirty[s, way]
+            if evict.any():
+                wb_pos.append(run_first[idx][evict])
+                wb_line.append(self._line_index(self.tags[s[evict], way[evict]], s[evict]))
+
+            self.dirty[s, way] = np.where(hit, self.dirty[s, way], False) | run_write[idx]
+            self.tags[s, way] = t
+            self.valid[s, way] = True
+            self.stamp[s, way] = self.clock + run_last[idx]
+            run_hit[idx] = hit
+        self.clock += n
+
+        # Statistics: every non-head access is a hit, heads hit if the set already held the line
+        head_write = w_sorted[starts]
+        self.stats["accesses"] += n
+        self.stats["writes"] += int(is_write.sum())
+        self.stats["reads"] += int(n - is_write.sum())
+        tail_writes = int(w_sorted[~head].sum())
+        self.stats["write_hits"] += tail_writes + int((run_hit & head_write).sum())
+        self.stats["read_hits"] += int((~head).sum()) - tail_writes + int((run_hit & ~head_write).sum())
+        self.stats["misses"] += int((~run_hit).sum())
+
+        miss_pos = run_first[~run_hit]
+        miss_line = self._line_index(run_tag[~run_hit], run_set[~run_hit])
+        wb_pos = np.concatenate(wb_pos) if wb_pos else np.zeros(0, dtype=np.int64)
+        wb_line = np.concatenate(wb_line) if wb_line else np.zeros(0, dtype=np.uint64)
+        self.stats["writebacks"] += int(wb_pos.size)
+
+        # Program order; a write-back goes out before the fill that caused it
+        pos = np.concatenate([wb_pos, miss_pos])
+        emitted = np.concatenate([np.ones(wb_pos.size, dtype=bool), np.zeros(miss_pos.size, dtype=bool)])
+        out = np.lexsort((~emitted, pos))
+        return {
+            "addr": np.concatenate([wb_line, miss_line])[out],
+            "is_write": emitted[out],
+            "cycle": cycle[pos[out]],
+        }
+
+    def flush(self, cycle):
+        """Write back every dirty line (at ``cycle``) and invalidate the cache."""
+        s, w = np.nonzero(self.valid & self.dirty)
+        lines = self._line_index(self.tags[s, w], s)
+        self.stats["writebacks"] += int(lines.size)
+        self.valid[:] = False
+        self.dirty[:] = False
+        self.stamp[:] = -1
+        return {"addr": lines, "is_write": np.ones(lines.size, dtype=bool),
+                "cycle": np.full(lines.size, cycle, dtype=np.int64)}
+
+    def summary(self):
+        st = dict(self.stats)
+        st["hit_rate"] = (st["read_hits"] + st["write_hits"]) / st["accesses"] if st["accesses"] else 0.0
+        st["read_hit_rate"] = st["read_hits"] / st["reads"] if st["reads"] else 0.0
+        st["write_hit_rate"] = st["write_hits"] / st["writes"] if st["writes"] else 0.0
+        st["emitted"] = st["misses"] + st["writebacks"]
+        return st
+
+
+def filter_memtrace(in_path, out_path, size=8 << 20, ways=16, line_size=64, flush=False, chunk_size=DEFAULT_CHUNK):
+    """Lackey log -> DRAM trace of LLC misses and write-backs. Returns the cache statistics."""
+    cache = CacheFilter(size, ways, line_size)
+    open(out_path, "w").close()
+    last_cycle = 0
+    for chunk in iter_lackey_chunks(in_path, chunk_size):
+        out = cache.access(chunk["addr"], chunk["is_write"], chunk["cycle"])
+        write_trace(out_path, out["addr"], out["is_write"], out["cycle"], append=True)
+        last_cycle = int(chunk["cycle"][-1])
+    if flush:
+        out = cache.flush(last_cycle + 1)
+        write_trace(out_path, out["addr"], out["is_write"], out["cycle"], append=True)
+    return cache.summary()
+
+
+def add_cache_arguments(parser):
+    """``--llc-*`` options shared by the trace conversion scripts."""
+    parser.add_argument("--llc-size", type=int, default=0, help="LLC capacity in bytes (0 disables the filter).")
+    parser.add_argument("--llc-ways", type=int, default=16, help="LLC associativity.")
+    parser.add_argument("--llc-line", type=int, default=64, help="LLC line size in bytes.")
+    parser.add_argument("--llc-flush", action="store_true", help="Write back all dirty lines at the end.")
+
+
+def print_summary(stats):
+    print(f"📊 LLC: {stats['accesses']} accesses, hit rate {stats['hit_rate']:.2%} "
+          f"(reads {stats['read_hit_rate']:.2%}, writes {stats['write_hit_rate']:.2%}), "
+          f"{stats['misses']} misses + {stats['writebacks']} write-backs emitted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter a Lackey trace through a set-associative LLC.")
+    parser.add_argument("memtrace", help="Lackey --trace-mem=yes log.")
+    parser.add_argument("output", help="Formatted DRAM trace to write.")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="Lines per processing chunk.")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+
+    stats = filter_memtrace(args.memtrace, args.output, args.llc_size or (8 << 20), args.llc_ways,
+                            args.llc_line, args.llc_flush, args.chunk)
+    print_summary(stats)
+    print(f"👉 Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
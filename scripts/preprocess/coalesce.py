@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Coalesce trace accesses that fall in the same DRAM burst.
+
+Lackey emits 1-8 byte accesses, so neighbouring fields of one cache line become
+separate controller requests. This stage maps every address to its
+burst-aligned block (``bus_width * BL / 8`` bytes, from the DRAMSim3 ini) and
+merges consecutive accesses to the same block while they are of the same type
+and at most ``window`` cycles apart. Each group becomes one request at its first
+cycle. Groups never reorder accesses to one block, so read-after-write order
+is preserved.
+
+Every output request is addressed by its block index (byte address //
+burst bytes), the same convention ``cache_filter.py`` uses for lines.
+``AddressDecoder`` takes channel and bank from the LSBs, so consecutive bursts
+interleave across channels and banks; burst-aligned byte addresses would zero
+those bits and send every request to channel 0, bank 0. The input must carry
+byte addresses (``parse_trace.py`` output); LLC-filtered traces are already
+line-granular and are not coalesced.
+
+Works in streaming chunks: groups still open at the end of a chunk (and every
+group starting after them) are carried into the next, so the output stays
+sorted by cycle.
+"""
+import argparse
+import configparser
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from trace_io import DEFAULT_CHUNK, iter_trace_chunks, write_trace  # noqa: E402
+
+DEFAULT_INI = Path(__file__).resolve().parents[2] / "HBM2_4Gb_x128.ini"
+
+
+def burst_bytes_from_ini(path=DEFAULT_INI):
+    """Bytes moved by one burst: bus_width (bits) * BL / 8."""
+    ini = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+    with open(path, "r") as f:
+        ini.read_file(f)
+    return ini["system"].getint("bus_width", 128) * ini["dram_structure"].getint("BL", 4) // 8
+
+
+def _concat(a, b):
+    return {k: np.concatenate([a[k], b[k]]) for k in b}
+
+
+def coalesce_chunk(chunk, burst_bytes, window):
+    """Group ids (in chunk order) and burst block numbers for one chunk of accesses."""
+    block = chunk["addr"] // np.uint64(burst_bytes)
+    order = np.lexsort((np.arange(block.size), chunk["cycle"], block))
+    b, c, w = block[order], chunk["cycle"][order], chunk["is_write"][order]
+    new = np.ones(b.size, dtype=bool)
+    new[1:] = (b[1:] != b[:-1]) | (w[1:] != w[:-1]) | (c[1:] - c[:-1] > window)
+    group = np.empty(b.size, dtype=np.int64)
+    group[order] = np.cumsum(new) - 1
+    return group, block
+
+
+def coalesce_trace(in_path, out_path, burst_bytes=None, window=16, chunk_size=DEFAULT_CHUNK):
+    """Stream ``in_path`` into a coalesced ``out_path``; returns input/output counts and the ratio."""
+    burst_bytes = burst_bytes or burst_bytes_from_ini()
+    open(out_path, "w").close()
+    carry = None
+    stats = {"input": 0, "output": 0}
+
+    def emit(chunk, final):
+        group, block = coalesce_chunk(chunk, burst_bytes, window)
+        n_groups = int(group.max()) + 1
+        start = np.full(n_groups, np.iinfo(np.int64).max)
+        np.minimum.at(start, group, chunk["cycle"])
+        last = np.full(n_groups, np.iinfo(np.int64).min)
+        np.maximum.at(last, group, chunk["cycle"])
+
+        done = np.ones(n_groups, dtype=bool)
+        if not final:
+            # Groups that could still grow, and everything starting after them, wait for the next chunk
+            still_open = last >= chunk["cycle"].max() - window
+            cutoff = start[still_open].min() if still_open.any() else np.iinfo(np.int64).max
+            done = start < cutoff
+
+        # First access of every group (chunk order is cycle order, so the lowest index)
+        first = np.full(n_groups, group.size, dtype=np.int64)
+        np.minimum.at(first, group, np.arange(group.size))
+
+        out = np.flatnonzero(done)
+        out = out[np.argsort(first[out])]
+        write_trace(out_path, block[first[out]], chunk["is_write"][first[out]], start[out], append=True)
+        stats["output"] += out.size
+        return {k: v[~done[group]] for k, v in chunk.items()}
+
+    for chunk in iter_trace_chunks(in_path, chunk_size):
+        stats["input"] += chunk["addr"].size
+        carry = emit(chunk if carry is None else _concat(carry, chunk), final=False)
+    if carry is not None and carry["addr"].size:
+        emit(carry, final=True)
+
+    stats["ratio"] = stats["input"] / stats["output"] if stats["output"] else 0.0
+    stats["burst_bytes"] = burst_bytes
+    return stats
+
+
+def add_coalesce_arguments(parser):
+    """``--coalesce-*`` options shared by the trace conversion scripts."""
+    parser.add_argument("--coalesce-window", type=int, default=0,
+                        help="Merge same-burst accesses at most this many cycles apart (0 disables coalescing).")
+    parser.add_argument("--burst-bytes", type=int, help="Burst size in bytes (default: bus_width * BL / 8 from the ini).")
+
+
+def print_summary(stats):
+    print(f"📊 Coalesced {stats['input']} accesses into {stats['output']} requests "
+          f"({stats['ratio']:.2f}x, {stats['burst_bytes']} B bursts)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge same-burst trace accesses into single requests.")
+    parser.add_argument("trace", help="Formatted trace (parse_trace.py output).")
+    parser.add_argument("output", help="Coalesced trace to write.")
+    parser.add_argument("--window", type=int, default=16, help="Max cycles between merged accesses.")
+    parser.add_argument("--burst-bytes", type=int, help="Burst size in bytes (default: bus_width * BL / 8 from the ini).")
+    parser.add_argument("--ini", default=str(DEFAULT_INI), help="DRAMSim3 ini providing BL and bus_width.")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="Lines per processing chunk.")
+    args = parser.parse_args()
+
+    stats = coalesce_trace(args.trace, args.output, args.burst_bytes or burst_bytes_from_ini(args.ini),
+                           args.window, args.chunk)
+    print_summary(stats)
+    print(f"👉 Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
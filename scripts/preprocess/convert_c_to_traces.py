@@ -3,6 +3,10 @@ import subprocess
 import argparse
 import tempfile
 from parse_trace import convert_memtrace
+from cache_filter import add_cache_arguments, filter_memtrace, print_summary
+import coalesce
+import trace_store
+from profiling import stage
 
 def compile_c_file(src_path, out_path):
     compile_flags = ["-lm"]
@@ -24,7 +28,7 @@ def run_valgrind(exe_path, trace_path):
         print(f"[!] Valgrind failed on {exe_path}")
         return False
 
-def main(folder, output_dir):
+def main(folder, output_dir, filters=None):
     os.makedirs(output_dir, exist_ok=True)
 
     for root, _, files in os.walk(folder):
@@ -39,17 +43,45 @@ def main(folder, output_dir):
 
             print(f"[*] Processing {f}...")
 
-            if not compile_c_file(full_path, exe_path):
+            # Named like the experiment directory the evaluation scripts make from this trace
+            experiment = f"exp_{base}_trace"
+            with stage("compile", experiment=experiment):
+                compiled = compile_c_file(full_path, exe_path)
+            if not compiled:
                 continue
-            if not run_valgrind(exe_path, trace_raw_path):
+            with stage("valgrind", experiment=experiment):
+                traced = run_valgrind(exe_path, trace_raw_path)
+            if not traced:
                 continue
 
-            convert_memtrace(trace_raw_path, final_trace_path)
+            with stage("convert", experiment=experiment):
+                if filters and filters.llc_size:
+                    stats = filter_memtrace(trace_raw_path, final_trace_path, filters.llc_size, filters.llc_ways,
+                                            filters.llc_line, filters.llc_flush)
+                    print_summary(stats)
+                else:
+                    convert_memtrace(trace_raw_path, final_trace_path)
+            # LLC-filtered requests are whole lines addressed by line index; there is nothing to coalesce
+            if filters and filters.coalesce_window and not filters.llc_size:
+                coalesced_path = final_trace_path + ".coalesced"
+                with stage("coalesce", experiment=experiment):
+                    stats = coalesce.coalesce_trace(final_trace_path, coalesced_path, filters.burst_bytes, filters.coalesce_window)
+                os.replace(coalesced_path, final_trace_path)
+                coalesce.print_summary(stats)
+            if filters and filters.compress:
+                packed_path = os.path.splitext(final_trace_path)[0] + trace_store.SUFFIX
+                with stage("compress", experiment=experiment):
+                    trace_store.pack_trace(final_trace_path, packed_path)
+                os.remove(final_trace_path)
+                final_trace_path = packed_path
             print(f"[+] Trace written to {final_trace_path}")
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Build C programs and extract memory traces.")
     parser.add_argument('folder', help="Folder containing C source files")
     parser.add_argument('--output', '-o', default='traces', help="Output directory for traces")
+    add_cache_arguments(parser)
+    coalesce.add_coalesce_arguments(parser)
+    parser.add_argument('--compress', action='store_true', help="Store traces as compressed, seekable .mtrace files")
     args = parser.parse_args()
-    main(args.folder, args.output)
+    main(args.folder, args.output, args)
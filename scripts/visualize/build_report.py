@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Headless, self-contained HTML report for one experiment sweep.
+
+Every experiment directory under the sweep root (``exp_*`` from the trace
+runners, ``hardware_config_*`` from the queue ablations) is first reduced, in
+worker processes, to a summary of a few hundred numbers: latency histograms on
+a fixed number of bins, mean/p50/p99/max, throughput and the mean per-stage
+waits from the lifecycle join. Figures are then drawn from those summaries,
+again in parallel, with the Agg backend, and embedded as base64 PNGs, so the
+report is a single file that renders without a display and never hands raw
+per-request arrays to matplotlib.
+
+Sections: summary table, latency PDFs per experiment (overlaid with the
+baseline sweep when ``--baseline`` is given), the #requests vs latency Pareto
+curve, latency vs queue size, the stage-wait breakdown and the
+baseline comparison.
+"""
+import argparse
+import base64
+import html
+import io
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "analyze"))
+from lifecycle import STAGES, build_lifecycle  # noqa: E402
+from stage_logs import SYSTEM_INPUT, stage_files  # noqa: E402
+
+HIST_BINS = 100
+QUEUE_SIZE_RE = re.compile(r"^hardware_config_.*?(\d+)$")
+KINDS = ("read", "write")
+COLORS = {"read": "#c0392b", "write": "#e67e22"}
+
+
+def find_experiments(sweep_dir):
+    """(name, run_dir) for every experiment with system logs, in name order."""
+    found = []
+    for exp in sorted(Path(sweep_dir).iterdir()):
+        if not exp.is_dir():
+            continue
+        run_dir = exp / "meta" if (exp / "meta").is_dir() else exp
+        if stage_files(run_dir, SYSTEM_INPUT):
+            found.append((exp.name, run_dir))
+    return found
+
+
+def _latency_summary(lat, edges):
+    if not lat.size:
+        return {"count": 0, "mean": float("nan"), "p50": float("nan"), "p99": float("nan"), "max": float("nan"),
+                "hist": np.zeros(edges.size - 1, dtype=np.int64)}
+    p50, p99 = np.percentile(lat, [50, 99])
+    return {"count": int(lat.size), "mean": float(lat.mean()), "p50": float(p50), "p99": float(p99),
+            "max": float(lat.max()), "hist": np.histogram(lat, edges)[0]}
+
+
+def summarize_experiment(name, run_dir, bins=HIST_BINS):
+    """Reduce one run to the histograms and scalars the report draws."""
+    timeline = build_lifecycle(run_dir)
+    done = timeline[(timeline["t_in"] >= 0) & (timeline["t_out"] >= 0)]
+    lat = done["total"].to_numpy()
+    is_read = done["Read"].to_numpy() == 1
+
+    edges = np.linspace(0, max(int(lat.max()) + 1, 1) if lat.size else 1, bins + 1)
+    m = QUEUE_SIZE_RE.match(name)
+    span = int(done["t_out"].max() - done["t_in"].min()) if lat.size else 0
+    # Runs without scheduler logs (e.g. DRAMSim3) have no stage boundaries
+    stages = {}
+    for stage in STAGES:
+        waits = done[stage].to_numpy()
+        waits = waits[waits >= 0]
+        if waits.size:
+            stages[stage] = float(waits.mean())
+    summary = {
+        "name": name,
+        "queue_size": int(m.group(1)) if m else None,
+        "requests": int(lat.size),
+        "throughput": lat.size / span * 1000 if span > 0 else float("nan"),  # requests per kcycle
+        "edges": edges,
+        "stages": stages or None,
+    }
+    for kind, mask in zip(KINDS, (is_read, ~is_read)):
+        summary[kind] = _latency_summary(lat[mask], edges)
+    return summary
+
+
+def _figure(figsize=(7, 4), bottom=0.13):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=figsize)
+    # Fixed margins: tight_layout would lay out (draw) every figure twice
+    fig.subplots_adjust(left=0.11, right=0.97, top=0.91, bottom=bottom)
+    return plt, fig, ax
+
+
+def _encode(plt, fig, dpi):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi)
+    plt.close(fig)
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def render_latency_pdf(summary, baseline=None, dpi=100):
+    """Read/write latency densities of one experiment from its pre-binned histograms."""
+    plt, fig, ax = _figure()
+    for label, s, style in ((None, summary, "-"), ("baseline", baseline, "--")):
+        if s is None:
+            continue
+        widths = np.diff(s["edges"])
+        for kind in KINDS:
+            st = s[kind]
+            if not st["count"]:
+                continue
+            tag = f"{kind} ({label})" if label else kind
+            ax.stairs(st["hist"] / (st["count"] * widths), s["edges"], color=COLORS[kind], linestyle=style,
+                      label=f"{tag}: mean {st['mean']:.1f}, p99 {st['p99']:.0f}")
+    ax.set_xlabel("Latency (cycles)")
+    ax.set_ylabel("Density")
+    ax.set_title(summary["name"])
+    ax.legend(fontsize=8)
+    ax.grid(True, linestyle="--", linewidth=0.5)
+    return _encode(plt, fig, dpi)
+
+
+def pareto_front(x, y):
+    """Mask of points not dominated by another with more requests and lower latency."""
+    order = np.lexsort((y, -x))
+    best = np.minimum.accumulate(y[order])
+    front = np.zeros(x.size, dtype=bool)
+    front[order] = y[order] <= best
+    return front
+
+
+def render_pareto(summaries, dpi=100):
+    """#requests vs average latency per kind, with the Pareto-optimal experiments marked."""
+    plt, fig, ax = _figure()
+    for kind, marker in zip(KINDS, "os"):
+        pts = sorted((s[kind]["count"], s[kind]["mean"]) for s in summaries if s[kind]["count"])
+        if not pts:
+            continue
+        x, y = (np.array(v, dtype=float) for v in zip(*pts))
+        ax.plot(x, y, marker=marker, linestyle="-" if kind == "read" else "--", color=COLORS[kind], label=kind.title())
+        front = pareto_front(x, y)
+        ax.scatter(x[front], y[front], s=120, facecolors="none", edgecolors="black")
+    ax.set_xlabel("Number of Requests")
+    ax.set_ylabel("Average Latency (cycles)")
+    ax.set_title("Pareto Curve: #Requests vs Avg Latency (circled: Pareto-optimal)")
+    ax.legend()
+    ax.grid(True, linestyle="--", linewidth=0.5)
+    return _encode(plt, fig, dpi)
+
+
+def render_vs_queue_size(summaries, dpi=100):
+    """Mean and p99 latency against queueSize for ablation sweeps."""
+    plt, fig, ax = _figure()
+    rows = sorted((s for s in summaries if s["queue_size"] is not None), key=lambda s: s["queue_size"])
+    sizes = [s["queue_size"] for s in rows]
+    for kind, marker in zip(KINDS, "os"):
+        ax.plot(sizes, [s[kind]["mean"] for s in rows], marker=marker, color=COLORS[kind], label=f"{kind.title()} mean")
+        ax.plot(sizes, [s[kind]["p99"] for s in rows], marker=marker, color=COLORS[kind], linestyle=":",
+                label=f"{kind.title()} p99")
+    ax.set_xscale("log", base=2)
+    ax.set_xlabel("Queue Size")
+    ax.set_ylabel("Latency (cycles)")
+    ax.set_title("Read/Write Latency vs Queue Size")
+    ax.legend(fontsize=8)
+    ax.grid(True, which="both", linestyle="--", linewidth=0.5)
+    return _encode(plt, fig, dpi)
+
+
+def render_breakdown(summaries, dpi=100):
+    """Stacked share of the mean per-stage waits per experiment."""
+    rows = [s for s in summaries if s["stages"]]
+    plt, fig, ax = _figure((max(7, 0.25 * len(rows)), 5), bottom=0.35)
+    data = np.array([[s["stages"].get(st, 0.0) for st in STAGES] for s in rows])
+    perc = data / np.maximum(data.sum(axis=1, keepdims=True), 1e-12) * 100
+    cmap = plt.get_cmap("YlOrRd")
+    bottom = np.zeros(len(rows))
+    labels = [s["name"] for s in rows]
+    for i, stage in enumerate(STAGES):
+        ax.bar(labels, perc[:, i], bottom=bottom, label=stage, color=cmap((i + 1) / (len(STAGES) + 1)))
+        bottom += perc[:, i]
+    ax.set_ylabel("Share of mean latency (%)")
+    ax.set_title("Latency Breakdown per Experiment")
+    ax.legend(loc="upper right", fontsize=8)
+    ax.tick_params(axis="x", labelrotation=90, labelsize=7)
+    return _encode(plt, fig, dpi)
+
+
+def render_comparison(pairs, dpi=100):
+    """Mean and p99 latency difference (current - baseline) per matched experiment."""
+    plt, fig, ax = _figure((max(7, 0.4 * len(pairs)), 5), bottom=0.35)
+    x = np.arange(len(pairs))
+    width = 0.2
+    for i, (kind, metric) in enumerate((k, m) for k in KINDS for m in ("mean", "p99")):
+        diff = [cur[kind][metric] - base[kind][metric] for cur, base in pairs]
+        ax.bar(x + (i - 1.5) * width, diff, width, color=COLORS[kind], alpha=1.0 if metric == "mean" else 0.5,
+               label=f"{kind} {metric}")
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.set_xticks(x, [cur["name"] for cur, _ in pairs], rotation=90, fontsize=7)
+    ax.set_ylabel("Current - baseline (cycles)")
+    ax.set_title("Latency Difference vs Baseline")
+    ax.legend(fontsize=8)
+    return _encode(plt, fig, dpi)
+
+
+def _fmt(v, spec=".1f"):
+    return "-" if v is None or v != v else format(v, spec)
+
+
+def summary_table(summaries):
+    cols = ["Experiment", "Queue size", "Reads", "Writes", "Read mean", "Read p99", "Write mean", "Write p99",
+            "Req/kcycle"]
+    rows = [[s["name"], _fmt(s["queue_size"], "d"), s["read"]["count"], s["write"]["count"],
+             _fmt(s["read"]["mean"]), _fmt(s["read"]["p99"], ".0f"), _fmt(s["write"]["mean"]),
+             _fmt(s["write"]["p99"], ".0f"), _fmt(s["throughput"], ".2f")] for s in summaries]
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in cols)
+    body = "".join("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in r) + "</tr>" for r in rows)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def build_report(sweep_dir, out_path, baseline_dir=None, jobs=None, bins=HIST_BINS, dpi=100, title=None):
+    """Aggregate and render one sweep into ``out_path``; returns the number of experiments."""
+    start = time.perf_counter()
+    experiments = find_experiments(sweep_dir)
+    baseline = find_experiments(baseline_dir) if baseline_dir else []
+    if not experiments:
+        raise SystemExit(f"❌ No experiments with system logs under {sweep_dir}")
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(summarize_experiment, n, d, bins) for n, d in experiments + baseline]
+        results = [f.result() for f in futures]
+        summaries, base = results[:len(experiments)], {s["name"]: s for s in results[len(experiments):]}
+        print(f"📊 Aggregated {len(results)} runs in {time.perf_counter() - start:.1f}s")
+
+        # (section, caption, future) in report order
+        figures = [("Pareto curve", "", pool.submit(render_pareto, summaries, dpi))]
+        if sum(s["queue_size"] is not None for s in summaries) > 1:
+            figures.append(("Latency vs queue size", "", pool.submit(render_vs_queue_size, summaries, dpi)))
+        if any(s["stages"] for s in summaries):
+            figures.append(("Latency breakdown", "", pool.submit(render_breakdown, summaries, dpi)))
+        pairs = [(s, base[s["name"]]) for s in summaries if s["name"] in base]
+        if pairs:
+            figures.append(("Comparison with baseline", "", pool.submit(render_comparison, pairs, dpi)))
+        for s in summaries:
+            figures.append(("Latency PDFs", s["name"], pool.submit(render_latency_pdf, s, base.get(s["name"]), dpi)))
+
+        sections = {}
+        for section, caption, future in figures:
+            sections.setdefault(section, []).append((caption, future.result()))
+
+    title = title or f"Report: {Path(sweep_dir).name}"
+    parts = [f"<h1>{html.escape(title)}</h1>",
+             f"<p>{len(summaries)} experiments from {html.escape(str(sweep_dir))}"
+             + (f", baseline {html.escape(str(baseline_dir))}" if baseline_dir else "") + "</p>",
+             "<h2>Summary</h2>", summary_table(summaries)]
+    for section, figs in sections.items():
+        parts.append(f"<h2>{html.escape(section)}</h2><div class='grid'>")
+        for caption, png in figs:
+            parts.append(f"<figure><img src='data:image/png;base64,{png}'/>"
+                         f"<figcaption>{html.escape(caption)}</figcaption></figure>")
+        parts.append("</div>")
+
+    style = ("body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:0.85em}"
+             "td,th{border:1px solid #ccc;padding:2px 6px;text-align:right}"
+             ".grid{display:flex;flex-wrap:wrap;gap:8px}figure{margin:0}img{max-width:100%}")
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(out_path).write_text(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+                              f"<style>{style}</style></head><body>{''.join(parts)}</body></html>")
+    print(f"✅ Wrote {out_path} in {time.perf_counter() - start:.1f}s")
+    return len(summaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a self-contained HTML report for an experiment sweep.")
+    parser.add_argument("sweep_dir", help="Sweep root (exp_* or hardware_config_* directories).")
+    parser.add_argument("--out", help="Report path (default: <sweep_dir>/report.html).")
+    parser.add_argument("--baseline", help="Second sweep (e.g. DRAMSim3) to overlay and diff against.")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count).")
+    parser.add_argument("--bins", type=int, default=HIST_BINS, help="Latency histogram bins per experiment.")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--title")
+    args = parser.parse_args()
+
+    build_report(args.sweep_dir, args.out or Path(args.sweep_dir) / "report.html", args.baseline, args.jobs,
+                 args.bins, args.dpi, args.title)
+
+
+if __name__ == "__main__":
+    main()
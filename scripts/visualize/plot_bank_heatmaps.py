@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Bank/row heatmaps of accesses and latency, in bounded memory.
+
+Request addresses from the system input log are decoded with the
+``AddressDecoder`` layout (``address_map.AddressMapping``) into a global bank
+and a row region. Two grids are accumulated:
+
+* time x bank: accesses, mean/p99 latency and row switches (an access to a
+  bank whose previous access went to another row), and
+* bank x row region: accesses and mean/p99 latency.
+
+The input and output logs (CSV or binary records) are streamed in chunks and
+joined on RequestID through a window of requests still in flight. Each cell
+keeps a count, a latency sum and a log-binned latency histogram that gives the
+p99, so memory depends on the grid size, not on the number of requests. A
+request is attributed to the time bin of its issue cycle. Requests still
+missing a response ``--max-latency`` cycles after the newest response are
+dropped from the window and only counted as accesses.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "analyze"))
+from stage_logs import SYSTEM_INPUT, SYSTEM_OUTPUT, stage_files  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from address_map import DEFAULT_CONFIG, AddressMapping  # noqa: E402
+from decode_stats import record_dtype  # noqa: E402
+
+CHUNK = 1 << 20
+# Latency histogram per cell: bin 0 is latency 0, then 8 log-spaced bins per octave up to 2^20 cycles
+LATENCY_EDGES = np.r_[0.0, np.geomspace(1, 1 << 20, 161)]
+
+
+def iter_log_chunks(path, chunk=CHUNK):
+    """(RequestID, Address, Cycle) int64 arrays of a system log, ``chunk`` rows at a time."""
+    path = Path(path)
+    if path.suffix == ".bin":
+        records = np.memmap(path, dtype=record_dtype(path), mode="r")
+        for start in range(0, records.size, chunk):
+            part = records[start:start + chunk]
+            yield (part["request_id"].astype(np.int64), part["addr"].astype(np.int64),
+                   part["cycle"].astype(np.int64))
+        return
+    wanted = ("RequestID", "Address", "Cycle")
+    reader = pd.read_csv(path, skipinitialspace=True, usecols=lambda c: c.strip() in wanted, chunksize=chunk)
+    for df in reader:
+        df.columns = [c.strip() for c in df.columns]
+        df = df.apply(pd.to_numeric, errors="coerce").dropna()
+        yield tuple(df[c].to_numpy(dtype=np.int64) for c in wanted)
+
+
+def last_cycle(path):
+    """Cycle of the last record of a log, read from its end."""
+    path = Path(path)
+    if path.suffix == ".bin":
+        records = np.memmap(path, dtype=record_dtype(path), mode="r")
+        return int(records["cycle"][-1]) if records.size else 0
+    with open(path, "rb") as f:
+        header = f.readline().decode()
+        f.seek(0, 2)
+        f.seek(max(0, f.tell() - 65536))
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    if len(lines) < 2 or lines[-1].decode() == header.strip():
+        return 0
+    column = [c.strip() for c in header.split(",")].index("Cycle")
+    return int(lines[-1].decode().split(",")[column])
+
+
+class Grid:
+    """Per-cell access count, completions, latency sum and latency histogram of an nx x ny grid."""
+
+    def __init__(self, nx, ny):
+        self.shape = (nx, ny)
+        cells = nx * ny
+        self.accesses = np.zeros(cells, dtype=np.int64)
+        self.completed = np.zeros(cells, dtype=np.int64)
+        self.latency_sum = np.zeros(cells, dtype=np.float64)
+        self.hist = np.zeros((cells, LATENCY_EDGES.size), dtype=np.int64)
+
+    def cell(self, x, y):
+        return x * self.shape[1] + y
+
+    def add_accesses(self, cell):
+        self.accesses += np.bincount(cell, minlength=self.accesses.size)
+
+    def add_latencies(self, cell, latency):
+        self.completed += np.bincount(cell, minlength=self.completed.size)
+        self.latency_sum += np.bincount(cell, weights=latency, minlength=self.latency_sum.size)
+        lat_bin = np.searchsorted(LATENCY_EDGES, latency, side="right") - 1
+        self.hist += np.bincount(cell * LATENCY_EDGES.size + lat_bin,
+                                 minlength=self.hist.size).reshape(self.hist.shape)
+
+    def mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.latency_sum / self.completed).reshape(self.shape)
+
+    def quantile(self, q):
+        """Per-cell latency quantile, interpolated linearly inside its histogram bin."""
+        cum = np.cumsum(self.hist, axis=1)
+        target = q * self.completed
+        b = np.minimum((cum < target[:, None]).sum(axis=1), LATENCY_EDGES.size - 1)
+        below = np.where(b > 0, cum[np.arange(b.size), np.maximum(b - 1, 0)], 0)
+        inside = self.hist[np.arange(b.size), b]
+        upper = np.r_[LATENCY_EDGES[1:], LATENCY_EDGES[-1]]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frac = np.clip((target - below) / inside, 0, 1)
+            value = LATENCY_EDGES[b] + frac * (upper[b] - LATENCY_EDGES[b])
+        return np.where(self.completed > 0, value, np.nan).reshape(self.shape)
+
+
+class HeatmapAccumulator:
+    def __init__(self, mapping, span, time_bins=256, row_regions=128, max_latency=1_000_000):
+        self.mapping = mapping
+        self.banks = mapping.total_banks
+        self.time_bins = time_bins
+        self.bin_cycles = max(1, -(-(span + 1) // time_bins))
+        self.row_regions = min(row_regions, 1 << mapping.row_bits)
+        self.row_shift = mapping.row_bits - int(np.log2(self.row_regions))
+        self.max_latency = max_latency
+        self.time_bank = Grid(time_bins, self.banks)
+        self.bank_row = Grid(self.banks, self.row_regions)
+        self.row_switches = np.zeros(time_bins * self.banks, dtype=np.int64)
+        self.open_row = np.full(self.banks, -1, dtype=np.int64)
+        # In-flight requests, sorted by RequestID: id, issue cycle, time x bank cell, bank x row cell
+        self.pending = tuple(np.zeros(0, dtype=np.int64) for _ in range(4))
+        self.dropped = 0
+
+    def add_inputs(self, ids, addr, cycle):
+        fields = self.mapping.decode(addr)
+        bank = (fields["channel"] * self.mapping.num_ranks + fields["rank"]) * self.mapping.num_banks + fields["bank"]
+        row = fields["row"]
+        t = np.minimum(cycle // self.bin_cycles, self.time_bins - 1)
+        tb = self.time_bank.cell(t, bank)
+        br = self.bank_row.cell(bank, row >> self.row_shift)
+        self.time_bank.add_accesses(tb)
+        self.bank_row.add_accesses(br)
+
+        # Row switches in issue order per bank, continuing from the previous chunk
+        order = np.argsort(bank, kind="stable")
+        b, r = bank[order], row[order]
+        prev = np.r_[-1, r[:-1]]
+        first = np.r_[True, b[1:] != b[:-1]]
+        prev[first] = self.open_row[b[first]]
+        switched = (prev >= 0) & (prev != r)
+        self.row_switches += np.bincount(tb[order][switched], minlength=self.row_switches.size)
+        last = np.r_[b[1:] != b[:-1], True]
+        self.open_row[b[last]] = r[last]
+
+        merged = [np.concatenate([p, v]) for p, v in zip(self.pending, (ids, cycle, tb, br))]
+        keep = np.argsort(merged[0], kind="stable")
+        self.pending = tuple(m[keep] for m in merged)
+
+    def add_outputs(self, ids, cycle):
+        p_ids, p_cycle, p_tb, p_br = self.pending
+        slot = np.searchsorted(p_ids, ids)
+        hit = slot < p_ids.size
+        hit[hit] = p_ids[slot[hit]] == ids[hit]
+        # Several monitors may log the same response; the first one counts
+        slot, out_cycle = slot[hit], cycle[hit]
+        slot, first = np.unique(slot, return_index=True)
+        out_cycle = out_cycle[first]
+        latency = (out_cycle - p_cycle[slot]).astype(np.float64)
+        self.time_bank.add_latencies(p_tb[slot], latency)
+        self.bank_row.add_latencies(p_br[slot], latency)
+
+        keep = np.ones(p_ids.size, dtype=bool)
+        keep[slot] = False
+        if cycle.size:
+            stale = keep & (p_cycle < cycle.max() - self.max_latency)
+            self.dropped += int(stale.sum())
+            keep &= ~stale
+        self.pending = tuple(p[keep] for p in self.pending)
+
+    def results(self):
+        tb, br = self.time_bank, self.bank_row
+        with np.errstate(invalid="ignore", divide="ignore"):
+            switch_rate = (self.row_switches / tb.accesses).reshape(tb.shape)
+        return {
+            "time_bank_accesses": tb.accesses.reshape(tb.shape),
+            "time_bank_mean": tb.mean(),
+            "time_bank_p99": tb.quantile(0.99),
+            "time_bank_row_switch_rate": switch_rate,
+            "bank_row_accesses": br.accesses.reshape(br.shape),
+            "bank_row_mean": br.mean(),
+            "bank_row_p99": br.quantile(0.99),
+        }
+
+
+def accumulate(run_dir, mapping, time_bins=256, row_regions=128, max_latency=1_000_000, chunk=CHUNK):
+    """Stream one run's system logs into a HeatmapAccumulator."""
+    inputs, outputs = stage_files(run_dir, SYSTEM_INPUT), stage_files(run_dir, SYSTEM_OUTPUT)
+    if not inputs:
+        raise FileNotFoundError(f"No {SYSTEM_INPUT} log in {run_dir}")
+    span = max(last_cycle(inputs[0]), last_cycle(outputs[0]) if outputs else 0)
+    acc = HeatmapAccumulator(mapping, span, time_bins, row_regions, max_latency)
+
+    in_chunks = iter_log_chunks(inputs[0], chunk)
+    issued_until = -1
+    for ids, _, cycle in (iter_log_chunks(outputs[0], chunk) if outputs else ()):
+        # A response never precedes its request, so read inputs up to this chunk's last cycle
+        while cycle.size and issued_until < cycle.max():
+            batch = next(in_chunks, None)
+            if batch is None:
+                issued_until = np.iinfo(np.int64).max
+                break
+            acc.add_inputs(*batch)
+            if batch[2].size:
+                issued_until = int(batch[2].max())
+        acc.add_outputs(ids, cycle)
+    for batch in in_chunks:
+        acc.add_inputs(*batch)
+    # Whatever is still in flight at the end of the logs never completed either
+    acc.dropped += acc.pending[0].size
+    acc.pending = tuple(p[:0] for p in acc.pending)
+    return acc
+
+
+def plot_heatmaps(acc, res, title, out_path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    panels = [
+        ("time_bank_accesses", "Accesses", True),
+        ("time_bank_mean", "Mean latency (cycles)", False),
+        ("time_bank_p99", "p99 latency (cycles)", False),
+        ("time_bank_row_switch_rate", "Row-switch rate", False),
+        ("bank_row_accesses", "Accesses", True),
+        ("bank_row_mean", "Mean latency (cycles)", False),
+        ("bank_row_p99", "p99 latency (cycles)", False),
+    ]
+    fig, axes = plt.subplots(2, 4, figsize=(20, 8.5))
+    time_extent = [0, acc.time_bins * acc.bin_cycles, acc.banks - 0.5, -0.5]
+    row_extent = [-0.5, acc.banks - 0.5, acc.row_regions - 0.5, -0.5]
+    for ax, (key, label, log) in zip(axes.flat, panels):
+        image = res[key].astype(np.float64).T
+        if key.startswith("time_bank"):
+            extent, xlabel, ylabel = time_extent, "Issue cycle", "Bank (channel, rank, bank)"
+        else:
+            extent, xlabel, ylabel = row_extent, "Bank (channel, rank, bank)", f"Row region ({1 << acc.row_shift} rows)"
+        if log:
+            masked = np.ma.masked_less_equal(image, 0)
+            norm = LogNorm(vmin=max(1, masked.min()), vmax=max(1, masked.max())) if masked.count() else None
+            im = ax.imshow(masked, aspect="auto", interpolation="nearest", extent=extent, norm=norm, cmap="viridis")
+        else:
+            im = ax.imshow(np.ma.masked_invalid(image), aspect="auto", interpolation="nearest", extent=extent,
+                           cmap="magma")
+        fig.colorbar(im, ax=ax, label=label)
+        ax.set_title(f"{'Time' if key.startswith('time_bank') else 'Row region'} x bank: {label.split(' (')[0].lower()}")
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+    axes.flat[-1].axis("off")
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=120)
+    plt.close(fig)
+
+
+def bank_summary(acc):
+    """Per-bank access share, mean latency and row-switch rate."""
+    grid = acc.bank_row
+    accesses = grid.accesses.reshape(grid.shape).sum(axis=1)
+    completed = grid.completed.reshape(grid.shape).sum(axis=1)
+    switches = acc.row_switches.reshape(acc.time_bank.shape).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "bank": np.arange(acc.banks),
+            "accesses": accesses,
+            "share": accesses / max(1, accesses.sum()),
+            "mean_latency": grid.latency_sum.reshape(grid.shape).sum(axis=1) / completed,
+            "row_switch_rate": switches / accesses,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bank/row access and latency heatmaps of simulation runs.")
+    parser.add_argument("runs", nargs="+", help="Run or experiment directories (exp_* use their meta/ logs).")
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG), help="config.json with the channel/rank/bank counts.")
+    parser.add_argument("--time-bins", type=int, default=256, help="Time bins of the time x bank grid.")
+    parser.add_argument("--row-regions", type=int, default=128, help="Row regions per bank (power of two).")
+    parser.add_argument("--max-latency", type=int, default=1_000_000,
+                        help="Cycles after which an unanswered request leaves the join window.")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="Log rows read at a time.")
+    parser.add_argument("--outdir", default="bank_heatmaps", help="Directory for the PNGs, grids and bank tables.")
+    args = parser.parse_args()
+
+    mapping = AddressMapping.from_config(args.config) if Path(args.config).exists() else AddressMapping()
+    out_dir = Path(args.outdir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for run in args.runs:
+        run = Path(run)
+        run_dir = run / "meta" if (run / "meta").is_dir() else run
+        name = run.resolve().name
+        try:
+            acc = accumulate(run_dir, mapping, args.time_bins, args.row_regions, args.max_latency, args.chunk)
+        except FileNotFoundError as e:
+            print(f"⚠️  {e}")
+            continue
+        res = acc.results()
+        np.savez_compressed(out_dir / f"{name}_grids.npz", bin_cycles=acc.bin_cycles, row_shift=acc.row_shift, **res)
+        banks = bank_summary(acc)
+        banks.to_csv(out_dir / f"{name}_banks.csv", index=False)
+        plot_heatmaps(acc, res, name, out_dir / f"{name}_bank_heatmaps.png")
+
+        hot = banks.sort_values("accesses", ascending=False).head(3)
+        print(f"📊 {name}: {int(banks['accesses'].sum())} accesses over {acc.banks} banks, "
+              f"hottest " + ", ".join(f"{b.bank} ({b.share:.1%})" for b in hot.itertuples()))
+        if acc.dropped:
+            print(f"⚠️  {acc.dropped} requests never completed (counted as accesses only)")
+        with open(out_dir / f"{name}_summary.json", "w") as f:
+            json.dump({"run": str(run_dir), "bin_cycles": acc.bin_cycles, "row_regions": acc.row_regions,
+                       "dropped": acc.dropped, "max_row_switch_rate": float(np.nanmax(banks["row_switch_rate"]))
+                       if banks["accesses"].any() else None}, f, indent=2)
+    print(f"👉 Heatmaps in {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -53,7 +53,14 @@ def plot_latency_pdf(latencies, label, outpath, num_cycles):
     # Try computing utilization from *_trace.txt
     dir_path = os.path.dirname(outpath)
     trace_file = next((f for f in os.listdir(dir_path) if f.endswith('_trace.txt')), None)
-    if trace_file:
+    trace_ref = os.path.join(dir_path, 'trace_ref.json')
+    if os.path.exists(trace_ref):
+        # Traces referenced from the trace store record their request count
+        with open(trace_ref, 'r') as f:
+            total_trace_requests = json.load(f).get('requests', 0)
+            if total_trace_requests > 0:
+                stats_dict['utilization'] = total_requests / total_trace_requests
+    elif trace_file:
         trace_path = os.path.join(dir_path, trace_file)
         with open(trace_path, 'r') as f:
             total_trace_requests = sum(1 for _ in f)
@@ -2,28 +2,35 @@
 import argparse
 import os
 import json
+import sys
+from pathlib import Path
 import pandas as pd
 from plot_stats import plot_latency_pdf  # Ensure this supports num_cycles
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "evaluate"))
+from profiling import stage  # noqa: E402
+
 def process_experiment(experiment_dir, prefix, num_cycles):
     # Paths to input and output CSV files in the experiment directory
     in_csv  = os.path.join(experiment_dir, 'input_request_stats.csv')
     out_csv = os.path.join(experiment_dir, 'output_request_stats.csv')
 
-    # Load the CSV files into pandas DataFrames
-    df_in = pd.read_csv(in_csv, skipinitialspace=True).dropna(subset=['Cycle'])
-    df_out = pd.read_csv(out_csv, skipinitialspace=True).dropna(subset=['Cycle'])
-    df_in['Cycle'] = pd.to_numeric(df_in['Cycle'], errors='coerce')
-    df_out['Cycle'] = pd.to_numeric(df_out['Cycle'], errors='coerce')
-    df_in  = df_in.dropna(subset=['Cycle'])
-    df_out = df_out.dropna(subset=['Cycle'])
+    experiment = os.path.basename(os.path.normpath(experiment_dir))
+    with stage("merge", experiment=experiment):
+        # Load the CSV files into pandas DataFrames
+        df_in = pd.read_csv(in_csv, skipinitialspace=True).dropna(subset=['Cycle'])
+        df_out = pd.read_csv(out_csv, skipinitialspace=True).dropna(subset=['Cycle'])
+        df_in['Cycle'] = pd.to_numeric(df_in['Cycle'], errors='coerce')
+        df_out['Cycle'] = pd.to_numeric(df_out['Cycle'], errors='coerce')
+        df_in  = df_in.dropna(subset=['Cycle'])
+        df_out = df_out.dropna(subset=['Cycle'])
 
-    # Merge the data based on RequestID
-    merged = pd.merge(df_in, df_out, on='RequestID', suffixes=('_in', '_out'))
-    merged['latency'] = merged['Cycle_out'] - merged['Cycle_in']
-    merged_out = merged[['RequestID', 'Address_in', 'Read_in', 'Write_in', 'Cycle_in', 'Cycle_out', 'latency']]
-    merged_out = merged_out.sort_values('RequestID')  # sort by RequestID
-    merged_out.to_csv(os.path.join(experiment_dir, 'merged_transactions.csv'), index=False)
+        # Merge the data based on RequestID
+        merged = pd.merge(df_in, df_out, on='RequestID', suffixes=('_in', '_out'))
+        merged['latency'] = merged['Cycle_out'] - merged['Cycle_in']
+        merged_out = merged[['RequestID', 'Address_in', 'Read_in', 'Write_in', 'Cycle_in', 'Cycle_out', 'latency']]
+        merged_out = merged_out.sort_values('RequestID')  # sort by RequestID
+        merged_out.to_csv(os.path.join(experiment_dir, 'merged_transactions.csv'), index=False)
 
     # Split the reads and writes
     reads_in   = merged[merged['Read_in']  == 1].sort_values('Cycle_in')
@@ -41,8 +48,9 @@ def process_experiment(experiment_dir, prefix, num_cycles):
                 - writes_in .iloc[:n_writes]['Cycle_in'].to_numpy())
 
     # Plot and save latency PDFs
-    plot_latency_pdf(lat_reads, 'read', os.path.join(experiment_dir, f"{prefix}_histo_read_latency.pdf"), num_cycles = num_cycles)
-    plot_latency_pdf(lat_writes, 'write', os.path.join(experiment_dir, f"{prefix}_histo_write_latency.pdf"), num_cycles = num_cycles)
+    with stage("plot", experiment=experiment):
+        plot_latency_pdf(lat_reads, 'read', os.path.join(experiment_dir, f"{prefix}_histo_read_latency.pdf"), num_cycles = num_cycles)
+        plot_latency_pdf(lat_writes, 'write', os.path.join(experiment_dir, f"{prefix}_histo_write_latency.pdf"), num_cycles = num_cycles)
 
     print(f"→ Latency histograms saved to {experiment_dir}")
 
@@ -6,8 +6,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 def compute_avg_latencies(meta_dir: Path) -> tuple[float, float]:
-    df_in = pd.read_csv(meta_dir / "input_request_stats.csv")
-    df_out = pd.read_csv(meta_dir / "output_request_stats.csv")
+    df_in = pd.read_csv(meta_dir / "input_request_stats.csv", skipinitialspace=True)
+    df_out = pd.read_csv(meta_dir / "output_request_stats.csv", skipinitialspace=True)
 
     # Use the earliest output cycle per RequestID
     df_out_min = df_out.groupby("RequestID", as_index=False).agg({"Cycle": "min"})
@@ -35,7 +35,11 @@ def compute_avg_latencies(meta_dir: Path) -> tuple[float, float]:
 def main():
     parser = argparse.ArgumentParser(description="Compute and plot read/write average latency vs queueSize")
     parser.add_argument("--outdir", required=True, help="Top-level experiments directory (e.g. ./exp)")
+    parser.add_argument("--out", help="Output image (default: <outdir>/read_write_vis.png)")
+    parser.add_argument("--show", action="store_true", help="Also open an interactive window")
     args = parser.parse_args()
+    if not args.show:
+        plt.switch_backend("Agg")
 
     exp_root = Path(args.outdir)
     if not exp_root.is_dir():
@@ -93,8 +97,11 @@ def main():
     plt.legend()
     plt.grid(True, which="both", linestyle="--", linewidth=0.5)
     plt.tight_layout()
-    plt.savefig('read_write_vis.png', dpi=300)
-    plt.show()
+    out = Path(args.out) if args.out else exp_root / "read_write_vis.png"
+    plt.savefig(out, dpi=300)
+    print(f"✅ Saved plot to {out}")
+    if args.show:
+        plt.show()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,56 @@
+// C ABI around TraceReplayer, built into obj_lib/libmemsim.so and loaded by
+// scripts/evaluate/memsim.py. Every handle owns its own model and context, so
+// handles can be driven concurrently from threads. The wrapper itself writes no
+// files, but the SV statistics monitors still $fopen/$fwrite their CSVs into the
+// CWD: handles in one process share that CWD and its stats files, so concurrent
+// handles clobber each other's logs unless the library is built with statsMode "off".
+#include "trace_replay.h"
+#include <cstdint>
+#include <cstddef>
+#include <vector>
+
+extern "C" {
+
+void *memsim_create(int closed, size_t mshrs) {
+    auto *sim = new TraceReplayer(closed ? ReplayMode::CLOSED : ReplayMode::OPEN, mshrs, true);
+    sim->keep_logs = false;
+    sim->reset();
+    return sim;
+}
+
+void memsim_destroy(void *handle) {
+    delete static_cast<TraceReplayer *>(handle);
+}
+
+uint64_t memsim_cycle(void *handle) {
+    return static_cast<TraceReplayer *>(handle)->cycle();
+}
+
+uint64_t memsim_mismatches(void *handle) {
+    return static_cast<TraceReplayer *>(handle)->mismatches;
+}
+
+// Replay n requests whose cycles are relative to the model's current cycle, for at
+// most max_cycles further cycles. issue/complete receive absolute model cycles (-1 if
+// the request never fired / never completed), data the response data.
+// Returns 1 if every request completed, 0 otherwise.
+int memsim_run(void *handle, size_t n,
+               const uint32_t *addr, const uint8_t *is_write, const uint64_t *cycle, const uint32_t *wdata,
+               uint64_t max_cycles, int64_t *issue, int64_t *complete, uint32_t *data) {
+    auto *sim = static_cast<TraceReplayer *>(handle);
+    std::vector<TraceEntry> trace(n);
+    for (size_t i = 0; i < n; ++i)
+        trace[i] = {addr[i], is_write[i] != 0, cycle[i], wdata[i]};
+
+    unsigned long long base = sim->cycle();
+    bool done = sim->run(trace, base + max_cycles, base);
+
+    for (size_t i = 0; i < n; ++i) {
+        issue[i] = sim->issue_cycle[i];
+        complete[i] = sim->complete_cycle[i];
+        data[i] = sim->response_data[i];
+    }
+    return done ? 1 : 0;
+}
+
+}
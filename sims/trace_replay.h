@@ -0,0 +1,439 @@
+// Trace replay against the Verilated MultiChannelSystem.
+//
+// Shared by the standalone harness (sim_trace.cpp) and the in-process library
+// (memsim_lib.cpp). All simulation state lives in a TraceReplayer, and each
+// replayer owns its own VerilatedContext, so several models can run in one
+// process on different threads.
+//
+// Builds with --savable and -DSIM_SAVABLE also get save()/restore(), which
+// checkpoint the model together with the replay position so a warm-up prefix
+// can be simulated once and continued many times.
+//
+// With open_records() the replayer appends one packed record per accepted request
+// and per response to two binary files, and check_inline = false leaves the data
+// checks to scripts/evaluate/verify_records.py, keeping them out of the cycle loop.
+#pragma once
+
+#include "VMultiChannelSystem.h"
+#include "verilated.h"
+#ifdef SIM_SAVABLE
+#include "verilated_save.h"
+#endif
+#include <cstdint>
+#include <cstdio>
+#include <iostream>
+#include <fstream>
+#include <string>
+#include <vector>
+#include <unordered_map>
+#include <algorithm>
+
+// Trace entry for input stimuli
+struct TraceEntry {
+    unsigned int addr;
+    bool is_write;
+    unsigned long long cycle;
+    unsigned int wdata;
+};
+
+// Log entry for enqueued requests
+struct EnqueueLogEntry {
+    unsigned int addr;
+    bool is_write;
+    int data; // data for write, -1 for read
+};
+
+// Log entry for dequeued responses
+struct ResponseLogEntry {
+    unsigned int addr;
+    bool is_write;
+    int data; // returned data
+};
+
+// Packed little-endian records for offline verification (verify_records.py).
+// flags: bit 0 read, bit 1 write, as in the stats monitors' binary records.
+struct RequestRecord {
+    uint32_t request_id;
+    uint32_t addr;
+    uint32_t flags;
+    uint32_t wdata;
+    uint64_t cycle;
+};
+
+struct ResponseRecord {
+    uint32_t request_id;
+    uint32_t addr;
+    uint32_t flags;
+    uint32_t data;
+    uint64_t cycle;
+};
+
+// Open issues each request at its trace cycle; closed models a core with a fixed
+// number of MSHRs that stalls while all are outstanding, keeping the trace's
+// inter-request gaps as think time between issues.
+enum class ReplayMode { OPEN, CLOSED };
+
+class TraceReplayer {
+public:
+    static constexpr unsigned long long TIMEOUT = 100000ULL;
+
+    ReplayMode replay_mode;
+    size_t mshr_window;
+    // Suppress the per-response [RESP] console log
+    bool quiet;
+    // Dump enqueue/response logs to the CWD whenever a data mismatch is seen
+    bool dump_logs_on_error = false;
+    // Keep per-request enqueue/response logs (only needed for the text dumps)
+    bool keep_logs = true;
+    // Compare response data against the trace as responses arrive
+    bool check_inline = true;
+
+    // Per trace entry of the last run(): cycle the request fired / its response fired (-1 if never)
+    std::vector<long long> issue_cycle;
+    std::vector<long long> complete_cycle;
+    std::vector<unsigned> response_data;
+    unsigned long long mismatches = 0;
+
+    std::vector<EnqueueLogEntry> enqueue_log;
+    std::vector<ResponseLogEntry> response_log;
+
+    TraceReplayer(ReplayMode mode = ReplayMode::OPEN, size_t window = 16, bool quiet_ = false)
+        : replay_mode(mode), mshr_window(std::max<size_t>(1, window)), quiet(quiet_) {
+        context = new VerilatedContext;
+        top = new VMultiChannelSystem{context};
+    }
+
+    ~TraceReplayer() {
+        close_records();
+        top->final();
+        delete top;
+        delete context;
+    }
+
+    TraceReplayer(const TraceReplayer&) = delete;
+    TraceReplayer& operator=(const TraceReplayer&) = delete;
+
+    void command_args(int argc, char **argv) { context->commandArgs(argc, argv); }
+
+    unsigned long long cycle() const { return sim_cycle; }
+
+    // Write request/response records to these files from now on
+    bool open_records(const std::string &requests, const std::string &responses) {
+        close_records();
+        request_records = fopen(requests.c_str(), "wb");
+        response_records = fopen(responses.c_str(), "wb");
+        if (!request_records || !response_records) {
+            std::cerr << "ERROR: Unable to open record files " << requests << ", " << responses << std::endl;
+            close_records();
+            return false;
+        }
+        setvbuf(request_records, nullptr, _IOFBF, RECORD_BUFFER);
+        setvbuf(response_records, nullptr, _IOFBF, RECORD_BUFFER);
+        return true;
+    }
+
+    void close_records() {
+        if (request_records) fclose(request_records);
+        if (response_records) fclose(response_records);
+        request_records = response_records = nullptr;
+    }
+
+    void reset() {
+        top->reset = 1;
+        for (int i = 0; i < 5; ++i) tick();
+        top->reset = 0;
+        tick();
+        top->io_out_ready = 0;
+    }
+
+    // Replay `trace` until every request has completed or the model reaches cycle
+    // `max_cycles`. Trace cycles are offset by `base`, so a model can be fed several
+    // traces back to back. Returns true if everything completed.
+    bool run(const std::vector<TraceEntry> &trace, unsigned long long max_cycles, unsigned long long base = 0) {
+        begin(trace, base);
+        bool done = advance(max_cycles);
+        current = nullptr;
+        return done;
+    }
+
+    // Make `trace` the trace being replayed without simulating any cycles
+    void begin(const std::vector<TraceEntry> &trace, unsigned long long base = 0) {
+        current = &trace;
+        issue_cycle.assign(trace.size(), -1);
+        complete_cycle.assign(trace.size(), -1);
+        response_data.assign(trace.size(), 0);
+        pending.clear();
+        next_idx = 0;
+        trace_base = base;
+        last_issue = 0;
+    }
+
+    // Continue the current trace until everything has completed or the model reaches
+    // cycle `stop`. Can be called repeatedly, e.g. to stop at a checkpoint cycle.
+    bool advance(unsigned long long stop) {
+        const std::vector<TraceEntry> &trace = *current;
+        while ((next_idx < trace.size() || !pending.empty()) && sim_cycle < stop) {
+            bool ready_to_issue = false;
+            if (next_idx < trace.size()) {
+                if (replay_mode == ReplayMode::OPEN)
+                    ready_to_issue = sim_cycle >= trace_base + trace[next_idx].cycle;
+                else
+                    ready_to_issue = pending.size() < mshr_window && sim_cycle >= release();
+            }
+            if (ready_to_issue) {
+                enqueue_request(next_idx);
+                next_idx++;
+                last_issue = sim_cycle;
+                continue;
+            }
+            if (!dequeue_response()) tick();
+        }
+        return next_idx == trace.size() && pending.empty();
+    }
+
+    // Requests of the current trace issued so far
+    size_t issued() const { return next_idx; }
+
+#ifdef SIM_SAVABLE
+    // Write the model and the replay position to `filename`. Only requests issued so
+    // far are part of the state, so any trace starting with them can be continued.
+    bool save(const std::string &filename) {
+        // The stats monitors' files are not part of the snapshot; flush what they hold
+        fflush(nullptr);
+        VerilatedSave os;
+        os.open(filename);
+        if (!os.isOpen()) return false;
+        auto put = [&os](uint64_t v) { os.write(&v, sizeof v); };
+        put(CHECKPOINT_VERSION);
+        put(sim_cycle); put(next_request_id); put(trace_base); put(last_issue); put(next_idx); put(mismatches);
+        put(pending.size());
+        for (const auto &p : pending) { put(p.first); put(p.second); put((*current)[p.second].wdata); }
+        put(last_write_data.size());
+        for (const auto &w : last_write_data) { put(w.first); put(w.second); }
+        os.write(issue_cycle.data(), next_idx * sizeof(long long));
+        os.write(complete_cycle.data(), next_idx * sizeof(long long));
+        os.write(response_data.data(), next_idx * sizeof(unsigned));
+        os << *top;
+        os.close();
+        return true;
+    }
+
+    // Load a snapshot written by save() in place of reset() and make `trace` the current
+    // trace. Its first issued() requests must be the ones the snapshot had issued; the
+    // write data of those still in flight is taken from the snapshot.
+    bool restore(const std::string &filename, std::vector<TraceEntry> &trace) {
+        VerilatedRestore is;
+        is.open(filename);
+        if (!is.isOpen()) return false;
+        auto get = [&is]() { uint64_t v = 0; is.read(&v, sizeof v); return v; };
+        if (get() != CHECKPOINT_VERSION) {
+            std::cerr << "ERROR: Unsupported checkpoint " << filename << std::endl;
+            return false;
+        }
+        // Run the initial blocks first so the stats monitors reopen their files in the
+        // same order, under the same handles the snapshot refers to
+        top->eval();
+
+        unsigned long long cycle = get(), request_id = get(), base = get(), issue = get(), idx = get();
+        if (idx > trace.size()) {
+            std::cerr << "ERROR: Checkpoint issued " << idx << " requests but the trace has " << trace.size() << std::endl;
+            return false;
+        }
+        begin(trace, base);
+        sim_cycle = cycle;
+        next_request_id = static_cast<unsigned>(request_id);
+        last_issue = issue;
+        next_idx = idx;
+        mismatches = get();
+        for (uint64_t n = get(); n > 0; --n) {
+            unsigned id = static_cast<unsigned>(get());
+            size_t i = get();
+            trace[i].wdata = static_cast<unsigned>(get());
+            pending[id] = i;
+        }
+        for (uint64_t n = get(); n > 0; --n) {
+            unsigned addr = static_cast<unsigned>(get());
+            last_write_data[addr] = static_cast<unsigned>(get());
+        }
+        is.read(issue_cycle.data(), next_idx * sizeof(long long));
+        is.read(complete_cycle.data(), next_idx * sizeof(long long));
+        is.read(response_data.data(), next_idx * sizeof(unsigned));
+        is >> *top;
+        is.close();
+        return true;
+    }
+#endif
+
+    void write_enqueue_log(const std::string &filename) const {
+        std::ofstream log_file(filename);
+        if (!log_file) {
+            std::cerr << "ERROR: Unable to open enqueue log file: " << filename << std::endl;
+            return;
+        }
+        for (const auto &e : enqueue_log) {
+            log_file << std::hex << "0x" << e.addr << std::dec
+                     << (e.is_write ? " WRITE " : " READ  ")
+                     << e.data << std::endl;
+        }
+    }
+
+    void write_response_log(const std::string &filename) const {
+        std::ofstream log_file(filename);
+        if (!log_file) {
+            std::cerr << "ERROR: Unable to open response log file: " << filename << std::endl;
+            return;
+        }
+        for (const auto &r : response_log) {
+            log_file << std::hex << "0x" << r.addr << std::dec
+                     << (r.is_write ? " WRITE_RESP " : " READ_RESP  ")
+                     << r.data << std::endl;
+        }
+    }
+
+private:
+    static constexpr uint64_t CHECKPOINT_VERSION = 1;
+    static constexpr size_t RECORD_BUFFER = 1 << 20;
+
+    VerilatedContext *context;
+    VMultiChannelSystem *top;
+    unsigned long long sim_cycle = 0;
+    // Mirrors the DUT's request_id counter: ids are assigned sequentially on io_in fire
+    unsigned next_request_id = 0;
+    // Outstanding requests: request id -> index into the trace being replayed
+    std::unordered_map<unsigned, size_t> pending;
+    // Track last written data by address
+    std::unordered_map<unsigned, unsigned> last_write_data;
+    const std::vector<TraceEntry> *current = nullptr;
+    // Replay position in *current, kept across advance() calls
+    size_t next_idx = 0;
+    unsigned long long trace_base = 0;
+    unsigned long long last_issue = 0;
+    FILE *request_records = nullptr;
+    FILE *response_records = nullptr;
+
+    // Closed mode: earliest cycle the next request may issue (previous issue + trace gap)
+    unsigned long long release() const {
+        const std::vector<TraceEntry> &trace = *current;
+        if (next_idx == 0) return trace_base + trace[0].cycle;
+        unsigned long long prev = trace[next_idx-1].cycle, next = trace[next_idx].cycle;
+        return next > prev ? last_issue + (next - prev) : last_issue;
+    }
+
+    void tick() {
+        top->clock = 0; top->eval();
+        top->clock = 1; top->eval();
+        sim_cycle++;
+    }
+
+    void report_mismatch() {
+        mismatches++;
+        if (dump_logs_on_error) {
+            write_enqueue_log("enqueue_log.txt");
+            write_response_log("response_log.txt");
+        }
+    }
+
+    bool enqueue_request(size_t idx) {
+        const TraceEntry &e = (*current)[idx];
+        top->io_in_valid      = 1;
+        top->io_in_bits_addr  = e.addr;
+        top->io_in_bits_wr_en = e.is_write;
+        top->io_in_bits_rd_en = !e.is_write;
+        top->io_in_bits_wdata = e.wdata;
+
+        // Keep draining responses while stalled so a full response path cannot deadlock the input
+        unsigned long long wait = 0;
+        while (!top->io_in_ready && wait++ < TIMEOUT) {
+            if (!dequeue_response()) tick();
+        }
+
+        if (!top->io_in_ready) {
+            std::cerr << "ERROR: Timeout enqueuing " << (e.is_write ? "WRITE" : "READ")
+                      << " at cycle " << sim_cycle << " addr=0x" << std::hex << e.addr << std::dec << std::endl;
+            top->io_in_valid = 0;
+            return false;
+        }
+
+        // Log enqueue
+        if (keep_logs)
+            enqueue_log.push_back({e.addr, e.is_write, e.is_write ? static_cast<int>(e.wdata) : -1});
+
+        if (request_records) {
+            RequestRecord r{next_request_id, e.addr, e.is_write ? 2u : 1u, e.is_write ? e.wdata : 0u, sim_cycle};
+            fwrite(&r, sizeof r, 1, request_records);
+        }
+
+        // Record pending for response check, keyed by request id so repeated addresses do not collide
+        pending[next_request_id++] = idx;
+        issue_cycle[idx] = static_cast<long long>(sim_cycle);
+        // Track last write data
+        if (check_inline && e.is_write) last_write_data[e.addr] = e.wdata;
+
+        tick();
+        top->io_in_valid = 0;
+        return true;
+    }
+
+    bool dequeue_response() {
+        if (!top->io_out_valid) return false;
+
+        unsigned int id   = top->io_out_bits_request_id;
+        unsigned int addr = top->io_out_bits_addr;
+        unsigned int data = top->io_out_bits_data;
+        auto it = pending.find(id);
+        bool is_write_resp = it != pending.end() ? (*current)[it->second].is_write : top->io_out_bits_wr_en;
+
+        // Console log
+        if (!quiet) {
+            std::cout << "[RESP] cycle " << sim_cycle << " ";
+            if (is_write_resp) std::cout << "WRITE_RESP";
+            else                std::cout << "READ_RESP ";
+            std::cout << " addr=0x" << std::hex << addr << std::dec
+                      << " data=0x" << std::hex << data << std::dec << std::endl;
+        }
+
+        // Record response
+        if (keep_logs)
+            response_log.push_back({addr, is_write_resp, static_cast<int>(data)});
+        if (response_records) {
+            ResponseRecord r{id, addr, is_write_resp ? 2u : 1u, data, sim_cycle};
+            fwrite(&r, sizeof r, 1, response_records);
+        }
+
+        // Verify
+        if (it != pending.end()) {
+            size_t idx = it->second;
+            complete_cycle[idx] = static_cast<long long>(sim_cycle);
+            response_data[idx] = data;
+            if (check_inline) {
+                if (is_write_resp) {
+                    // Ensure write response matches sent data
+                    unsigned sent = (*current)[idx].wdata;
+                    if (data != sent) {
+                        std::cerr << "ERROR: Write mismatch at addr 0x" << std::hex << addr
+                                  << ". Sent=0x" << sent << ", Got=0x" << data << std::dec << std::endl;
+                        report_mismatch();
+                    }
+                } else {
+                    // Read response: check against last written data if exists
+                    auto last = last_write_data.find(addr);
+                    if (last != last_write_data.end() && data != last->second) {
+                        std::cerr << "ERROR: Read mismatch at addr 0x" << std::hex << addr
+                                  << ". Expected=0x" << last->second << ", Got=0x" << data << std::dec << std::endl;
+                        report_mismatch();
+                    }
+                }
+            }
+            pending.erase(it);
+        } else if (check_inline) {
+            std::cerr << "WARNING: Received response for unknown request id " << id
+                      << " addr 0x" << std::hex << addr << std::dec << std::endl;
+        }
+
+        // Only accept responses here, so every handshake is also recorded above
+        top->io_out_ready = 1;
+        tick();
+        top->io_out_ready = 0;
+        return true;
+    }
+};
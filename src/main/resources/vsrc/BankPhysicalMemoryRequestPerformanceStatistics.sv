@@ -1,6 +1,8 @@
 module BankPhysicalMemoryRequestPerformanceStatistics #(
     parameter int RANK,
-    parameter int BANK
+    parameter int BANK,
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
 )(
     input wire clk,
     input wire reset,
@@ -16,18 +18,30 @@ module BankPhysicalMemoryRequestPerformanceStatistics #(
 );
     integer file;
     reg [1023:0] filename;
+    // Refreshes carry synthetic ids, so they are always logged in sampled mode
+    wire is_refresh = (cs == 0 && ras == 0 && cas == 0 && we == 1);
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0) || is_refresh;
     
     initial begin
-        $sformat(filename, "bank_req_queue_stats_rank%0d_bank%0d.csv", RANK, BANK);
-        file = $fopen(filename, "w");
-        $fwrite(file, "RequestID,Address,Type,Cycle\n");
+        if (BINARY != 0) begin
+            $sformat(filename, "bank_req_queue_stats_rank%0d_bank%0d.bin", RANK, BANK);
+            file = $fopen(filename, "wb");
+        end else begin
+            $sformat(filename, "bank_req_queue_stats_rank%0d_bank%0d.csv", RANK, BANK);
+            file = $fopen(filename, "w");
+            $fwrite(file, "RequestID,Address,Type,Cycle\n");
+        end
     end
 
 
     always @(posedge clk) begin
         if (reset) begin
-        end else if (req_fire) begin
-            if(cs == 0 && ras == 0 && cas == 0 && we == 1) begin 
+        end else if (req_fire && sampled) begin
+            if (BINARY != 0) begin
+                // 20-byte record: request_id, addr, {cs, ras, cas, we}, cycle (u64)
+                $fwrite(file, "%u", {globalCycle, 28'd0, cs, ras, cas, we, addr, request_id});
+            end
+            else if(cs == 0 && ras == 0 && cas == 0 && we == 1) begin 
                 $fwrite(file, "%d,%d,%s,%d\n", request_id, addr, "REFRESH", globalCycle);
             end
             else if(cs == 0 && ras == 0 && cas == 1 && we == 0) begin 
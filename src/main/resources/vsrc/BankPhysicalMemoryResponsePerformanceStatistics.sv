@@ -1,6 +1,8 @@
 module BankPhysicalMemoryResponsePerformanceStatistics #(
     parameter int RANK,
-    parameter int BANK
+    parameter int BANK,
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
 )(
     input wire clk,
     input wire reset,
@@ -14,16 +16,26 @@ module BankPhysicalMemoryResponsePerformanceStatistics #(
 );
     integer file;
     reg [1023:0] filename;
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0);
 
     initial begin
-        $sformat(filename, "bank_resp_queue_stats_rank%0d_bank%0d.csv", RANK, BANK);
-        file = $fopen(filename, "w");
-        $fwrite(file, "RequestID,Address,Data,Cycle,Active Row,Active Col\n");
+        if (BINARY != 0) begin
+            $sformat(filename, "bank_resp_queue_stats_rank%0d_bank%0d.bin", RANK, BANK);
+            file = $fopen(filename, "wb");
+        end else begin
+            $sformat(filename, "bank_resp_queue_stats_rank%0d_bank%0d.csv", RANK, BANK);
+            file = $fopen(filename, "w");
+            $fwrite(file, "RequestID,Address,Data,Cycle,Active Row,Active Col\n");
+        end
     end
 
     always @(posedge clk) begin
-        if (!reset && resp_fire) begin
-            $fwrite(file, "%d,%d,%d,%d,%d,%d\n", request_id, addr, data, globalCycle, active_row, active_col);
+        if (!reset && resp_fire && sampled) begin
+            if (BINARY != 0)
+                // 28-byte record: request_id, addr, data, cycle (u64), active_row, active_col
+                $fwrite(file, "%u", {active_col, active_row, globalCycle, data, addr, request_id});
+            else
+                $fwrite(file, "%d,%d,%d,%d,%d,%d\n", request_id, addr, data, globalCycle, active_row, active_col);
         end
     end
 endmodule
@@ -1,6 +1,8 @@
 module BankSchedulerPerformanceStatisticsOutput #(
     parameter int RANK,
-    parameter int BANK
+    parameter int BANK,
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
 )(
     input wire clk,
     input wire reset,
@@ -13,18 +15,28 @@ module BankSchedulerPerformanceStatisticsOutput #(
 );
     integer file;
     reg [1023:0] filename;
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0);
 
     initial begin
-        $sformat(filename, "output_response_stats_scheduler_rank%0d_bank%0d.csv", RANK, BANK);
-        file = $fopen(filename, "w");
-        $fwrite(file, "RequestID,Address,Type,Cycle\n");
+        if (BINARY != 0) begin
+            $sformat(filename, "output_response_stats_scheduler_rank%0d_bank%0d.bin", RANK, BANK);
+            file = $fopen(filename, "wb");
+        end else begin
+            $sformat(filename, "output_response_stats_scheduler_rank%0d_bank%0d.csv", RANK, BANK);
+            file = $fopen(filename, "w");
+            $fwrite(file, "RequestID,Address,Read,Write,Cycle\n");
+        end
     end
 
 
     always @(posedge clk) begin
         if (reset) begin
-        end else if (resp_fire) begin
-            $fwrite(file, "%d,%d,%d,%d,%d\n", request_id, addr,rd_en, wr_en, globalCycle);
+        end else if (resp_fire && sampled) begin
+            if (BINARY != 0)
+                // 20-byte record: request_id, addr, {wr_en, rd_en}, cycle (u64)
+                $fwrite(file, "%u", {globalCycle, 30'd0, wr_en, rd_en, addr, request_id});
+            else
+                $fwrite(file, "%d,%d,%d,%d,%d\n", request_id, addr,rd_en, wr_en, globalCycle);
         end
     end
 endmodule
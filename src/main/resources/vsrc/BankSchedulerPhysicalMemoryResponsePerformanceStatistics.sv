@@ -1,6 +1,8 @@
 module BankSchedulerPhysicalMemoryResponsePerformanceStatistics #(
     parameter int RANK,
-    parameter int BANK
+    parameter int BANK,
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
 )(
     input wire clk,
     input wire reset,
@@ -12,16 +14,26 @@ module BankSchedulerPhysicalMemoryResponsePerformanceStatistics #(
 );
     integer file;
     reg [1023:0] filename;
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0);
 
     initial begin
-        $sformat(filename, "memory_response_queue_stats_scheduler_rank%0d_bank%0d.csv", RANK, BANK);
-        file = $fopen(filename, "w");
-        $fwrite(file, "RequestID,Address,Cycle,Data\n");
+        if (BINARY != 0) begin
+            $sformat(filename, "memory_response_queue_stats_scheduler_rank%0d_bank%0d.bin", RANK, BANK);
+            file = $fopen(filename, "wb");
+        end else begin
+            $sformat(filename, "memory_response_queue_stats_scheduler_rank%0d_bank%0d.csv", RANK, BANK);
+            file = $fopen(filename, "w");
+            $fwrite(file, "RequestID,Address,Cycle,Data\n");
+        end
     end
 
     always @(posedge clk) begin
-        if (!reset && resp_fire) begin
-            $fwrite(file, "%d,%d,%d,%d\n", request_id, addr, globalCycle, data);
+        if (!reset && resp_fire && sampled) begin
+            if (BINARY != 0)
+                // 20-byte record: request_id, addr, cycle (u64), data
+                $fwrite(file, "%u", {data, globalCycle, addr, request_id});
+            else
+                $fwrite(file, "%d,%d,%d,%d\n", request_id, addr, globalCycle, data);
         end
     end
 endmodule
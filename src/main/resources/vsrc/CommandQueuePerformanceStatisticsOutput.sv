@@ -1,4 +1,7 @@
-module CommandQueuePerformanceStatisticsOutput(
+module CommandQueuePerformanceStatisticsOutput #(
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
+)(
     input wire clk,
     input wire reset,
     input wire resp_fire,
@@ -8,16 +11,26 @@ module CommandQueuePerformanceStatisticsOutput(
     input wire [31:0] request_id
 );
     integer file;
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0);
+
     initial begin
-        file = $fopen("memory_response_queue_stats.csv", "w");
-        $fwrite(file, "RequestID,Address,Type,Cycle\n");
+        if (BINARY != 0) begin
+            file = $fopen("memory_response_queue_stats.bin", "wb");
+        end else begin
+            file = $fopen("memory_response_queue_stats.csv", "w");
+            $fwrite(file, "RequestID,Address,Type,Cycle\n");
+        end
     end
 
 
     always @(posedge clk) begin
         if (reset) begin
-        end else if (resp_fire) begin
-            $fwrite(file, "%d,%d,%d,%d\n", request_id, addr, data, globalCycle);
+        end else if (resp_fire && sampled) begin
+            if (BINARY != 0)
+                // 20-byte record: request_id, addr, data, cycle (u64)
+                $fwrite(file, "%u", {globalCycle, data, addr, request_id});
+            else
+                $fwrite(file, "%d,%d,%d,%d\n", request_id, addr, data, globalCycle);
         end
     end
 endmodule
@@ -1,4 +1,7 @@
-module SystemQueuePerformanceStatisticsInput(
+module SystemQueuePerformanceStatisticsInput #(
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
+)(
     input wire clk,
     input wire reset,
     input wire req_fire,
@@ -10,17 +13,27 @@ module SystemQueuePerformanceStatisticsInput(
     input wire [31:0] request_id
 );
     integer file;
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0);
+
     initial begin
-        file = $fopen("input_request_stats.csv", "w");
-        $fwrite(file, "RequestID,Address,Read,Write,Cycle,Write Data\n");
+        if (BINARY != 0) begin
+            file = $fopen("input_request_stats.bin", "wb");
+        end else begin
+            file = $fopen("input_request_stats.csv", "w");
+            $fwrite(file, "RequestID,Address,Read,Write,Cycle,Write Data\n");
+        end
         $display("IN VERILOG INPUT");
     end
 
 
     always @(posedge clk) begin
         if (reset) begin
-        end else if (req_fire) begin
-            $fwrite(file, "%d,%d,%d,%d,%d,%d\n", request_id, addr, rd_en, wr_en, globalCycle, wdata);
+        end else if (req_fire && sampled) begin
+            if (BINARY != 0)
+                // 24-byte record: request_id, addr, {wr_en, rd_en}, cycle (u64), wdata
+                $fwrite(file, "%u", {wdata, globalCycle, 30'd0, wr_en, rd_en, addr, request_id});
+            else
+                $fwrite(file, "%d,%d,%d,%d,%d,%d\n", request_id, addr, rd_en, wr_en, globalCycle, wdata);
         end
     end
 endmodule
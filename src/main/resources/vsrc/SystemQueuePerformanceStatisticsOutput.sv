@@ -1,4 +1,7 @@
-module SystemQueuePerformanceStatisticsOutput(
+module SystemQueuePerformanceStatisticsOutput #(
+    parameter int BINARY = 0,
+    parameter int SAMPLE_INTERVAL = 1
+)(
     input wire clk,
     input wire reset,
     input wire resp_fire,
@@ -11,17 +14,27 @@ module SystemQueuePerformanceStatisticsOutput(
     input wire [31:0] request_id
 );
     integer file;
+    wire sampled = (SAMPLE_INTERVAL <= 1) || (request_id % SAMPLE_INTERVAL == 0);
+
     initial begin
-        file = $fopen("output_request_stats.csv", "w");
-        $fwrite(file, "RequestID,Address,Read,Write,Cycle, Write Data,Response\n");
+        if (BINARY != 0) begin
+            file = $fopen("output_request_stats.bin", "wb");
+        end else begin
+            file = $fopen("output_request_stats.csv", "w");
+            $fwrite(file, "RequestID,Address,Read,Write,Cycle, Write Data,Response\n");
+        end
         $display("IN VERILOG OUTPUT");
     end
 
 
     always @(posedge clk) begin
         if (reset) begin
-        end else if (resp_fire) begin
-            $fwrite(file, "%d,%d,%d,%d,%d,%d,%d\n", request_id, addr,rd_en, wr_en, globalCycle, wdata, data);
+        end else if (resp_fire && sampled) begin
+            if (BINARY != 0)
+                // 28-byte record: request_id, addr, {wr_en, rd_en}, cycle (u64), wdata, data
+                $fwrite(file, "%u", {data, wdata, globalCycle, 30'd0, wr_en, rd_en, addr, request_id});
+            else
+                $fwrite(file, "%d,%d,%d,%d,%d,%d,%d\n", request_id, addr,rd_en, wr_en, globalCycle, wdata, data);
         end
     end
 endmodule
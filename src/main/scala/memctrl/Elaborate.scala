@@ -5,7 +5,14 @@ import io.circe._, io.circe.generic.auto._, io.circe.parser._
 
 import java.nio.file.{Files, Paths}
 
-case class Config(queueSize: Int, bankSchedulerPolicy: String, numChannels: Int, numRanks: Int, numBanks: Int)
+case class Config(
+  queueSize:           Int,
+  bankSchedulerPolicy: String,
+  numChannels:         Int,
+  numRanks:            Int,
+  numBanks:            Int,
+  statsMode:           Option[String],
+  statsSampleInterval: Option[Int])
 
 object Elaborate extends App {
   // Load queueSize from a JSON file (e.g., "config.json")
@@ -22,13 +29,23 @@ object Elaborate extends App {
   val numChannels         = parsedConfig.numChannels
   val numRanks            = parsedConfig.numRanks
   val numBanks            = parsedConfig.numBanks
+  val statistics          = PerformanceStatisticsParameters(
+    mode = parsedConfig.statsMode.getOrElse("full"),
+    sampleInterval = parsedConfig.statsSampleInterval.getOrElse(1)
+  )
 
   printf("Found config value of queueSize = %d\n", queueSize)
   printf("Found bank scheduler policy value of policy = %s\n", bankSchedulerPolicy)
+  printf("Found statistics mode = %s (sample interval %d)\n", statistics.mode, statistics.sampleInterval)
 
   // Instantiate memory configuration parameters with default values, then update
   val defaultMemoryConfig =
-    MemoryConfigurationParameters(numberOfChannels = numChannels, numberOfRanks = numRanks, numberOfBanks = numBanks)
+    MemoryConfigurationParameters(
+      numberOfChannels = numChannels,
+      numberOfRanks = numRanks,
+      numberOfBanks = numBanks,
+      statistics = statistics
+    )
   val updatedMemoryConfig = defaultMemoryConfig
 
   // Instantiate
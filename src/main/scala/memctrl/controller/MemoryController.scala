@@ -115,8 +115,8 @@ class MultiRankMemoryController(
   respArb.io.out.ready   := respQueue.io.enq.ready
 
   // ------ Optional performance tracker ------
-  if (trackPerformance) {
-    val tracker = Module(new CommandQueuePerformanceStatistics)
+  if (trackPerformance && params.statistics.componentsEnabled) {
+    val tracker = Module(new CommandQueuePerformanceStatistics(params.statistics))
     tracker.io.in_fire  := cmdQueue.io.enq.fire
     tracker.io.in_bits  := cmdQueue.io.enq.bits
     tracker.io.out_fire := io.phyResp.fire
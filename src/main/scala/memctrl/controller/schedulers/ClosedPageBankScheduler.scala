@@ -306,8 +306,8 @@ class ClosedPageBankScheduler(
 
   // --------------------------------------------------
   // Performance tracker
-  if (trackPerformance) {
-    val perf = Module(new BankSchedulerPerformanceStatistics(localConfiguration))
+  if (trackPerformance && memoryConfig.statistics.componentsEnabled) {
+    val perf = Module(new BankSchedulerPerformanceStatistics(localConfiguration, memoryConfig.statistics))
     perf.io.in_fire           := io.req.fire
     perf.io.in_bits           := io.req.bits
     perf.io.out_fire          := io.resp.fire
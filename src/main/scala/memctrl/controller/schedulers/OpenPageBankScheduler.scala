@@ -267,8 +267,8 @@ class OpenPageBankScheduler(
 
   // --------------------------------------------------
   // Performance tracker
-  if (trackPerformance) {
-    val perf = Module(new BankSchedulerPerformanceStatistics(localConfiguration))
+  if (trackPerformance && memoryConfig.statistics.componentsEnabled) {
+    val perf = Module(new BankSchedulerPerformanceStatistics(localConfiguration, memoryConfig.statistics))
     perf.io.in_fire           := io.req.fire
     perf.io.in_bits           := io.req.bits
     perf.io.out_fire          := io.resp.fire
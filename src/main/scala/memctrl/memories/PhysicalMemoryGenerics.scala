@@ -118,7 +118,8 @@ case class MemoryConfigurationParameters(
   numberOfChannels: Int = 1,
   numberOfRanks:    Int = 2,
   numberOfBanks:    Int = 8,
-  memoryQueueSize:  Int = 256)
+  memoryQueueSize:  Int = 256,
+  statistics:       PerformanceStatisticsParameters = PerformanceStatisticsParameters())
 
 case class LocalConfigurationParameters(
   channelIndex: Int = 0,
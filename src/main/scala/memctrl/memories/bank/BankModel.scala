@@ -128,8 +128,8 @@ class DRAMBankWithWait(
   io.activeSubMemories := Mux(state === sExec, 1.U, 0.U)
 
   // optional performance tracking
-  if (trackPerformance) {
-    val perf = Module(new BankPerformanceStatistics(localConfig))
+  if (trackPerformance && memConfig.statistics.componentsEnabled) {
+    val perf = Module(new BankPerformanceStatistics(localConfig, memConfig.statistics))
     perf.io.mem_request_fire  := io.memCmd.fire
     perf.io.mem_request_bits  := io.memCmd.bits
     perf.io.mem_response_fire := io.phyResp.fire
@@ -85,9 +85,9 @@ class MultiChannelSystem(
   io.out <> respArb.io.out
 
   // Performance statistics per-channel (optional)
-  if (params.trackPerformance) {
+  if (params.trackPerformance && params.memConfiguration.statistics.systemEnabled) {
     for (i <- 0 until params.memConfiguration.numberOfChannels) {
-      val perfStats = Module(new SystemQueuePerformanceStatistics)
+      val perfStats = Module(new SystemQueuePerformanceStatistics(params.memConfiguration.statistics))
       val inFireCh  = io.in.valid && io.in.ready && (decoder.io.channelIndex === i.U)
       val outFire   = io.out.valid && io.out.ready
       perfStats.io.in_fire  := inFireCh
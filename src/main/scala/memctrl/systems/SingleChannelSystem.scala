@@ -86,8 +86,8 @@ class SingleChannelSystem(
   io.out <> memory_controller.io.out
 
   // If performance tracking is enabled:
-  if (params.trackPerformance) {
-    val perfStats = Module(new SystemQueuePerformanceStatistics)
+  if (params.trackPerformance && params.memConfiguration.statistics.systemEnabled) {
+    val perfStats = Module(new SystemQueuePerformanceStatistics(params.memConfiguration.statistics))
     // Connect the performance monitor to the tap signals.
     perfStats.io.in_fire  := inputFire
     perfStats.io.in_bits  := ctrlReq
@@ -12,13 +12,14 @@ import chisel3.util._
   *   - globalCycle: a cycle count for timestamping.
   */
 class BankPhysicalMemoryRequestPerformanceStatistics(
-  val rank: Int,
-  val bank: Int)
+  val rank:   Int,
+  val bank:   Int,
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
     extends BlackBox(
       Map(
-        "RANK" -> rank,
-        "BANK" -> bank
-      )
+        "RANK" -> IntParam(rank),
+        "BANK" -> IntParam(bank)
+      ) ++ statistics.blackBoxParams
     )
     with HasBlackBoxResource {
 
@@ -47,13 +48,14 @@ class BankPhysicalMemoryRequestPerformanceStatistics(
   *   - globalCycle: a cycle count for timestamping.
   */
 class BankPhysicalMemoryResponsePerformanceStatistics(
-  val rank: Int,
-  val bank: Int)
+  val rank:   Int,
+  val bank:   Int,
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
     extends BlackBox(
       Map(
-        "RANK" -> rank,
-        "BANK" -> bank
-      )
+        "RANK" -> IntParam(rank),
+        "BANK" -> IntParam(bank)
+      ) ++ statistics.blackBoxParams
     )
     with HasBlackBoxResource {
 
@@ -78,7 +80,10 @@ class BankPhysicalMemoryResponsePerformanceStatistics(
   *   - in_fire and in_bits represent a successful (fire) input transaction.
   *   - out_fire and out_bits represent a successful (fire) output transaction.
   */
-class BankPerformanceStatistics(localConfiguration: LocalConfigurationParameters) extends Module {
+class BankPerformanceStatistics(
+  localConfiguration: LocalConfigurationParameters,
+  statistics:         PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends Module {
   val io = IO(new Bundle {
     val mem_request_fire  = Input(Bool())
     val mem_request_bits  = Input(new PhysicalMemoryCommand)
@@ -96,13 +101,15 @@ class BankPerformanceStatistics(localConfiguration: LocalConfigurationParameters
   val perfMemRequests  = Module(
     new BankPhysicalMemoryRequestPerformanceStatistics(
       localConfiguration.rankIndex,
-      localConfiguration.bankIndex
+      localConfiguration.bankIndex,
+      statistics
     )
   )
   val perfMemResponses = Module(
     new BankPhysicalMemoryResponsePerformanceStatistics(
       localConfiguration.rankIndex,
-      localConfiguration.bankIndex
+      localConfiguration.bankIndex,
+      statistics
     )
   )
 
@@ -12,13 +12,14 @@ import chisel3.util._
   *   - globalCycle: a cycle count for timestamping.
   */
 class BankSchedulerPerformanceStatisticsInput(
-  val rank: Int,
-  val bank: Int)
+  val rank:   Int,
+  val bank:   Int,
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
     extends BlackBox(
       Map(
-        "RANK" -> rank,
-        "BANK" -> bank
-      )
+        "RANK" -> IntParam(rank),
+        "BANK" -> IntParam(bank)
+      ) ++ statistics.blackBoxParams
     )
     with HasBlackBoxResource {
   val io = IO(new Bundle {
@@ -43,13 +44,14 @@ class BankSchedulerPerformanceStatisticsInput(
   *   - globalCycle: a cycle count for timestamping.
   */
 class BankSchedulerPhysicalMemoryRequestPerformanceStatistics(
-  val rank: Int,
-  val bank: Int)
+  val rank:   Int,
+  val bank:   Int,
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
     extends BlackBox(
       Map(
-        "RANK" -> rank,
-        "BANK" -> bank
-      )
+        "RANK" -> IntParam(rank),
+        "BANK" -> IntParam(bank)
+      ) ++ statistics.blackBoxParams
     )
     with HasBlackBoxResource {
 
@@ -78,13 +80,14 @@ class BankSchedulerPhysicalMemoryRequestPerformanceStatistics(
   *   - globalCycle: a cycle count for timestamping.
   */
 class BankSchedulerPhysicalMemoryResponsePerformanceStatistics(
-  val rank: Int,
-  val bank: Int)
+  val rank:   Int,
+  val bank:   Int,
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
     extends BlackBox(
       Map(
-        "RANK" -> rank,
-        "BANK" -> bank
-      )
+        "RANK" -> IntParam(rank),
+        "BANK" -> IntParam(bank)
+      ) ++ statistics.blackBoxParams
     )
     with HasBlackBoxResource {
 
@@ -109,13 +112,14 @@ class BankSchedulerPhysicalMemoryResponsePerformanceStatistics(
   *   - globalCycle: the global cycle counter.
   */
 class BankSchedulerPerformanceStatisticsOutput(
-  val rank: Int,
-  val bank: Int)
+  val rank:   Int,
+  val bank:   Int,
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
     extends BlackBox(
       Map(
-        "RANK" -> rank,
-        "BANK" -> bank
-      )
+        "RANK" -> IntParam(rank),
+        "BANK" -> IntParam(bank)
+      ) ++ statistics.blackBoxParams
     )
     with HasBlackBoxResource {
   val io = IO(new Bundle {
@@ -138,7 +142,10 @@ class BankSchedulerPerformanceStatisticsOutput(
   *   - in_fire and in_bits represent a successful (fire) input transaction.
   *   - out_fire and out_bits represent a successful (fire) output transaction.
   */
-class BankSchedulerPerformanceStatistics(localConfiguration: LocalConfigurationParameters) extends Module {
+class BankSchedulerPerformanceStatistics(
+  localConfiguration: LocalConfigurationParameters,
+  statistics:         PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends Module {
   val io = IO(new Bundle {
     val in_fire           = Input(Bool())
     val in_bits           = Input(new ControllerRequest)
@@ -158,25 +165,29 @@ class BankSchedulerPerformanceStatistics(localConfiguration: LocalConfigurationP
   val perfIn           = Module(
     new BankSchedulerPerformanceStatisticsInput(
       localConfiguration.rankIndex,
-      localConfiguration.bankIndex
+      localConfiguration.bankIndex,
+      statistics
     )
   )
   val perfOut          = Module(
     new BankSchedulerPerformanceStatisticsOutput(
       localConfiguration.rankIndex,
-      localConfiguration.bankIndex
+      localConfiguration.bankIndex,
+      statistics
     )
   )
   val perfMemRequests  = Module(
     new BankSchedulerPhysicalMemoryRequestPerformanceStatistics(
       localConfiguration.rankIndex,
-      localConfiguration.bankIndex
+      localConfiguration.bankIndex,
+      statistics
     )
   )
   val perfMemResponses = Module(
     new BankSchedulerPhysicalMemoryResponsePerformanceStatistics(
       localConfiguration.rankIndex,
-      localConfiguration.bankIndex
+      localConfiguration.bankIndex,
+      statistics
     )
   )
 
@@ -11,7 +11,10 @@ import chisel3.util._
   *   - req_bits: the ControllerRequest transferred.
   *   - globalCycle: a cycle count for timestamping.
   */
-class CommandQueuePerformanceStatisticsInput extends BlackBox with HasBlackBoxResource {
+class CommandQueuePerformanceStatisticsInput(
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends BlackBox(statistics.blackBoxParams)
+    with HasBlackBoxResource {
   val io = IO(new Bundle {
     val clk         = Input(Clock())
     val reset       = Input(Bool())
@@ -36,7 +39,10 @@ class CommandQueuePerformanceStatisticsInput extends BlackBox with HasBlackBoxRe
   *   - resp_bits: the ControllerResponse transferred.
   *   - globalCycle: the global cycle counter.
   */
-class CommandQueuePerformanceStatisticsOutput extends BlackBox with HasBlackBoxResource {
+class CommandQueuePerformanceStatisticsOutput(
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends BlackBox(statistics.blackBoxParams)
+    with HasBlackBoxResource {
   val io = IO(new Bundle {
     val clk         = Input(Clock())
     val reset       = Input(Bool())
@@ -56,7 +62,9 @@ class CommandQueuePerformanceStatisticsOutput extends BlackBox with HasBlackBoxR
   *   - in_fire and in_bits represent a successful (fire) input transaction.
   *   - out_fire and out_bits represent a successful (fire) output transaction.
   */
-class CommandQueuePerformanceStatistics extends Module {
+class CommandQueuePerformanceStatistics(
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends Module {
   val io = IO(new Bundle {
     val in_fire  = Input(Bool())
     val in_bits  = Input(new PhysicalMemoryCommand)
@@ -69,8 +77,8 @@ class CommandQueuePerformanceStatistics extends Module {
   cycleCounter := cycleCounter + 1.U
 
   // Instantiate the BlackBox modules
-  val perfIn  = Module(new CommandQueuePerformanceStatisticsInput)
-  val perfOut = Module(new CommandQueuePerformanceStatisticsOutput)
+  val perfIn  = Module(new CommandQueuePerformanceStatisticsInput(statistics))
+  val perfOut = Module(new CommandQueuePerformanceStatisticsOutput(statistics))
 
   // Connect clock and reset
   perfIn.io.clk    := clock
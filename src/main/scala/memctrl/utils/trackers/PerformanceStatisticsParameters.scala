@@ -0,0 +1,38 @@
+package memctrl
+
+import chisel3.experimental._
+
+/** Elaboration-time selection of what the SV statistics writers record.
+  *
+  * Modes:
+  *   - "full": every monitor writes a text CSV row per fire (the original behaviour).
+  *   - "off": no monitors are instantiated.
+  *   - "system-only": only the SystemQueue input/output monitors are instantiated.
+  *   - "sampled": every monitor, but only requests whose id is a multiple of sampleInterval (refreshes always).
+  *   - "binary": every monitor, writing fixed-width little-endian records to `*.bin` instead of text.
+  */
+case class PerformanceStatisticsParameters(
+  mode:           String = "full",
+  sampleInterval: Int = 1) {
+  require(
+    PerformanceStatisticsParameters.modes.contains(mode),
+    s"Unknown statistics mode '$mode', expected one of ${PerformanceStatisticsParameters.modes.mkString(", ")}"
+  )
+  require(sampleInterval > 0, "sampleInterval must be positive")
+
+  /** SystemQueue input/output monitors */
+  val systemEnabled: Boolean = mode != "off"
+
+  /** Command queue, bank scheduler and bank monitors */
+  val componentsEnabled: Boolean = mode != "off" && mode != "system-only"
+
+  /** Verilog parameters shared by every statistics BlackBox */
+  def blackBoxParams: Map[String, Param] = Map(
+    "BINARY"          -> IntParam(if (mode == "binary") 1 else 0),
+    "SAMPLE_INTERVAL" -> IntParam(if (mode == "sampled") sampleInterval else 1)
+  )
+}
+
+object PerformanceStatisticsParameters {
+  val modes: Seq[String] = Seq("full", "off", "system-only", "sampled", "binary")
+}
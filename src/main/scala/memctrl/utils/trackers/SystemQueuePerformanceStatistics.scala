@@ -11,7 +11,10 @@ import chisel3.util._
   *   - req_bits: the ControllerRequest transferred.
   *   - globalCycle: a cycle count for timestamping.
   */
-class SystemQueuePerformanceStatisticsInput extends BlackBox with HasBlackBoxResource {
+class SystemQueuePerformanceStatisticsInput(
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends BlackBox(statistics.blackBoxParams)
+    with HasBlackBoxResource {
   val io = IO(new Bundle {
     val clk         = Input(Clock())
     val reset       = Input(Bool())
@@ -35,7 +38,10 @@ class SystemQueuePerformanceStatisticsInput extends BlackBox with HasBlackBoxRes
   *   - resp_bits: the ControllerResponse transferred.
   *   - globalCycle: the global cycle counter.
   */
-class SystemQueuePerformanceStatisticsOutput extends BlackBox with HasBlackBoxResource {
+class SystemQueuePerformanceStatisticsOutput(
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends BlackBox(statistics.blackBoxParams)
+    with HasBlackBoxResource {
   val io = IO(new Bundle {
     val clk         = Input(Clock())
     val reset       = Input(Bool())
@@ -59,7 +65,9 @@ class SystemQueuePerformanceStatisticsOutput extends BlackBox with HasBlackBoxRe
   *   - in_fire and in_bits represent a successful (fire) input transaction.
   *   - out_fire and out_bits represent a successful (fire) output transaction.
   */
-class SystemQueuePerformanceStatistics extends Module {
+class SystemQueuePerformanceStatistics(
+  statistics: PerformanceStatisticsParameters = PerformanceStatisticsParameters())
+    extends Module {
   val io = IO(new Bundle {
     val in_fire  = Input(Bool())
     val in_bits  = Input(new ControllerRequest)
@@ -72,8 +80,8 @@ class SystemQueuePerformanceStatistics extends Module {
   cycleCounter := cycleCounter + 1.U
 
   // Instantiate the BlackBox modules
-  val perfIn  = Module(new SystemQueuePerformanceStatisticsInput)
-  val perfOut = Module(new SystemQueuePerformanceStatisticsOutput)
+  val perfIn  = Module(new SystemQueuePerformanceStatisticsInput(statistics))
+  val perfOut = Module(new SystemQueuePerformanceStatisticsOutput(statistics))
 
   // Connect clock and reset
   perfIn.io.clk    := clock